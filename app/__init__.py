@@ -74,3 +74,8 @@
 # except Exception as e:
 #     import logging
 #     logging.error(f"Failed to load smart contract on startup: {e}")
+
+# Load the Celery app with Django so @shared_task uses it.
+from .celery import app as celery_app
+
+__all__ = ("celery_app",)
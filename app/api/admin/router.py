@@ -3,6 +3,9 @@ from web3 import Web3
 from django.conf import settings
 from pydantic import BaseModel
 import os
+from app.api.smartcontract.fees import get_fee_oracle
+from app.api.smartcontract.nonces import get_nonce_manager
+from app.api.smartcontract.providers import get_web3
 
 router = Router(tags=["admin"])
 
@@ -10,7 +13,7 @@ class RoleRequest(BaseModel):
     address: str
 
 def get_contract():
-    w3 = Web3(Web3.HTTPProvider(os.environ.get('WEB3_RPC')))
+    w3 = get_web3(os.environ.get('WEB3_RPC'))
     contract_address = os.environ.get('CERTIFICATE_REGISTRY_ADDRESS')
     abi_path = os.path.join(settings.BASE_DIR, 'contracts/CertificateRegistry.abi')
     if not os.path.exists(abi_path):
@@ -35,12 +38,12 @@ def grant_issuer_role(request, data: RoleRequest):
     owner_address = os.environ.get('CONTRACT_OWNER_ADDRESS')
     private_key = os.environ.get('CONTRACT_OWNER_PRIVATE_KEY')
     w3, contract = get_contract()
-    tx = contract.functions.grantRole(ISSUER_ROLE, data.address).build_transaction({
+    nonces = get_nonce_manager(w3)
+    tx = get_fee_oracle(w3).build_transaction(contract.functions.grantRole(ISSUER_ROLE, data.address), {
         'from': owner_address,
-        'nonce': w3.eth.get_transaction_count(owner_address),
+        'nonce': nonces.allocate(owner_address),
     })
-    signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    tx_hash = nonces.send(w3.eth.account.from_key(private_key), tx)
     return {"success": True, "tx_hash": tx_hash.hex()}
 
 @router.post("/revoke_issuer_role")
@@ -50,10 +53,10 @@ def revoke_issuer_role(request, data: RoleRequest):
     owner_address = os.environ.get('CONTRACT_OWNER_ADDRESS')
     private_key = os.environ.get('CONTRACT_OWNER_PRIVATE_KEY')
     w3, contract = get_contract()
-    tx = contract.functions.revokeRole(ISSUER_ROLE, data.address).build_transaction({
+    nonces = get_nonce_manager(w3)
+    tx = get_fee_oracle(w3).build_transaction(contract.functions.revokeRole(ISSUER_ROLE, data.address), {
         'from': owner_address,
-        'nonce': w3.eth.get_transaction_count(owner_address),
+        'nonce': nonces.allocate(owner_address),
     })
-    signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    tx_hash = nonces.send(w3.eth.account.from_key(private_key), tx)
     return {"success": True, "tx_hash": tx_hash.hex()}
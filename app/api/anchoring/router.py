@@ -0,0 +1,236 @@
+from typing import List, Optional
+
+from django.utils import timezone
+from ninja import Router, Schema
+from ninja.errors import HttpError
+from web3 import Web3
+
+from app.api.smartcontract.anchoring import (
+    anchor_batch,
+    get_root_cache,
+    queue_certificate,
+    revoke_anchored,
+    seal_batch,
+    sync_batch,
+    verify_anchored,
+    verify_with_proof,
+)
+from app.api.smartcontract.contract_manager import ContractManager
+from app.api.smartcontract.indexer import normalize_address
+from app.api.smartcontract.revocations import get_revocation_index, normalize_diploma_id
+from app.api.smartcontract.tx_jobs import UnsupportedContractError, require_functions
+from app.models import AnchoredCertificate, MerkleBatch
+
+router = Router(tags=["anchoring"])
+
+manager = ContractManager()
+
+
+class AnchorCertificateRequest(Schema):
+    cert_hash: str
+    student_address: str
+    metadata: str = ""
+    ipfs_cid: str = ""
+
+
+class AnchoredCertificateOut(Schema):
+    cert_hash: str
+    student: str
+    issuer: str
+    metadata: str
+    ipfs_hash: str
+    status: str
+    root: Optional[str] = None
+    leaf_index: Optional[int] = None
+    proof: List[str] = []
+    anchored_at: Optional[int] = None
+    is_valid: bool = False
+    is_revoked: bool = False
+
+
+class ProofVerificationRequest(Schema):
+    cert_hash: str
+    student_address: str
+    root: str
+    proof: List[str]
+
+
+class ProofVerificationOut(Schema):
+    is_valid: bool
+    is_revoked: bool
+    anchored_at: Optional[int] = None
+
+
+class MerkleBatchOut(Schema):
+    root: str
+    leaf_count: int
+    status: str
+    job_id: Optional[str] = None
+    created_at: str
+    anchored_at: Optional[str] = None
+
+
+class ErrorResponse(Schema):
+    error: str
+
+
+# Contract functions behind the anchoring endpoints.
+ANCHOR = ("anchorMerkleRoot", "merkleRoots")
+VERIFY = ("merkleRoots",)
+
+
+def _contract(*functions):
+    """The current contract; 501 if its ABI lacks any of ``functions``."""
+    manager.refresh()
+    contract = manager.get_contract()
+    if contract is None:
+        raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
+    try:
+        require_functions(contract, *functions)
+    except UnsupportedContractError as e:
+        raise HttpError(501, str(e)) from e
+    return contract
+
+
+def _batch_payload(batch):
+    return {
+        "root": batch.root,
+        "leaf_count": batch.leaf_count,
+        "status": batch.status,
+        "job_id": str(batch.job_id) if batch.job_id else None,
+        "created_at": batch.created_at.isoformat(),
+        "anchored_at": batch.anchored_at.isoformat() if batch.anchored_at else None,
+    }
+
+
+@router.post(
+    "/certificates",
+    response={200: AnchoredCertificateOut, 400: ErrorResponse, 409: ErrorResponse},
+)
+def anchor_certificate(request, data: AnchorCertificateRequest):
+    """
+    Queue a certificate for the next Merkle batch. Only the batch root goes on
+    chain; the proof is available here once the batch is sealed.
+    """
+    contract = _contract(*ANCHOR)
+    if AnchoredCertificate.objects.filter(
+        contract_address=normalize_address(contract.address),
+        diploma_id=normalize_diploma_id(data.cert_hash),
+    ).exists():
+        return 409, {"error": "Certificate already queued for anchoring."}
+    try:
+        queue_certificate(
+            contract,
+            data.cert_hash,
+            data.student_address,
+            issuer=manager.web3.eth.accounts[0],
+            metadata=data.metadata,
+            ipfs_hash=data.ipfs_cid,
+        )
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    return verify_anchored(manager, data.cert_hash)
+
+
+@router.get(
+    "/certificates/{cert_hash}",
+    response={200: AnchoredCertificateOut, 404: ErrorResponse},
+)
+def anchored_certificate(request, cert_hash: str):
+    """Batch status, proof and local verification of an anchored certificate."""
+    _contract(*VERIFY)
+    result = verify_anchored(manager, cert_hash)
+    if result is None:
+        return 404, {"error": "Certificate not found."}
+    return result
+
+
+@router.post(
+    "/certificates/{cert_hash}/revoke",
+    response={200: dict, 404: ErrorResponse, 409: ErrorResponse},
+)
+def revoke_anchored_certificate(request, cert_hash: str):
+    """Queue revokeAnchoredCertificate with the stored proof; follow it at GET /tx/{job_id}."""
+    contract = _contract("revokeAnchoredCertificate")
+    certificate = (
+        AnchoredCertificate.objects.select_related("batch__job")
+        .filter(
+            contract_address=normalize_address(contract.address),
+            diploma_id=normalize_diploma_id(cert_hash),
+        )
+        .first()
+    )
+    if certificate is None:
+        return 404, {"error": "Certificate not found."}
+    try:
+        job = revoke_anchored(certificate)
+    except ValueError as e:
+        return 409, {"error": str(e)}
+    return {"job_id": str(job.id), "status": job.status}
+
+
+@router.post("/verify", response={200: ProofVerificationOut, 400: ErrorResponse})
+def verify_proof(request, data: ProofVerificationRequest):
+    """
+    Verify a certificate from a proof held by the caller. Only the root is
+    looked up (once, then cached); the proof is checked locally.
+    """
+    contract = _contract(*VERIFY)
+    try:
+        Web3.to_checksum_address(data.student_address)
+        valid, anchored_at = verify_with_proof(
+            contract, data.cert_hash, data.student_address, data.root, data.proof
+        )
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    is_revoked = valid and get_revocation_index(manager).is_revoked(data.cert_hash)
+    return {
+        "is_valid": valid and not is_revoked,
+        "is_revoked": is_revoked,
+        "anchored_at": anchored_at,
+    }
+
+
+@router.post("/seal", response=Optional[MerkleBatchOut])
+def seal(request):
+    """Seal the pending certificates now instead of waiting for the batch window."""
+    contract = _contract(*ANCHOR)
+    batch = seal_batch(contract.address, manager.web3.eth.accounts[0])
+    return _batch_payload(batch) if batch else None
+
+
+@router.get("/batches/{root}", response={200: MerkleBatchOut, 404: ErrorResponse})
+def merkle_batch(request, root: str):
+    contract = _contract()
+    batch = MerkleBatch.objects.filter(
+        contract_address=normalize_address(contract.address), root=root.lower()
+    ).first()
+    if batch is None:
+        return 404, {"error": "Batch not found."}
+    return _batch_payload(sync_batch(batch))
+
+
+@router.post(
+    "/batches/{root}/retry",
+    response={200: MerkleBatchOut, 404: ErrorResponse, 409: ErrorResponse},
+)
+def retry_batch(request, root: str):
+    """Send the anchor transaction of a failed batch again."""
+    contract = _contract(*ANCHOR)
+    batch = MerkleBatch.objects.filter(
+        contract_address=normalize_address(contract.address), root=root.lower()
+    ).first()
+    if batch is None:
+        return 404, {"error": "Batch not found."}
+    if sync_batch(batch).status != MerkleBatch.FAILED:
+        return 409, {
+            "error": f"Batch is {batch.status}, only failed batches can be retried."
+        }
+    if get_root_cache().anchored_at(contract, batch.root):
+        # Anchored after all (e.g. the receipt was lost): nothing to resend.
+        MerkleBatch.objects.filter(pk=batch.pk).update(
+            status=MerkleBatch.ANCHORED, anchored_at=timezone.now()
+        )
+        batch.refresh_from_db()
+        return _batch_payload(batch)
+    return _batch_payload(anchor_batch(batch, manager.web3.eth.accounts[0]))
@@ -25,6 +25,9 @@ routers = [
     ("/issuer/", "app.api.issuer.router.router", ["issuer"]),
     ("/student/", "app.api.student.router.router", ["student"]),
     ("/public/", "app.api.public.router.router", ["public"]),
+    ("/async/", "app.api.smartcontract.async_router.router", ["async"]),
+    ("/tx/", "app.api.transactions.router.router", ["transactions"]),
+    ("/anchoring/", "app.api.anchoring.router.router", ["anchoring"]),
 ]
 
 # Track which routers have been added
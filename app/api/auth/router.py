@@ -10,6 +10,9 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from web3 import Web3
 
 from app.api.smartcontract.contract_manager import ContractManager
+from app.api.smartcontract.fees import get_fee_oracle
+from app.api.smartcontract.nonces import get_nonce_manager
+from app.api.smartcontract.providers import get_web3
 from app.models import CustomUser, Account as UserAccount, AccountRole
 from django.conf import settings
 import os
@@ -135,7 +138,7 @@ def login(request, login_data: LoginRequest):
     # Special check to ensure the default account has the ISSUER_ROLE
     if address.lower() == "0xf39fd6e51aad88f6f4ce6ab8827279cffFb92266".lower():
         try:
-            w3 = Web3(Web3.HTTPProvider('http://ganache:8545'))
+            w3 = get_web3('http://ganache:8545')
             abi, contract_address = get_certificate_registry_contract()
             contract = w3.eth.contract(address=contract_address, abi=abi)
             ISSUER_ROLE = w3.keccak(text='ISSUER_ROLE')
@@ -145,15 +148,12 @@ def login(request, login_data: LoginRequest):
                 funder_address, funder_private_key = get_ganache_funder(w3)
                 if funder_address and funder_private_key and funder_address.lower() == address.lower():
                     admin_account = w3.eth.account.from_key(funder_private_key)
-                    nonce = w3.eth.get_transaction_count(address)
-                    tx = contract.functions.grantRole(ISSUER_ROLE, address).build_transaction({
+                    nonces = get_nonce_manager(w3)
+                    tx = get_fee_oracle(w3).build_transaction(contract.functions.grantRole(ISSUER_ROLE, address), {
                         'from': address,
-                        'nonce': nonce,
-                        'gas': 200000,
-                        'gasPrice': w3.to_wei('2', 'gwei'),
+                        'nonce': nonces.allocate(address),
                     })
-                    signed_tx = admin_account.sign_transaction(tx)
-                    tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+                    tx_hash = nonces.send(admin_account, tx)
                     w3.eth.wait_for_transaction_receipt(tx_hash)
                     print(f"Successfully granted ISSUER_ROLE to {address}. Tx: {tx_hash.hex()}")
                 else:
@@ -2,10 +2,14 @@ from ninja import Router, Schema
 from web3 import Web3
 from app.models import Certificate
 import os
+from typing import Optional
 
 import app.api.auth
 from app.api.authorization import JWTAuth
+from app.api.smartcontract.certificate_cache import get_certificate_cache
 from app.api.smartcontract.contract_manager import ContractManager
+from app.api.smartcontract.fees import get_fee_oracle
+from app.api.smartcontract.nonces import get_nonce_manager
 
 
 
@@ -21,7 +25,10 @@ class UnsignedTx(Schema):
     data: str
     value: int
     gas: int
-    gasPrice: int
+    # Either gasPrice (legacy nodes) or the two EIP-1559 fields, see app/api/smartcontract/fees.py.
+    gasPrice: Optional[int] = None
+    maxFeePerGas: Optional[int] = None
+    maxPriorityFeePerGas: Optional[int] = None
     nonce: int
     chainId: int
 
@@ -75,12 +82,11 @@ def issue_certificate(request, data: IssueRequest):
                 hexstr=data.certificate_hash if data.certificate_hash.startswith("0x") else "0x" + data.certificate_hash),
             Web3.to_checksum_address(data.student_address),
             data.ipfs_cid
-        ).build_transaction({
+        )
+        tx_data = get_fee_oracle(manager.web3).build_transaction(tx_data, {
             'from': issuer_address,
-            'nonce': Web3.eth.get_transaction_count(issuer_address),
-            'gas': 2000000, # Placeholder, estimate gas properly
-            'gasPrice': Web3.eth.gas_price,
-            'chainId': Web3.eth.chain_id
+            # Allocated here so several unsigned transactions can be signed and sent back to back.
+            'nonce': get_nonce_manager(manager.web3).allocate(issuer_address),
         })
 
         return tx_data
@@ -98,12 +104,10 @@ def revoke_certificate(request, data: RevokeRequest):
     tx_data = contract.functions.revokeCertificate(
         Web3.to_bytes(
             hexstr=data.certificate_hash if data.certificate_hash.startswith("0x") else "0x" + data.certificate_hash),
-    ).build_transaction({
+    )
+    tx_data = get_fee_oracle(manager.web3).build_transaction(tx_data, {
         'from': issuer_address,
-        'nonce': Web3.eth.get_transaction_count(issuer_address),
-        'gas': 2000000,
-        'gasPrice': Web3.eth.gas_price,
-        'chainId': Web3.eth.chain_id
+        'nonce': get_nonce_manager(manager.web3).allocate(issuer_address),
     })
 
     return tx_data
@@ -112,9 +116,11 @@ def revoke_certificate(request, data: RevokeRequest):
 def get_certificate_file(request, certificate_hash: str):
     contract = manager.get_contract()
     try:
-        cert_data = contract.functions.getCertificate(Web3.to_bytes(hexstr=certificate_hash if certificate_hash.startswith("0x") else "0x" + certificate_hash),).call()
-        on_chain_student_address = cert_data[1]
-        ipfs_cid_str = cert_data[4] # Assuming ipfsCid is at index 4
+        cert = get_certificate_cache().lookup(certificate_hash, contract)
+        if cert is None:
+            return 404, {"error": "Certificate not found."}
+        on_chain_student_address = cert["student"]
+        ipfs_cid_str = cert["ipfs_hash"]
 
         # Access Control Check
         is_issuer = 'issuer' in request.auth_roles
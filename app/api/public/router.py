@@ -1,8 +1,12 @@
 from ninja import Router
-from web3 import Web3
 from django.conf import settings
 from pydantic import BaseModel
 import os
+from app.api.smartcontract.anchoring import verify_anchored
+from app.api.smartcontract.bloom import get_certificate_bloom
+from app.api.smartcontract.certificate_cache import get_certificate_cache
+from app.api.smartcontract.contract_manager import ContractManager
+from app.api.smartcontract.providers import get_web3
 
 from django.http import JsonResponse
 import requests
@@ -24,7 +28,7 @@ class VerificationResult(BaseModel):
     error: str = None
 
 def get_contract():
-    w3 = Web3(Web3.HTTPProvider(os.environ.get('WEB3_RPC')))
+    w3 = get_web3(os.environ.get('WEB3_RPC'))
     contract_address = os.environ.get('CERTIFICATE_REGISTRY_ADDRESS')
     abi_path = os.path.join(settings.BASE_DIR, 'contracts/CertificateRegistry.abi')
     if not os.path.exists(abi_path):
@@ -34,6 +38,25 @@ def get_contract():
     contract = w3.eth.contract(address=contract_address, abi=abi)
     return w3, contract
 
+def verify_merkle_anchored(certificate_hash):
+    manager = ContractManager()
+    manager.refresh()
+    anchored = verify_anchored(manager, certificate_hash) if manager.get_contract() is not None else None
+    # Unknown hashes are reported as not found (and are never cached)
+    if anchored is None or anchored["anchored_at"] is None:
+        return VerificationResult(is_valid=False, is_revoked=False, error="Certificate not found.")
+    # The proof was checked locally against the cached, anchored root
+    result = VerificationResult(
+        is_valid=anchored["is_valid"],
+        is_revoked=anchored["is_revoked"],
+        issuer=anchored["issuer"],
+        student=anchored["student"],
+        timestamp=anchored["anchored_at"],
+    )
+    if not anchored["is_valid"] and not anchored["is_revoked"]:
+        result.error = "Merkle proof does not match the anchored root."
+    return result
+
 @router.post("/verify/{certificate_hash}", response=VerificationResult)
 @ratelimit(key='ip', rate='100/h', block=True)
 def verify_certificate(request, certificate_hash: str, payload: RecaptchaPayload):
@@ -58,20 +81,21 @@ def verify_certificate(request, certificate_hash: str, payload: RecaptchaPayload
 
     try:
         w3, contract = get_contract()
-        cert_data = contract.functions.getCertificate(w3.to_bytes(hexstr=certificate_hash)).call()
-        # cert_data is a tuple: (issuer, student, timestamp, isRevoked)
-        issuer, student, timestamp, is_revoked = cert_data
+        # Hashes that were never registered are turned away without an eth_call
+        cert = None
+        if get_certificate_bloom(contract).might_contain(certificate_hash):
+            cert = get_certificate_cache().lookup(certificate_hash, contract)
 
-        # Check if the certificate exists (issuer will not be the zero address)
-        if issuer == "0x0000000000000000000000000000000000000000":
-            return VerificationResult(is_valid=False, is_revoked=False, error="Certificate not found.")
+        # Not registered individually: it may be part of an anchored Merkle batch
+        if cert is None:
+            return verify_merkle_anchored(certificate_hash)
 
         return VerificationResult(
-            is_valid=not is_revoked,
-            is_revoked=is_revoked,
-            issuer=issuer,
-            student=student,
-            timestamp=timestamp
+            is_valid=not cert["is_revoked"],
+            is_revoked=cert["is_revoked"],
+            issuer=cert["issuer"],
+            student=cert["student"],
+            timestamp=cert["issued_at"]
         )
     except Exception as e:
         return VerificationResult(is_valid=False, is_revoked=False, error=str(e))
@@ -1,9 +1,7 @@
 #!/bin/env python3
 
-from web3 import Web3
-from web3.middleware import geth_poa_middleware
-
-import os, sys
+from app.api.smartcontract.fees import get_fee_oracle
+from app.api.smartcontract.providers import get_default_web3, get_web3
 
 def getFileContent(file_name):
     file = open(file_name, "r")
@@ -11,19 +9,18 @@ def getFileContent(file_name):
     file.close()
     return data.replace("\n","")
 
-# Connect to a geth node
-def connect_to_geth_poa(url):
-   web3 = Web3(Web3.HTTPProvider(url))
+# Connect to a geth node (the configured endpoints when url is None)
+def connect_to_geth_poa(url=None):
+   web3 = get_web3(url, poa=True) if url else get_default_web3(poa=True)
    if not web3.is_connected():
-      sys.exit("Connection failed!")
-   web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+      raise ConnectionError(f"Connection failed! ({web3.provider})")
    return web3
 
-# Connect to a geth node
-def connect_to_geth_pow(url):
-   web3 = Web3(Web3.HTTPProvider(url))
+# Connect to a geth node (the configured endpoints when url is None)
+def connect_to_geth_pow(url=None):
+   web3 = get_web3(url) if url else get_default_web3()
    if not web3.is_connected():
-      sys.exit("Connection failed!")
+      raise ConnectionError(f"Connection failed! ({web3.provider})")
    return web3
 
 
@@ -44,10 +41,8 @@ def deploy_contract(_web3, sender_account, abi_file, bin_file, arg1):
     bytecode = bytes.fromhex(bytecode)
 
     contract = _web3.eth.contract(abi=abi, bytecode=bytecode)
-    if arg1 is None:
-        tx_hash = contract.constructor().transact({ 'from': sender_account })
-    else:
-        tx_hash = contract.constructor(arg1).transact({ 'from': sender_account })
+    constructor = contract.constructor() if arg1 is None else contract.constructor(arg1)
+    tx_hash = get_fee_oracle(_web3).transact(constructor, { 'from': sender_account })
     print("... Waiting for block")
     tx_receipt = _web3.eth.wait_for_transaction_receipt(tx_hash)
     contract_address = tx_receipt.contractAddress
@@ -0,0 +1,293 @@
+import logging
+import os
+import threading
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from web3 import Web3
+
+from app.api.smartcontract.cache import TwoTierCache
+from app.api.smartcontract.indexer import normalize_address
+from app.api.smartcontract.merkle import MerkleTree, leaf_hash, verify_proof
+from app.api.smartcontract.revocations import get_revocation_index, normalize_diploma_id
+from app.api.smartcontract.tx_jobs import enqueue_transaction
+from app.models import AnchoredCertificate, MerkleBatch, TransactionJob
+
+logger = logging.getLogger(__name__)
+
+MERKLE_BATCH_MAX_LEAVES = int(os.getenv("MERKLE_BATCH_MAX_LEAVES", "10000"))
+MERKLE_BATCH_WINDOW = float(os.getenv("MERKLE_BATCH_WINDOW", "300"))
+MERKLE_ROOT_CACHE_SIZE = int(os.getenv("MERKLE_ROOT_CACHE_SIZE", "10000"))
+
+PENDING = "pending"
+
+
+def pending_certificates(contract_address):
+    return AnchoredCertificate.objects.filter(
+        contract_address=normalize_address(contract_address), batch__isnull=True
+    )
+
+
+def queue_certificate(contract, cert_hash, student, issuer, metadata="", ipfs_hash=""):
+    """Add a certificate to the next Merkle batch of ``contract``.
+
+    Raises ValueError for bad input or a hash that is already queued. When
+    MERKLE_BATCH_MAX_LEAVES certificates are waiting the batch is sealed by
+    the Celery worker right away instead of at the end of the window.
+    """
+    diploma_id = normalize_diploma_id(cert_hash)
+    if len(bytes.fromhex(diploma_id)) != 32:
+        raise ValueError("cert_hash must be 32 bytes")
+    contract_address = normalize_address(contract.address)
+    try:
+        certificate = AnchoredCertificate.objects.create(
+            contract_address=contract_address,
+            diploma_id=diploma_id,
+            student=Web3.to_checksum_address(student),
+            issuer=issuer,
+            metadata=metadata,
+            ipfs_hash=ipfs_hash,
+        )
+    except IntegrityError as e:
+        raise ValueError(
+            f"Certificate {cert_hash} is already queued for anchoring"
+        ) from e
+    if pending_certificates(contract_address).count() >= MERKLE_BATCH_MAX_LEAVES:
+        from app.tasks import seal_merkle_batch
+
+        seal_merkle_batch.delay(contract_address, issuer)
+    return certificate
+
+
+def _assign_leaves(batch, certificates):
+    """Point ``batch`` at the tree over ``certificates`` and store each one's leaf index and proof."""
+    tree = MerkleTree([leaf_hash(c.diploma_id, c.student) for c in certificates])
+    batch.root, batch.leaf_count = Web3.to_hex(tree.root), len(certificates)
+    for index, certificate in enumerate(certificates):
+        certificate.leaf_index = index
+        certificate.proof = [Web3.to_hex(sibling) for sibling in tree.proof(index)]
+
+
+def seal_batch(contract_address, sender, max_leaves=MERKLE_BATCH_MAX_LEAVES):
+    """Build the tree over the oldest pending certificates and queue the anchor transaction.
+
+    The candidates are read first and then claimed with a conditional
+    UPDATE (``batch IS NULL``), so a row sealed meanwhile by a concurrent
+    sealer is left out. The tree is rebuilt over the rows actually claimed
+    when that differs from the candidates. Returns the MerkleBatch, or None
+    if nothing was pending.
+    """
+    contract_address = normalize_address(contract_address)
+    with transaction.atomic():
+        candidates = list(
+            pending_certificates(contract_address).order_by("created_at", "id")[
+                :max_leaves
+            ]
+        )
+        if not candidates:
+            return None
+        batch = MerkleBatch(
+            contract_address=contract_address, status=MerkleBatch.ANCHORING
+        )
+        _assign_leaves(batch, candidates)
+        batch.save()
+        claimed = AnchoredCertificate.objects.filter(
+            pk__in=[c.pk for c in candidates], batch__isnull=True
+        ).update(batch=batch)
+        if claimed == 0:
+            batch.delete()
+            return None
+        certificates = candidates
+        if claimed < len(candidates):
+            certificates = list(
+                AnchoredCertificate.objects.filter(batch=batch).order_by(
+                    "created_at", "id"
+                )
+            )
+            _assign_leaves(batch, certificates)
+            batch.save(update_fields=["root", "leaf_count"])
+        AnchoredCertificate.objects.bulk_update(
+            certificates, ["leaf_index", "proof"], batch_size=1000
+        )
+    logger.info(
+        f"Sealed Merkle batch {batch.root} with {batch.leaf_count} certificates"
+    )
+    return anchor_batch(batch, sender)
+
+
+def anchor_batch(batch, sender):
+    """Queue (or re-queue, for a failed batch) the anchorMerkleRoot transaction of ``batch``."""
+    try:
+        job = enqueue_transaction(
+            "anchor_merkle_root",
+            root=batch.root,
+            leaf_count=batch.leaf_count,
+            sender=sender,
+        )
+    except Exception as e:
+        logger.error(f"Could not queue the anchor of Merkle batch {batch.root}: {e}")
+        batch.status = MerkleBatch.FAILED
+        batch.save(update_fields=["status"])
+        raise
+    batch.job = job
+    batch.status = MerkleBatch.ANCHORING
+    batch.save(update_fields=["job", "status"])
+    return sync_batch(batch)
+
+
+def sync_batch(batch):
+    """Carry the outcome of the anchor transaction over to ``batch``."""
+    if batch.status != MerkleBatch.ANCHORING or batch.job_id is None:
+        return batch
+    job = TransactionJob.objects.get(pk=batch.job_id)
+    if job.status == TransactionJob.CONFIRMED:
+        batch.status, batch.anchored_at = MerkleBatch.ANCHORED, job.updated_at
+        batch.save(update_fields=["status", "anchored_at"])
+    elif job.status == TransactionJob.FAILED:
+        batch.status = MerkleBatch.FAILED
+        batch.save(update_fields=["status"])
+        logger.warning(f"Anchoring Merkle batch {batch.root} failed: {job.error}")
+    return batch
+
+
+def revoke_anchored(certificate):
+    """Queue revokeAnchoredCertificate for ``certificate`` with the proof of its batch.
+
+    The contract only accepts a revocation from the issuer that anchored the
+    root (or an admin) together with a valid proof, so the job is sent from
+    the account that sent the anchor transaction. Raises ValueError while the
+    certificate's batch is not anchored.
+    """
+    batch = certificate.batch
+    if batch is None or sync_batch(batch).status != MerkleBatch.ANCHORED:
+        raise ValueError("Certificate is not anchored yet")
+    return enqueue_transaction(
+        "revoke_anchored_certificate",
+        root=batch.root,
+        cert_hash="0x" + certificate.diploma_id,
+        student=certificate.student,
+        proof=certificate.proof,
+        sender=batch.job.params.get("sender") if batch.job_id else None,
+    )
+
+
+def seal_due_batches(contract_address, sender, window=MERKLE_BATCH_WINDOW):
+    """Seal full batches, and the remainder once its oldest certificate has waited ``window`` seconds."""
+    sealed = []
+    while True:
+        pending = pending_certificates(contract_address)
+        oldest = (
+            pending.order_by("created_at").values_list("created_at", flat=True).first()
+        )
+        if oldest is None:
+            break
+        if (
+            pending.count() < MERKLE_BATCH_MAX_LEAVES
+            and (timezone.now() - oldest).total_seconds() < window
+        ):
+            break
+        batch = seal_batch(contract_address, sender)
+        if batch is None:
+            break
+        sealed.append(batch)
+    for batch in MerkleBatch.objects.filter(
+        contract_address=normalize_address(contract_address),
+        status=MerkleBatch.ANCHORING,
+    ):
+        sync_batch(batch)
+    return sealed
+
+
+class AnchoredRootCache:
+    """When each Merkle root was anchored, read from the contract's ``merkleRoots``.
+
+    An anchored root never changes, so positive answers are cached (in
+    process and in the shared cache) without expiry. Unknown roots are not
+    cached, the batch may still be on its way.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or TwoTierCache(
+            "merkle_root", max_entries=MERKLE_ROOT_CACHE_SIZE
+        )
+
+    def anchored_at(self, contract, root):
+        """Block timestamp at which ``root`` was anchored, or None."""
+        root = Web3.to_hex(Web3.to_bytes(hexstr=root))
+        key = f"{Web3.to_checksum_address(contract.address)}:{root}"
+        anchored_at = self.cache.get(key)
+        if anchored_at is None:
+            if not hasattr(contract.functions, "merkleRoots"):
+                return None
+            anchored_at = contract.functions.merkleRoots(
+                Web3.to_bytes(hexstr=root)
+            ).call()
+            if not anchored_at:
+                return None
+            self.cache.set(key, anchored_at)
+        return anchored_at
+
+
+_root_cache = None
+_root_cache_lock = threading.Lock()
+
+
+def get_root_cache():
+    global _root_cache
+    with _root_cache_lock:
+        if _root_cache is None:
+            _root_cache = AnchoredRootCache()
+        return _root_cache
+
+
+def verify_with_proof(contract, cert_hash, student, root, proof):
+    """Check a certificate against a proof and root supplied by the caller; no database access."""
+    anchored_at = get_root_cache().anchored_at(contract, root)
+    valid = anchored_at is not None and verify_proof(
+        leaf_hash(normalize_diploma_id(cert_hash), student), proof, root
+    )
+    return valid, anchored_at
+
+
+def verify_anchored(manager, cert_hash):
+    """Status of an anchored certificate from its stored proof, or None if it was never queued."""
+    contract = manager.get_contract()
+    diploma_id = normalize_diploma_id(cert_hash)
+    certificate = (
+        AnchoredCertificate.objects.select_related("batch")
+        .filter(
+            contract_address=normalize_address(contract.address), diploma_id=diploma_id
+        )
+        .first()
+    )
+    if certificate is None:
+        return None
+    result = {
+        "cert_hash": "0x" + diploma_id,
+        "student": certificate.student,
+        "issuer": certificate.issuer,
+        "metadata": certificate.metadata,
+        "ipfs_hash": certificate.ipfs_hash,
+        "status": PENDING,
+        "root": None,
+        "leaf_index": certificate.leaf_index,
+        "proof": certificate.proof,
+        "anchored_at": None,
+        "is_valid": False,
+        "is_revoked": False,
+    }
+    batch = certificate.batch
+    if batch is not None:
+        sync_batch(batch)
+        result.update(status=batch.status, root=batch.root)
+        if batch.status == MerkleBatch.ANCHORED:
+            valid, anchored_at = verify_with_proof(
+                contract, diploma_id, certificate.student, batch.root, certificate.proof
+            )
+            result["anchored_at"] = anchored_at
+            if valid:
+                result["is_revoked"] = get_revocation_index(manager).is_revoked(
+                    diploma_id
+                )
+                result["is_valid"] = not result["is_revoked"]
+    return result
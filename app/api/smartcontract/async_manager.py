@@ -0,0 +1,69 @@
+import threading
+import time
+
+from web3 import Web3
+
+from app.api.smartcontract.contract_manager import (
+    CONTRACT_RELOAD_CHECK_INTERVAL,
+    EMPTY_SNAPSHOT,
+    ContractManager,
+    artifact_stamp,
+    read_contract_artifacts,
+)
+from app.api.smartcontract.providers import CONTRACT_RPC_URL, get_async_web3
+
+
+class AsyncContractManager:
+    """AsyncWeb3 counterpart of ContractManager for ``async def`` endpoints.
+
+    Reads the same artifacts as ContractManager, with the same change detection
+    and immutable snapshots, so a redeploy is picked up without re-reading the
+    files on every request.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.web3 = None
+            cls._instance._snapshot = EMPTY_SNAPSHOT
+            cls._instance._checked_at = 0.0
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def connect_web3(self, url=CONTRACT_RPC_URL):
+        if self.web3 is None:
+            self.web3 = get_async_web3(url, poa=True)
+        return self.web3
+
+    def _load(self, paths, stamp):
+        try:
+            abi, address, digest = read_contract_artifacts(*paths)
+            contract = self.web3.eth.contract(
+                address=Web3.to_checksum_address(address), abi=abi
+            )
+            return EMPTY_SNAPSHOT._replace(
+                abi=abi, address=address, contract=contract, stamp=stamp, digest=digest
+            )
+        except Exception as e:
+            return EMPTY_SNAPSHOT._replace(error=str(e), stamp=stamp)
+
+    def refresh(self, force=False):
+        self.connect_web3()
+        now = time.monotonic()
+        if not force and now - self._checked_at < CONTRACT_RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            paths = ContractManager().artifact_paths()
+            stamp = artifact_stamp(paths)
+            if force or stamp is None or stamp != self._snapshot.stamp:
+                self._snapshot = self._load(paths, stamp)
+            self._checked_at = now
+
+    def get_contract(self):
+        self.refresh()
+        return self._snapshot.contract
+
+    def get_error(self):
+        return self._snapshot.error
@@ -0,0 +1,190 @@
+import asyncio
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from ninja import Router
+from ninja.errors import HttpError
+from ninja.responses import Response
+from web3 import Web3
+
+from app.api.smartcontract.async_manager import AsyncContractManager
+from app.api.smartcontract.providers import get_async_web3
+from app.api.smartcontract.roles import ROLES
+from app.api.smartcontract.router import (
+    CertificateListResponse,
+    CertificateOut,
+    ErrorResponse,
+    RolesResponse,
+    certificate_list_response,
+    manager,
+)
+from app.api.wallet.router import WalletBalanceRequest, WalletBalanceResponse
+
+router = Router(tags=["async"])
+
+async_manager = AsyncContractManager()
+
+ROLE_HASHES = tuple(ROLES.items())
+
+
+def _cert_hash_bytes(cert_hash):
+    return bytes.fromhex(cert_hash[2:] if cert_hash.startswith("0x") else cert_hash)
+
+
+def _unpack_certificate(cert_data):
+    # cert_data: (issuer, student, timestamp, isRevoked[, ipfsCid])
+    if len(cert_data) == 5:
+        return cert_data
+    issuer, student, timestamp, is_revoked = cert_data
+    return issuer, student, timestamp, is_revoked, ""
+
+
+async def _get_certificate(cert_hash):
+    contract = async_manager.get_contract()
+    if contract is None:
+        raise Exception(f"Contract not loaded: {async_manager.get_error()}")
+    return _unpack_certificate(
+        await contract.functions.getCertificate(_cert_hash_bytes(cert_hash)).call()
+    )
+
+
+@router.get("/verify_certificate/{cert_hash}")
+async def verify_certificate(request, cert_hash: str):
+    """Async variant of /smartcontract/verify_certificate."""
+    try:
+        issuer, student, timestamp, is_revoked, ipfs_hash = await _get_certificate(
+            cert_hash
+        )
+        return {
+            "hash": cert_hash,
+            "issuer": issuer,
+            "student": student,
+            "timestamp": timestamp,
+            "is_revoked": is_revoked,
+            "ipfs_hash": ipfs_hash,
+        }
+    except Exception as e:
+        return {"error": f"Certificate not found or error: {str(e)}"}
+
+
+@router.get("/validate_certificate/", response=CertificateOut)
+async def validate_certificate(request, cert_hash: str):
+    """Async variant of /smartcontract/validate_certificate."""
+    try:
+        issuer, student, timestamp, is_revoked, ipfs_hash = await _get_certificate(
+            cert_hash
+        )
+    except Exception as e:
+        return {"error": f"Certificate not found or error: {str(e)}"}
+    return CertificateOut(
+        cert_hash=cert_hash,
+        issuer=issuer,
+        student=student,
+        issued_at=timestamp,
+        ipfs_cid=ipfs_hash if not is_revoked and ipfs_hash else "",
+        role="Issuer",
+        gas_used=None,
+    )
+
+
+@router.get("/check_roles/{address}", response={200: RolesResponse, 400: ErrorResponse})
+async def check_roles(request, address: str):
+    """Async variant of /smartcontract/check_roles; the three hasRole calls run concurrently."""
+    try:
+        contract = async_manager.get_contract()
+        if not contract:
+            return Response({"error": "Contract not loaded"}, status=400)
+        checksummed = Web3.to_checksum_address(address)
+        results = await asyncio.gather(
+            *(
+                contract.functions.hasRole(role_hash, checksummed).call()
+                for _, role_hash in ROLE_HASHES
+            ),
+            return_exceptions=True,
+        )
+        # A failed role check counts as "not granted", as in the sync endpoint.
+        return {
+            "roles": [
+                name
+                for (name, _), has_role in zip(ROLE_HASHES, results, strict=True)
+                if has_role is True
+            ]
+        }
+    except Exception as e:
+        return Response({"error": str(e)}, status=400)
+
+
+async def _certificate_list(**query):
+    # The list endpoints read the event index (or the batched log scanner); run
+    # them on a worker thread so they do not hold the event loop.
+    def load():
+        manager.refresh()
+        if manager.get_contract() is None:
+            raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
+        return certificate_list_response(**query)
+
+    try:
+        return await sync_to_async(load, thread_sensitive=False)()
+    except HttpError:
+        raise
+    except Exception as e:
+        raise HttpError(500, f"Failed to list certificates: {str(e)}") from e
+
+
+@router.get("/list_certificates", response=CertificateListResponse)
+async def list_certificates(
+    request,
+    issuer: Optional[str] = None,
+    student: Optional[str] = None,
+    from_block: Optional[int] = None,
+    to_block: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    direction: str = "asc",
+):
+    return await _certificate_list(
+        issuer=issuer,
+        student=student,
+        from_block=from_block,
+        to_block=to_block,
+        cursor=cursor,
+        limit=limit,
+        direction=direction,
+    )
+
+
+@router.get("/list_certificates_by_issuer/", response=CertificateListResponse)
+async def list_certificates_by_issuer(
+    request,
+    issuer_address: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    direction: str = "asc",
+):
+    return await _certificate_list(
+        issuer=issuer_address, cursor=cursor, limit=limit, direction=direction
+    )
+
+
+@router.get("/list_certificates_by_student/", response=CertificateListResponse)
+async def list_certificates_by_student(
+    request,
+    student_address: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    direction: str = "asc",
+):
+    return await _certificate_list(
+        student=student_address, cursor=cursor, limit=limit, direction=direction
+    )
+
+
+@router.post("/wallet/balance", response=WalletBalanceResponse)
+async def get_balance(request, data: WalletBalanceRequest):
+    """Async variant of /wallet/balance."""
+    try:
+        w3 = get_async_web3(data.rpc_url)
+        balance = await w3.eth.get_balance(Web3.to_checksum_address(data.address))
+        return WalletBalanceResponse(address=data.address, balance=str(balance))
+    except Exception as e:
+        return WalletBalanceResponse(address=data.address, balance=f"Error: {str(e)}")
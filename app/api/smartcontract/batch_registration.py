@@ -0,0 +1,200 @@
+import logging
+import os
+
+from web3 import Web3
+from web3.logs import DISCARD
+
+from app.api.smartcontract.revocations import normalize_diploma_id
+from app.api.smartcontract.tx_jobs import enqueue_transaction, require_functions
+from app.models import TransactionJob
+
+logger = logging.getLogger(__name__)
+
+CERTIFICATE_BATCH_GAS_FRACTION = float(
+    os.getenv("CERTIFICATE_BATCH_GAS_FRACTION", "0.5")
+)
+CERTIFICATE_BATCH_MAX_ITEMS = int(os.getenv("CERTIFICATE_BATCH_MAX_ITEMS", "500"))
+CERTIFICATE_BATCH_PROBE_ITEMS = int(os.getenv("CERTIFICATE_BATCH_PROBE_ITEMS", "10"))
+CERTIFICATE_BATCH_GAS_MARGIN = float(os.getenv("CERTIFICATE_BATCH_GAS_MARGIN", "1.2"))
+
+
+class BatchRegistrar:
+    """Queues many off-chain certificates for registration in as few transactions as possible.
+
+    The items are split into chunks whose estimated gas fits
+    CERTIFICATE_BATCH_GAS_FRACTION of the block gas limit (sized from a probe
+    chunk, halved while a chunk is still too large) and each chunk is queued
+    as one register_certificates_batch TransactionJob. Raises
+    UnsupportedContractError for a deployment without ``registerCertificatesBatch``.
+    Nothing waits for a receipt; batch_job_results reads each item's outcome
+    from the CertificateRegistered / CertificateSkipped events once a job is
+    final.
+    """
+
+    def __init__(
+        self,
+        contract,
+        sender,
+        gas_fraction=CERTIFICATE_BATCH_GAS_FRACTION,
+        max_items=CERTIFICATE_BATCH_MAX_ITEMS,
+    ):
+        require_functions(contract, "registerCertificatesBatch")
+        self.contract = contract
+        self.web3 = contract.w3
+        self.sender = sender
+        self.gas_fraction = gas_fraction
+        self.max_items = max_items
+
+    def _batch_call(self, chunk):
+        return batch_call(self.contract, [job_item(item) for item in chunk])
+
+    def _estimate(self, chunk):
+        return self._batch_call(chunk).estimate_gas({"from": self.sender})
+
+    def _chunks(self, items):
+        """Yield (chunk, gas) pairs covering ``items`` in order."""
+        block_gas_limit = self.web3.eth.get_block("latest")["gasLimit"]
+        budget = block_gas_limit * self.gas_fraction
+        probe = items[:CERTIFICATE_BATCH_PROBE_ITEMS]
+        per_item = self._estimate(probe) / len(probe)
+        size = max(
+            1,
+            min(
+                self.max_items, int(budget // (per_item * CERTIFICATE_BATCH_GAS_MARGIN))
+            ),
+        )
+        position = 0
+        while position < len(items):
+            chunk = items[position : position + size]
+            gas = self._estimate(chunk)
+            while gas * CERTIFICATE_BATCH_GAS_MARGIN > budget and len(chunk) > 1:
+                # Items larger than the probe: shrink this chunk and the following ones.
+                size = max(1, len(chunk) // 2)
+                chunk = chunk[:size]
+                gas = self._estimate(chunk)
+            yield chunk, min(int(gas * CERTIFICATE_BATCH_GAS_MARGIN), block_gas_limit)
+            position += len(chunk)
+
+    def _queue(self, items, jobs):
+        """Queue ``jobs`` ((items, kind, params) triples) in order; on failure the rest of ``items`` get the error."""
+        try:
+            for chunk, kind, params in jobs:
+                job = enqueue_transaction(kind, sender=self.sender, **params)
+                for item in chunk:
+                    item["job_id"] = str(job.id)
+        except Exception as e:
+            logger.error(
+                f"Batch registration stopped after queueing {sum('job_id' in item for item in items)} items: {e}"
+            )
+            for item in items:
+                if "job_id" not in item:
+                    item["error"] = str(e)
+
+    def _batch_jobs(self, items):
+        for chunk, gas in self._chunks(items):
+            yield (
+                chunk,
+                "register_certificates_batch",
+                {"gas": gas, "certificates": [job_item(item) for item in chunk]},
+            )
+
+    def register(self, entries):
+        """``entries``: dicts with cert_hash, student, metadata, ipfs_cid.
+
+        Returns one result per entry, in order: the job that will register it,
+        or why it was not queued.
+        """
+        items, seen = [], set()
+        for entry in entries:
+            item = {"cert_hash": entry["cert_hash"], "error": None}
+            items.append(item)
+            try:
+                diploma_id = bytes.fromhex(normalize_diploma_id(entry["cert_hash"]))
+                student = Web3.to_checksum_address(entry["student"])
+            except ValueError as e:
+                item["error"] = f"Invalid input: {e}"
+                continue
+            if len(diploma_id) != 32:
+                item["error"] = "Invalid input: cert_hash must be 32 bytes"
+            elif not entry.get("ipfs_cid"):
+                item["error"] = "IPFS hash is required for off-chain storage"
+            elif diploma_id in seen:
+                item["error"] = "Duplicate cert_hash in request"
+            else:
+                seen.add(diploma_id)
+                item.update(
+                    id=diploma_id,
+                    student=student,
+                    metadata=entry.get("metadata") or "",
+                    ipfs_cid=entry["ipfs_cid"],
+                )
+        pending = [item for item in items if "id" in item]
+        if pending:
+            self._queue(pending, self._batch_jobs(pending))
+        return [
+            {
+                "cert_hash": item["cert_hash"],
+                "job_id": item.get("job_id"),
+                "error": item["error"],
+            }
+            for item in items
+        ]
+
+
+def job_item(item):
+    """JSON-safe form of a validated item, as stored in the job params."""
+    return {
+        "cert_hash": Web3.to_hex(item["id"]),
+        "student": item["student"],
+        "metadata": item["metadata"],
+        "ipfs_cid": item["ipfs_cid"],
+    }
+
+
+def batch_call(contract, certificates):
+    """registerCertificatesBatch over ``certificates`` (job_item dicts)."""
+    return contract.functions.registerCertificatesBatch(
+        [
+            Web3.to_bytes(hexstr=certificate["cert_hash"])
+            for certificate in certificates
+        ],
+        [certificate["student"] for certificate in certificates],
+        [certificate["metadata"] for certificate in certificates],
+        [certificate["ipfs_cid"] for certificate in certificates],
+    )
+
+
+def batch_job_results(job, contract):
+    """Outcome of each certificate of a register_certificates_batch job.
+
+    ``success`` is None while the job is not final. For a confirmed batch the
+    receipt's events tell which items were registered and why others were skipped.
+    """
+    results = [
+        {"cert_hash": certificate["cert_hash"], "success": None, "error": None}
+        for certificate in job.params["certificates"]
+    ]
+    if job.status == TransactionJob.FAILED:
+        for result in results:
+            result.update(success=False, error=job.error or "Transaction failed")
+    elif job.status == TransactionJob.CONFIRMED:
+        receipt = contract.w3.eth.get_transaction_receipt(job.tx_hash)
+        events = contract.events
+        registered = {
+            bytes(log.args.diplomaId)
+            for log in events.CertificateRegistered().process_receipt(
+                receipt, errors=DISCARD
+            )
+        }
+        skipped = {
+            bytes(log.args.diplomaId): log.args.reason
+            for log in events.CertificateSkipped().process_receipt(
+                receipt, errors=DISCARD
+            )
+        }
+        for result in results:
+            diploma_id = Web3.to_bytes(hexstr=result["cert_hash"])
+            result["success"] = diploma_id in registered
+            if not result["success"]:
+                result["error"] = skipped.get(diploma_id, "Not registered")
+    return results
@@ -0,0 +1,95 @@
+import os
+import threading
+
+from app.api.smartcontract.cache import TwoTierCache
+from app.api.smartcontract.rpc_batch import (
+    RPC_BATCH_SIZE,
+    batch_request,
+    hex_to_int,
+    to_hex_hash,
+)
+
+BLOCK_CACHE_SIZE = int(os.getenv("BLOCK_CACHE_SIZE", "10000"))
+BLOCK_CACHE_CONFIRMATIONS = int(os.getenv("BLOCK_CACHE_CONFIRMATIONS", "12"))
+
+
+def _header_from_rpc(block):
+    return {
+        "number": hex_to_int(block["number"]),
+        "hash": to_hex_hash(block["hash"]),
+        "parentHash": to_hex_hash(block["parentHash"]),
+        "timestamp": hex_to_int(block["timestamp"]),
+    }
+
+
+class BlockHeaderCache:
+    """Block headers (number, hash, parentHash, timestamp) keyed by block number.
+
+    Only blocks at least ``confirmations`` below the head are cached; those are
+    treated as immutable. Newer blocks are fetched every time. Keys are
+    namespaced by the genesis hash so a restarted dev chain does not serve
+    headers from the previous one.
+    """
+
+    def __init__(self, web3, confirmations=BLOCK_CACHE_CONFIRMATIONS, cache=None):
+        self.web3 = web3
+        self.confirmations = max(0, confirmations)
+        self.cache = cache or TwoTierCache("block_header", max_entries=BLOCK_CACHE_SIZE)
+        self._chain = None
+
+    def _chain_key(self):
+        if self._chain is None:
+            self._chain = self.web3.to_hex(self.web3.eth.get_block(0).hash)
+        return self._chain
+
+    def prefetch(self, block_numbers, batch_size=RPC_BATCH_SIZE):
+        """Headers for every given block number, fetching all misses in JSON-RPC batches."""
+        numbers = sorted({int(n) for n in block_numbers if n is not None})
+        if not numbers:
+            return {}
+        chain = self._chain_key()
+        cached = self.cache.get_many([f"{chain}:{n}" for n in numbers])
+        headers = {
+            n: cached[f"{chain}:{n}"] for n in numbers if f"{chain}:{n}" in cached
+        }
+
+        missing = [n for n in numbers if n not in headers]
+        if not missing:
+            return headers
+        calls = [("eth_blockNumber", [])] + [
+            ("eth_getBlockByNumber", [hex(n), False]) for n in missing
+        ]
+        results = batch_request(self.web3, calls, batch_size=batch_size)
+        head = hex_to_int(results[0]) if results[0] is not None else None
+
+        immutable = {}
+        for n, block in zip(missing, results[1:], strict=True):
+            if not block:
+                continue
+            headers[n] = _header_from_rpc(block)
+            if head is not None and n <= head - self.confirmations:
+                immutable[f"{chain}:{n}"] = headers[n]
+        self.cache.set_many(immutable)
+        return headers
+
+    def get(self, block_number):
+        return self.prefetch([block_number]).get(block_number)
+
+    def timestamps(self, block_numbers):
+        """Block timestamps by number; blocks that could not be loaded are left out."""
+        return {
+            n: header["timestamp"] for n, header in self.prefetch(block_numbers).items()
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_block_cache(web3):
+    """Process-wide BlockHeaderCache for the node behind ``web3``."""
+    key = getattr(web3.provider, "endpoint_uri", None) or id(web3)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = BlockHeaderCache(web3)
+        return _caches[key]
@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+from django.core.cache import cache as shared_cache
+
+from app.api.smartcontract.indexer import index_ready, normalize_address
+from app.api.smartcontract.log_scanner import scan_logs
+from app.api.smartcontract.revocations import normalize_diploma_id
+from app.models import IndexedCertificate, IndexerCheckpoint
+
+logger = logging.getLogger(__name__)
+
+CERTIFICATE_BLOOM_FP_RATE = float(os.getenv("CERTIFICATE_BLOOM_FP_RATE", "0.001"))
+CERTIFICATE_BLOOM_CAPACITY = int(os.getenv("CERTIFICATE_BLOOM_CAPACITY", "100000"))
+CERTIFICATE_BLOOM_MAX_BYTES = int(
+    os.getenv("CERTIFICATE_BLOOM_MAX_BYTES", str(16 * 1024 * 1024))
+)
+CERTIFICATE_BLOOM_REFRESH_INTERVAL = float(
+    os.getenv("CERTIFICATE_BLOOM_REFRESH_INTERVAL", "2")
+)
+
+
+class BloomFilter:
+    """Plain Bloom filter over byte strings, stored in a bytearray."""
+
+    def __init__(self, num_bits, num_hashes, bits=None, count=0):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = (
+            bytearray(bits) if bits is not None else bytearray((num_bits + 7) // 8)
+        )
+        self.count = count
+
+    @classmethod
+    def for_capacity(
+        cls,
+        capacity,
+        fp_rate=CERTIFICATE_BLOOM_FP_RATE,
+        max_bytes=CERTIFICATE_BLOOM_MAX_BYTES,
+    ):
+        """Filter sized for ``capacity`` items at ``fp_rate``, but never larger than ``max_bytes``."""
+        capacity = max(1, capacity)
+        num_bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        if num_bits > max_bytes * 8:
+            logger.warning(
+                f"Bloom filter for {capacity} items at fp rate {fp_rate} needs {num_bits // 8} bytes; "
+                f"capped at {max_bytes}, so the false-positive rate will be higher"
+            )
+            num_bits = max_bytes * 8
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, item):
+        # Double hashing (Kirsch-Mitzenmacher) over one SHA-256 digest.
+        digest = hashlib.sha256(item).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def false_positive_rate(self):
+        """Expected false-positive rate at the current fill."""
+        return (
+            1 - math.exp(-self.num_hashes * self.count / self.num_bits)
+        ) ** self.num_hashes
+
+
+class CertificateBloom:
+    """Bloom filter of every diplomaId registered on one contract.
+
+    A miss means the hash was not registered as of ``synced_block``, so public
+    verification can answer without an eth_call. The filter is caught up at
+    most every CERTIFICATE_BLOOM_REFRESH_INTERVAL seconds, from
+    IndexedCertificate when the indexer covers the contract and from
+    CertificateRegistered logs above that, and shared with the other workers
+    through the Django cache. Misses never wait for a refresh: a hash the
+    indexer has stored above ``synced_block`` is still found, and one
+    registered above both is reported missing for at most the refresh
+    interval. It is rebuilt with twice the capacity when it fills up. Until it
+    has been built once, every hash is reported as possibly registered.
+    """
+
+    def __init__(
+        self,
+        contract,
+        capacity=CERTIFICATE_BLOOM_CAPACITY,
+        fp_rate=CERTIFICATE_BLOOM_FP_RATE,
+        max_bytes=CERTIFICATE_BLOOM_MAX_BYTES,
+        refresh_interval=CERTIFICATE_BLOOM_REFRESH_INTERVAL,
+    ):
+        self.contract = contract
+        self.contract_address = normalize_address(contract.address)
+        self.fp_rate = fp_rate
+        self.max_bytes = max_bytes
+        self.refresh_interval = refresh_interval
+        self.capacity = capacity
+        self.filter = BloomFilter.for_capacity(capacity, fp_rate, max_bytes)
+        self.synced_block = -1
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def cache_key(self):
+        return f"certificate_bloom:{self.contract_address}"
+
+    def _load_shared(self):
+        try:
+            state = shared_cache.get(self.cache_key)
+        except Exception as e:
+            logger.warning(f"Shared cache read failed for {self.cache_key}: {e}")
+            return
+        if (
+            state
+            and state["synced_block"] > self.synced_block
+            and state["fp_rate"] == self.fp_rate
+        ):
+            self.capacity = state["capacity"]
+            self.filter = BloomFilter(
+                state["num_bits"], state["num_hashes"], state["bits"], state["count"]
+            )
+            self.synced_block = state["synced_block"]
+
+    def _store_shared(self):
+        state = {
+            "synced_block": self.synced_block,
+            "capacity": self.capacity,
+            "fp_rate": self.fp_rate,
+            "num_bits": self.filter.num_bits,
+            "num_hashes": self.filter.num_hashes,
+            "count": self.filter.count,
+            "bits": bytes(self.filter.bits),
+        }
+        try:
+            shared_cache.set(self.cache_key, state, timeout=None)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {self.cache_key}: {e}")
+
+    def _registered_since(self, synced_block, head):
+        """diplomaIds registered in (synced_block, head]: indexed rows first, logs for the rest."""
+        scanned_to = synced_block
+        if index_ready(self.contract_address):
+            checkpoint = IndexerCheckpoint.objects.get(
+                contract_address=self.contract_address
+            )
+            if checkpoint.block_number > synced_block:
+                rows = IndexedCertificate.objects.filter(
+                    contract_address=self.contract_address,
+                    block_number__gt=synced_block,
+                    block_number__lte=checkpoint.block_number,
+                ).values_list("diploma_id", flat=True)
+                yield from (
+                    normalize_diploma_id(diploma_id) for diploma_id in rows.iterator()
+                )
+                scanned_to = checkpoint.block_number
+        if head > scanned_to:
+            event = self.contract.events.CertificateRegistered
+            for log in scan_logs(event, from_block=scanned_to + 1, to_block=head):
+                yield normalize_diploma_id(log.args.diplomaId)
+
+    def _catch_up(self):
+        head = self.contract.w3.eth.block_number
+        if head <= self.synced_block:
+            return False
+        bloom = self.filter
+        for diploma_id in self._registered_since(self.synced_block, head):
+            bloom.add(bytes.fromhex(diploma_id))
+        if bloom.count > self.capacity and self.filter.num_bits < self.max_bytes * 8:
+            # Over capacity the false-positive rate climbs quickly; start over twice as large.
+            self.capacity = max(self.capacity * 2, bloom.count * 2)
+            logger.info(
+                f"Rebuilding certificate Bloom filter for {self.contract_address} at capacity {self.capacity}"
+            )
+            self.filter = BloomFilter.for_capacity(
+                self.capacity, self.fp_rate, self.max_bytes
+            )
+            for diploma_id in self._registered_since(-1, head):
+                self.filter.add(bytes.fromhex(diploma_id))
+        self.synced_block = head
+        return True
+
+    def refresh(self):
+        """Catch up with the chain head if the last refresh is older than refresh_interval."""
+        with self._lock:
+            if time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return
+            try:
+                self._load_shared()
+                if self._catch_up():
+                    self._store_shared()
+            except Exception as e:
+                logger.warning(
+                    f"Certificate Bloom filter refresh failed for {self.contract_address}: {e}"
+                )
+            # A failed refresh is retried after the interval, not on every call.
+            self._refreshed_at = time.monotonic()
+
+    def _indexed_since_sync(self, value):
+        return IndexedCertificate.objects.filter(
+            contract_address=self.contract_address,
+            diploma_id=value,
+            block_number__gt=self.synced_block,
+        ).exists()
+
+    def might_contain(self, diploma_id):
+        """False only if ``diploma_id`` was not registered as of the last refresh or the index checkpoint."""
+        self.refresh()
+        value = normalize_diploma_id(diploma_id)
+        if self.synced_block < 0 or len(value) != 64:
+            # Short or odd-length input is padded by web3 before the call; leave those to the node.
+            return True
+        try:
+            item = bytes.fromhex(value)
+        except ValueError:
+            return True
+        return item in self.filter or self._indexed_since_sync(value)
+
+
+_blooms = {}
+_blooms_lock = threading.Lock()
+
+
+def get_certificate_bloom(contract):
+    """Process-wide CertificateBloom for ``contract``."""
+    address = normalize_address(contract.address)
+    with _blooms_lock:
+        bloom = _blooms.get(address)
+        if bloom is None:
+            bloom = _blooms[address] = CertificateBloom(contract)
+        return bloom
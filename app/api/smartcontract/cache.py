@@ -0,0 +1,94 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache as shared_cache
+
+logger = logging.getLogger(__name__)
+
+
+class TwoTierCache:
+    """In-process LRU in front of the Django cache (Redis in deployment).
+
+    Lookups hit the local LRU first and fall through to the shared cache, so
+    values written by one daphne worker are visible to the others. Failures of
+    the shared cache are logged and treated as misses.
+    """
+
+    def __init__(self, prefix, max_entries=10000, timeout=None):
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+    def _key(self, key):
+        return f"{self.prefix}:{key}"
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get_many(self, keys):
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                if key in self._local:
+                    self._local.move_to_end(key)
+                    found[key] = self._local[key]
+                else:
+                    missing.append(key)
+            self._stats["local_hits"] += len(found)
+
+        if missing:
+            try:
+                shared = shared_cache.get_many([self._key(key) for key in missing])
+            except Exception as e:
+                logger.warning(f"Shared cache read failed for {self.prefix}: {e}")
+                shared = {}
+            shared_hits = 0
+            for key in missing:
+                value = shared.get(self._key(key))
+                if value is not None:
+                    found[key] = value
+                    shared_hits += 1
+                    self._remember(key, value)
+            with self._lock:
+                self._stats["shared_hits"] += shared_hits
+                self._stats["misses"] += len(missing) - shared_hits
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, values):
+        for key, value in values.items():
+            self._remember(key, value)
+        if not values:
+            return
+        try:
+            shared_cache.set_many(
+                {self._key(key): value for key, value in values.items()},
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {self.prefix}: {e}")
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def delete(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+        try:
+            shared_cache.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed for {self.prefix}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, local_entries=len(self._local))
@@ -0,0 +1,151 @@
+import os
+import threading
+
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+
+from app.api.smartcontract.cache import TwoTierCache
+from app.api.smartcontract.contract_manager import ContractManager
+from app.api.smartcontract.revocations import get_revocation_index, normalize_diploma_id
+
+CERTIFICATE_CACHE_SIZE = int(os.getenv("CERTIFICATE_CACHE_SIZE", "10000"))
+CERTIFICATE_CACHE_TIMEOUT = int(os.getenv("CERTIFICATE_CACHE_TIMEOUT", "86400"))
+
+
+def _record(cert_data):
+    # verifyCertificate: (exists, issuer, student, issuedAt, metadata, storageMode, pdfOnChain, ipfsHash, isRevoked)
+    (
+        exists,
+        issuer,
+        student,
+        issued_at,
+        metadata,
+        storage_mode,
+        _pdf_on_chain,
+        ipfs_hash,
+        is_revoked,
+    ) = cert_data
+    # pdfOnChain is left out: it can be large and no lookup needs it.
+    return {
+        "exists": exists,
+        "issuer": issuer,
+        "student": student,
+        "issued_at": issued_at,
+        "metadata": metadata,
+        "storage_mode": storage_mode,
+        "ipfs_hash": ipfs_hash,
+        "is_revoked": is_revoked,
+    }
+
+
+def _record_from_get_certificate(cert_data):
+    # getCertificate: (issuer, student, timestamp, isRevoked)
+    issuer, student, issued_at, is_revoked = cert_data[:4]
+    return {
+        "exists": True,
+        "issuer": issuer,
+        "student": student,
+        "issued_at": issued_at,
+        "metadata": "",
+        "storage_mode": None,
+        "ipfs_hash": "",
+        "is_revoked": is_revoked,
+    }
+
+
+class CertificateCache:
+    """Read-through cache of ``verifyCertificate`` results (pdfOnChain excluded).
+
+    Contracts whose ABI has no verifyCertificate are answered with
+    getCertificate, without metadata or IPFS hash.
+    Certificates never change once registered except for being revoked, so
+    entries live in the in-process LRU and the shared cache until a
+    CertificateRevoked event for the hash is seen: the indexer deletes the
+    shared entry when it stores the revocation, and a hit on a not-revoked
+    entry is checked against the revocation index, which drops stale local
+    copies in every worker. Unknown hashes are not cached.
+    """
+
+    def __init__(self, manager, cache=None):
+        self.manager = manager
+        self.cache = cache or TwoTierCache(
+            "certificate",
+            max_entries=CERTIFICATE_CACHE_SIZE,
+            timeout=CERTIFICATE_CACHE_TIMEOUT,
+        )
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(contract_address, diploma_id):
+        return f"{Web3.to_checksum_address(contract_address)}:{normalize_diploma_id(diploma_id)}"
+
+    def _revoked_since_cached(self, contract, diploma_id):
+        current = self.manager.get_contract()
+        if current is None or current.address != contract.address:
+            return False
+        return get_revocation_index(self.manager).is_revoked(diploma_id)
+
+    def lookup(self, cert_hash, contract=None):
+        """The certificate stored under ``cert_hash``, or None if it was never registered.
+
+        Raises ValueError if ``cert_hash`` is not 32 bytes of hex.
+        """
+        contract = contract or self.manager.get_contract()
+        diploma_id = normalize_diploma_id(cert_hash)
+        try:
+            raw = bytes.fromhex(diploma_id)
+        except ValueError:
+            raw = b""
+        if len(raw) != 32:
+            raise ValueError(f"cert_hash must be 32 bytes of hex (got: {cert_hash})")
+        key = self.key(contract.address, diploma_id)
+        record = self.cache.get(key)
+        if (
+            record is not None
+            and not record["is_revoked"]
+            and self._revoked_since_cached(contract, diploma_id)
+        ):
+            self.invalidate(contract.address, [diploma_id])
+            record = None
+        if record is None:
+            record = self._fetch(contract, raw)
+            if record is None:
+                return None
+            self.cache.set(key, record)
+        return record
+
+    def _fetch(self, contract, diploma_id):
+        if hasattr(contract.functions, "verifyCertificate"):
+            record = _record(contract.functions.verifyCertificate(diploma_id).call())
+            return record if record["exists"] else None
+        try:
+            return _record_from_get_certificate(
+                contract.functions.getCertificate(diploma_id).call()
+            )
+        except ContractLogicError:
+            # getCertificate reverts with "Certificate does not exist"
+            return None
+
+    def invalidate(self, contract_address, diploma_ids):
+        for diploma_id in diploma_ids:
+            self.cache.delete(self.key(contract_address, diploma_id))
+            with self._lock:
+                self._invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.cache.stats(), invalidations=self._invalidations)
+
+
+_certificate_cache = None
+_certificate_cache_lock = threading.Lock()
+
+
+def get_certificate_cache():
+    """Process-wide CertificateCache backed by the shared ContractManager."""
+    global _certificate_cache
+    with _certificate_cache_lock:
+        if _certificate_cache is None:
+            _certificate_cache = CertificateCache(ContractManager())
+        return _certificate_cache
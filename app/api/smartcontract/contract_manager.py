@@ -1,19 +1,62 @@
+import ast
+import hashlib
 import os
 import json
+import threading
+import time
+from collections import namedtuple
+
 from web3 import Web3
 from app.api.smartcontract import SEEDWeb3
+from app.api.smartcontract.instrumentation import instrument_web3
+
+CONTRACT_RELOAD_CHECK_INTERVAL = float(os.getenv("CONTRACT_RELOAD_CHECK_INTERVAL", "1"))
+
+# Everything a request needs from the manager, replaced as a whole on reload so
+# readers never see an ABI from one deployment and an address from another.
+ContractSnapshot = namedtuple("ContractSnapshot", "abi address contract error stamp digest")
+
+EMPTY_SNAPSHOT = ContractSnapshot(None, None, None, None, None, None)
+
+
+def artifact_stamp(paths):
+    """(mtime, size) of each artifact file, or None if one of them is missing."""
+    try:
+        return tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths))
+    except OSError:
+        return None
+
+
+def read_contract_artifacts(abi_path, address_path):
+    """Parse the ABI and address files; returns (abi, address, digest of both contents)."""
+    with open(abi_path, 'r') as f:
+        abi_content = f.read()
+    with open(address_path, 'r') as f:
+        address = f.read().strip()
+    try:
+        abi = json.loads(abi_content)
+    except Exception:
+        abi = ast.literal_eval(abi_content)
+    digest = hashlib.sha256(f"{abi_content}\n{address}".encode()).hexdigest()
+    return abi, address, digest
 
 
 class ContractManager:
+    """Process-wide holder of the deployed CertificateRegistry contract.
+
+    refresh() only re-reads the artifacts when their mtime/size changed (checked
+    at most every CONTRACT_RELOAD_CHECK_INTERVAL seconds) or when forced after a
+    compile/deploy, and only rebuilds the contract when their content changed.
+    The result is published as one immutable ContractSnapshot.
+    """
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance.abi = None
-            cls._instance.address = None
-            cls._instance.contract = None
-            cls._instance.abi_load_error = None
+            cls._instance._snapshot = EMPTY_SNAPSHOT
+            cls._instance._checked_at = 0.0
+            cls._instance._lock = threading.Lock()
             cls._instance.web3 = None  # Do not connect on instantiation
             cls._instance.contracts_dir = os.path.abspath(
                 os.path.join(os.path.dirname(__file__), "../../../contracts")
@@ -21,67 +64,72 @@ class ContractManager:
             cls._instance.contract_name = "CertificateRegistry"
         return cls._instance
 
-    def connect_web3(self, url="http://ganache:8545"):
+    def connect_web3(self, url=None):
+        """Connect once; ``url=None`` uses the configured endpoints (WEB3_RPC_URLS / CONTRACT_RPC_URL)."""
         if self.web3 is None:
-            self.web3 = SEEDWeb3.connect_to_geth_poa(url)
+            self.web3 = instrument_web3(SEEDWeb3.connect_to_geth_poa(url))
         return self.web3
 
-    def load_abi(self, abi_path=None):
-        if abi_path is None:
-            abi_path = os.path.join(self.contracts_dir, f"{self.contract_name}.abi")
+    def artifact_paths(self):
+        base = os.path.join(self.contracts_dir, self.contract_name)
+        return f"{base}.abi", f"{base}.txt"
+
+    def _load(self, stamp):
+        snapshot = self._snapshot
         try:
-            with open(abi_path, 'r') as f:
-                abi_content = f.read()
-                try:
-                    self.abi = json.loads(abi_content)
-                except Exception:
-                    import ast
-                    self.abi = ast.literal_eval(abi_content)
+            abi, address, digest = read_contract_artifacts(*self.artifact_paths())
         except Exception as e:
-            self.abi = None
-            self.abi_load_error = str(e)
-
-    def load_address(self, address_path=None):
-        if address_path is None:
-            address_path = os.path.join(self.contracts_dir, f"{self.contract_name}.txt")
+            return ContractSnapshot(None, None, None, str(e), stamp, None)
+        if digest == snapshot.digest and snapshot.contract is not None:
+            # Touched but not changed: keep the contract object.
+            return snapshot._replace(stamp=stamp)
         try:
-            with open(address_path, 'r') as f:
-                self.address = f.read().strip()
+            contract = self.web3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+            return ContractSnapshot(abi, address, contract, None, stamp, digest)
         except Exception as e:
-            self.address = None
-            self.abi_load_error = str(e)
-
-    def update_contract(self):
-        if self.abi and self.address and self.web3:
-            try:
-                self.contract = self.web3.eth.contract(address=Web3.to_checksum_address(self.address), abi=self.abi)
-            except Exception as e:
-                self.contract = None
-                self.abi_load_error = str(e)
-        else:
-            self.contract = None
-
-    def refresh(self):
-        self.connect_web3()
-        self.load_abi()
-        self.load_address()
-        self.update_contract()
+            return ContractSnapshot(abi, address, None, str(e), stamp, digest)
+
+    def refresh(self, force=False):
+        """Reload the contract if its artifacts changed; ``force=True`` after compiling or deploying."""
+        try:
+            self.connect_web3()
+        except ConnectionError as e:
+            # Keep serving the last contract (if any); the connection is retried on the next call.
+            self._snapshot = self._snapshot._replace(error=str(e))
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < CONTRACT_RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            stamp = artifact_stamp(self.artifact_paths())
+            if force or stamp is None or stamp != self._snapshot.stamp:
+                self._snapshot = self._load(stamp)
+            self._checked_at = now
 
     def set_contract_name(self, name):
         self.contract_name = name
-        self.refresh()
+        self.refresh(force=True)
+
+    def get_snapshot(self):
+        return self._snapshot
 
     def get_contract(self):
-        return self.contract
+        return self._snapshot.contract
 
     def get_abi(self):
-        return self.abi
+        return self._snapshot.abi
 
     def get_address(self):
-        return self.address
+        return self._snapshot.address
 
     def get_error(self):
-        return self.abi_load_error
+        return self._snapshot.error
+
+    # Read-only views kept for callers that use the attributes directly.
+    contract = property(get_contract)
+    abi = property(get_abi)
+    address = property(get_address)
+    abi_load_error = property(get_error)
 
 # Usage example:
 # manager = ContractManager()
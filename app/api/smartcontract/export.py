@@ -0,0 +1,76 @@
+import csv
+import json
+import os
+
+from app.api.smartcontract.queries import list_certificate_page
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+
+EXPORT_FIELDS = (
+    "cert_hash",
+    "issuer",
+    "recipient",
+    "ipfs_hash",
+    "issued_at",
+    "block_number",
+    "transaction_hash",
+    "log_index",
+    "gas_used",
+    "is_revoked",
+)
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def iter_certificate_items(manager, from_block=None, page_size=EXPORT_PAGE_SIZE):
+    """Every certificate from ``from_block`` on, oldest first, read one keyset page at a time.
+
+    The upper bound is pinned to the head at the start so the export is a
+    consistent snapshot; at most one page is held in memory.
+    """
+    to_block = manager.web3.eth.block_number
+    cursor = None
+    while True:
+        items, cursor = list_certificate_page(
+            manager,
+            from_block=from_block,
+            to_block=to_block,
+            cursor=cursor,
+            limit=page_size,
+        )
+        for item in items:
+            yield {field: item.get(field) for field in EXPORT_FIELDS}
+        if not cursor:
+            return
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_ndjson(items):
+    for item in items:
+        yield json.dumps(item) + "\n"
+
+
+def iter_csv(items):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for item in items:
+        yield writer.writerow([item[field] for field in EXPORT_FIELDS])
+
+
+def export_lines(
+    manager, export_format="ndjson", from_block=None, page_size=EXPORT_PAGE_SIZE
+):
+    """Lines of an NDJSON or CSV registry export, produced lazily."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    items = iter_certificate_items(manager, from_block=from_block, page_size=page_size)
+    return iter_csv(items) if export_format == "csv" else iter_ndjson(items)
@@ -0,0 +1,187 @@
+import logging
+import os
+import statistics
+import threading
+import time
+import weakref
+
+from django.core.cache import cache as shared_cache
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+GAS_ESTIMATE_MARGIN = float(os.getenv("GAS_ESTIMATE_MARGIN", "1.2"))
+GAS_ESTIMATE_CACHE_TIMEOUT = int(os.getenv("GAS_ESTIMATE_CACHE_TIMEOUT", "300"))
+FEE_HISTORY_BLOCKS = int(os.getenv("FEE_HISTORY_BLOCKS", "10"))
+FEE_PRIORITY_PERCENTILE = float(os.getenv("FEE_PRIORITY_PERCENTILE", "50"))
+FEE_BASE_FEE_MULTIPLIER = float(os.getenv("FEE_BASE_FEE_MULTIPLIER", "2"))
+FEE_MIN_PRIORITY_FEE_WEI = int(os.getenv("FEE_MIN_PRIORITY_FEE_WEI", "1000000000"))
+FEE_BLOCK_POLL_INTERVAL = float(os.getenv("FEE_BLOCK_POLL_INTERVAL", "1"))
+
+TRANSFER_GAS = 21000
+CALLDATA_GAS_PER_BYTE = 16
+FEE_FIELDS = ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas")
+
+
+def _size_bucket(size):
+    """Calldata length rounded up to a power of two, the bucket's upper bound (0 for no calldata)."""
+    return 1 << (size - 1).bit_length() if size else 0
+
+
+class FeeOracle:
+    """Gas limits and fees for the transactions one node is sent.
+
+    Gas estimates are cached in the shared cache per contract, function
+    selector and calldata size bucket, scaled up to the bucket's largest
+    calldata; GAS_ESTIMATE_MARGIN is added on top. A cached limit is checked
+    with a single eth_call at that limit (one execution instead of the
+    search eth_estimateGas runs), and only when that call reverts or fails
+    is the transaction estimated again.
+    Fees are computed once per block: EIP-1559 ``maxFeePerGas`` /
+    ``maxPriorityFeePerGas`` from ``eth_feeHistory`` (median tip of the last
+    FEE_HISTORY_BLOCKS blocks, next base fee times FEE_BASE_FEE_MULTIPLIER),
+    or ``gasPrice`` on nodes without EIP-1559 support.
+    """
+
+    def __init__(self, web3, cache=shared_cache):
+        self.web3 = web3
+        self.cache = cache
+        self._chain_id = None
+        self._supports_1559 = None
+        self._fees = None
+        self._block = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def chain_id(self):
+        if self._chain_id is None:
+            self._chain_id = self.web3.eth.chain_id
+        return self._chain_id
+
+    def estimate_gas(self, tx):
+        """Gas limit for ``tx`` (estimate plus margin); a ``gas`` already in ``tx`` is ignored."""
+        data = tx.get("data") or ""
+        if not data and tx.get("to"):
+            return TRANSFER_GAS
+        size = len(Web3.to_bytes(hexstr=data)) if data else 0
+        bucket = _size_bucket(size)
+        key = f"gas:{self.chain_id}:{tx.get('to') or 'create'}:{data[:10]}:{bucket}"
+        call = {k: v for k, v in tx.items() if k not in ("gas", "nonce")}
+        cached = self.cache.get(key)
+        if cached is not None:
+            limit = int(cached * GAS_ESTIMATE_MARGIN)
+            # The arguments and the contract state also move the cost: make sure this call fits.
+            try:
+                self.web3.eth.call(dict(call, gas=limit))
+                return limit
+            except Exception as e:
+                logger.info(f"Cached gas limit {limit} is not enough for {key} ({e})")
+        estimate = self.web3.eth.estimate_gas(call)
+        # Calldata of up to the bucket's upper bound costs at most this much more.
+        estimate += CALLDATA_GAS_PER_BYTE * (bucket - size)
+        self.cache.set(
+            key, max(estimate, cached or 0), timeout=GAS_ESTIMATE_CACHE_TIMEOUT
+        )
+        return int(estimate * GAS_ESTIMATE_MARGIN)
+
+    def _eip1559_fees(self, block):
+        history = self.web3.eth.fee_history(
+            FEE_HISTORY_BLOCKS, block, [FEE_PRIORITY_PERCENTILE]
+        )
+        # The last base fee is the one of the next block.
+        next_base_fee = history["baseFeePerGas"][-1]
+        if not next_base_fee:
+            raise ValueError("node reports no base fee")
+        tips = [reward[0] for reward in history.get("reward") or [] if reward]
+        tip = max(int(statistics.median(tips)) if tips else 0, FEE_MIN_PRIORITY_FEE_WEI)
+        return {
+            "maxFeePerGas": int(next_base_fee * FEE_BASE_FEE_MULTIPLIER) + tip,
+            "maxPriorityFeePerGas": tip,
+        }
+
+    def _compute(self, block):
+        if self._supports_1559 is not False:
+            try:
+                fees = self._eip1559_fees(block)
+                self._supports_1559 = True
+                return fees
+            except Exception as e:
+                if self._supports_1559:
+                    logger.warning(
+                        f"eth_feeHistory failed ({e}); using gasPrice for block {block}"
+                    )
+                else:
+                    logger.info(
+                        f"eth_feeHistory unavailable ({e}); using legacy gasPrice"
+                    )
+                    self._supports_1559 = False
+        return {"gasPrice": self.web3.eth.gas_price}
+
+    def fees(self):
+        """Fee fields for a transaction sent now, recomputed when a new block is seen."""
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._fees is not None
+                and now - self._checked_at < FEE_BLOCK_POLL_INTERVAL
+            ):
+                return dict(self._fees)
+            block = self.web3.eth.block_number
+            self._checked_at = now
+            if self._fees is None or block != self._block:
+                key = f"fees:{self.chain_id}:{block}"
+                fees = self.cache.get(key)
+                if fees is None:
+                    fees = self._compute(block)
+                    self.cache.set(key, fees, timeout=GAS_ESTIMATE_CACHE_TIMEOUT)
+                self._fees, self._block = fees, block
+            return dict(self._fees)
+
+    def with_fees(self, params):
+        """``params`` plus fee fields, unless it already sets a fee."""
+        if any(field in params for field in FEE_FIELDS):
+            return dict(params)
+        return dict(params, **self.fees())
+
+    def build_transaction(self, function, params):
+        """``function.build_transaction`` with the oracle's fees and gas limit (unless given in ``params``)."""
+        params = self.with_fees(params)
+        if "gas" in params:
+            return function.build_transaction(params)
+        # A placeholder gas keeps web3 from estimating; the real limit is set below.
+        tx = function.build_transaction(dict(params, gas=TRANSFER_GAS))
+        tx["gas"] = self.estimate_gas(tx)
+        return tx
+
+    def transact(self, function, params):
+        """``function.transact(params)`` for node-managed accounts, with the oracle's gas and fees.
+
+        The nonce comes from the shared NonceManager, which also signs for the
+        same addresses locally.
+        """
+        from app.api.smartcontract.nonces import get_nonce_manager
+
+        return get_nonce_manager(self.web3).send_transaction(
+            self.build_transaction(function, params)
+        )
+
+    def prepare(self, tx):
+        """Fill in fees and gas of a plain transaction dict (e.g. an ETH transfer)."""
+        tx = self.with_fees(tx)
+        if "gas" not in tx:
+            tx["gas"] = self.estimate_gas(tx)
+        return tx
+
+
+_fee_oracles = weakref.WeakKeyDictionary()
+_fee_oracles_lock = threading.Lock()
+
+
+def get_fee_oracle(web3):
+    """FeeOracle for ``web3``; estimates and fees are shared between processes through the cache."""
+    with _fee_oracles_lock:
+        oracle = _fee_oracles.get(web3)
+        if oracle is None:
+            oracle = _fee_oracles[web3] = FeeOracle(web3)
+        return oracle
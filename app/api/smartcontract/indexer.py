@@ -0,0 +1,281 @@
+import logging
+import os
+import time
+
+from django.db import transaction as db_transaction
+from django.db.models import F
+from web3 import Web3
+
+from app.api.smartcontract.block_cache import get_block_cache
+from app.api.smartcontract.contract_manager import ContractManager
+from app.api.smartcontract.log_scanner import scan_logs
+from app.api.smartcontract.rollup import apply_rows, rebuild_rollup
+from app.api.smartcontract.rpc_batch import gas_used_by_tx
+from app.models import (
+    DashboardRollup,
+    IndexedCertificate,
+    IndexedRevocation,
+    IndexerCheckpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEXER_START_BLOCK = int(os.getenv("INDEXER_START_BLOCK", "0"))
+INDEXER_BATCH_SIZE = int(os.getenv("INDEXER_BATCH_SIZE", "2000"))
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", "6"))
+INDEXER_MAX_REORG_DEPTH = int(os.getenv("INDEXER_MAX_REORG_DEPTH", "64"))
+INDEXER_POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", "2"))
+
+
+def normalize_address(address):
+    return Web3.to_checksum_address(address) if address else None
+
+
+def index_checkpoint(contract_address):
+    """Last block the index holds for this contract, or None if it was never indexed.
+
+    Blocks above it (the confirmation depth, or an indexer that lags) are only
+    on the chain.
+    """
+    if not contract_address:
+        return None
+    return (
+        IndexerCheckpoint.objects.filter(
+            contract_address=normalize_address(contract_address)
+        )
+        .values_list("block_number", flat=True)
+        .first()
+    )
+
+
+def index_ready(contract_address):
+    """True once the indexer has a checkpoint for this contract, so reads can skip the chain."""
+    return index_checkpoint(contract_address) is not None
+
+
+def _invalidate_cached_certificates(contract_address, diploma_ids):
+    # Imported here: the certificate cache depends on the revocation index, which imports this module.
+    from app.api.smartcontract.certificate_cache import get_certificate_cache
+
+    if diploma_ids:
+        get_certificate_cache().invalidate(contract_address, diploma_ids)
+
+
+class CertificateIndexer:
+    """Tails CertificateRegistered / CertificateRevoked logs into the database.
+
+    Progress is stored per contract address in IndexerCheckpoint together with the
+    hash of the checkpoint block. When that hash no longer matches the node, the
+    indexer walks back through the block hashes stored on indexed rows until it
+    finds a block that is still canonical and re-indexes from there. Only blocks
+    ``confirmations`` deep are indexed, and a range is only stored if the chain
+    did not change while its logs were being read.
+    """
+
+    def __init__(
+        self,
+        manager=None,
+        batch_size=INDEXER_BATCH_SIZE,
+        confirmations=INDEXER_CONFIRMATIONS,
+        start_block=INDEXER_START_BLOCK,
+        max_reorg_depth=INDEXER_MAX_REORG_DEPTH,
+    ):
+        self.manager = manager or ContractManager()
+        self.batch_size = max(1, batch_size)
+        self.confirmations = max(0, confirmations)
+        self.start_block = max(0, start_block)
+        self.max_reorg_depth = max_reorg_depth
+
+    @property
+    def web3(self):
+        return self.manager.web3
+
+    def _contract(self):
+        self.manager.refresh()
+        contract = self.manager.get_contract()
+        if contract is None:
+            raise RuntimeError(f"Contract not loaded: {self.manager.get_error()}")
+        return contract
+
+    def _canonical_hash(self, block_number):
+        try:
+            block = self.web3.eth.get_block(block_number)
+        except Exception:
+            return None
+        return block.hash.hex() if block is not None else None
+
+    def sync_once(self):
+        """Index every new confirmed block once. Returns the number of rows written."""
+        contract = self._contract()
+        address = normalize_address(contract.address)
+        checkpoint, _ = IndexerCheckpoint.objects.get_or_create(
+            contract_address=address,
+            defaults={"block_number": self.start_block - 1},
+        )
+        self._rewind_if_reorged(checkpoint)
+        rollup = DashboardRollup.objects.filter(contract_address=address).first()
+        if rollup is None or rollup.block_number != checkpoint.block_number:
+            # First run after an upgrade, or a rollup left behind by an interrupted rewind.
+            rollup = rebuild_rollup(address, checkpoint.block_number)
+
+        target = self.web3.eth.block_number - self.confirmations
+        written = 0
+        start = checkpoint.block_number + 1
+        while start <= target:
+            end = min(start + self.batch_size - 1, target)
+            rows = self._index_range(contract, checkpoint, rollup, start, end)
+            if rows is None:
+                # The chain moved under the scan; the next sync rewinds or retries the range.
+                break
+            written += rows
+            start = end + 1
+        return written
+
+    def run_forever(self, poll_interval=INDEXER_POLL_INTERVAL):
+        while True:
+            try:
+                written = self.sync_once()
+                if written:
+                    logger.info(f"Certificate indexer wrote {written} rows")
+            except Exception as e:
+                logger.error(f"Certificate indexer iteration failed: {e}")
+            time.sleep(poll_interval)
+
+    def _chain_unchanged(self, checkpoint, end, end_hash):
+        """True if ``end`` still has ``end_hash`` and the checkpoint block is still canonical."""
+        if self._canonical_hash(end) != end_hash:
+            return False
+        return (
+            checkpoint.block_number < 0
+            or not checkpoint.block_hash
+            or self._canonical_hash(checkpoint.block_number) == checkpoint.block_hash
+        )
+
+    def _index_range(self, contract, checkpoint, rollup, start, end):
+        """Index blocks ``start``..``end``; rows written, or None if the chain changed meanwhile.
+
+        The hash of ``end`` is read before the logs and checked again after
+        them, so a reorg during the scan cannot store a new-chain checkpoint
+        next to old-chain rows.
+        """
+        address = checkpoint.contract_address
+        end_hash = self._canonical_hash(end)
+        if end_hash is None:
+            raise RuntimeError(f"Could not load block {end}")
+        registered = list(scan_logs(contract.events.CertificateRegistered, start, end))
+        revoked = list(scan_logs(contract.events.CertificateRevoked, start, end))
+
+        gas_by_tx = gas_used_by_tx(
+            self.web3, [event.transactionHash.hex() for event in registered + revoked]
+        )
+        timestamps = get_block_cache(self.web3).timestamps(
+            event.blockNumber for event in revoked
+        )
+        if any(event.blockNumber not in timestamps for event in revoked):
+            raise RuntimeError(
+                f"Could not load block timestamps for revocations in blocks {start}-{end}"
+            )
+
+        certificates = [
+            IndexedCertificate(
+                contract_address=address,
+                diploma_id=event.args.diplomaId.hex(),
+                issuer=event.args.issuer,
+                student=event.args.student,
+                issued_at=event.args.issuedAt,
+                metadata=event.args.metadata or "",
+                storage_mode=event.args.storageMode,
+                ipfs_hash=event.args.ipfsHash or "",
+                block_number=event.blockNumber,
+                block_hash=event.blockHash.hex(),
+                transaction_hash=event.transactionHash.hex(),
+                log_index=event.logIndex,
+                gas_used=gas_by_tx.get(event.transactionHash.hex()),
+            )
+            for event in registered
+        ]
+        revocations = [
+            IndexedRevocation(
+                contract_address=address,
+                diploma_id=event.args.certHash.hex(),
+                block_number=event.blockNumber,
+                block_hash=event.blockHash.hex(),
+                block_timestamp=timestamps.get(event.blockNumber),
+                transaction_hash=event.transactionHash.hex(),
+                log_index=event.logIndex,
+                gas_used=gas_by_tx.get(event.transactionHash.hex()),
+            )
+            for event in revoked
+        ]
+        if not self._chain_unchanged(checkpoint, end, end_hash):
+            logger.warning(
+                f"Chain changed while indexing blocks {start}-{end} of {address}; not storing them"
+            )
+            return None
+
+        with db_transaction.atomic():
+            IndexedCertificate.objects.bulk_create(certificates, ignore_conflicts=True)
+            IndexedRevocation.objects.bulk_create(revocations, ignore_conflicts=True)
+            checkpoint.block_number = end
+            checkpoint.block_hash = end_hash
+            checkpoint.save(update_fields=["block_number", "block_hash", "updated_at"])
+            apply_rows(rollup, certificates, revocations, end)
+        _invalidate_cached_certificates(
+            address, [row.diploma_id for row in revocations]
+        )
+        return len(certificates) + len(revocations)
+
+    def _rewind_if_reorged(self, checkpoint):
+        if checkpoint.block_number < 0 or not checkpoint.block_hash:
+            return
+        if self._canonical_hash(checkpoint.block_number) == checkpoint.block_hash:
+            return
+
+        address = checkpoint.contract_address
+        lowest = checkpoint.block_number - self.max_reorg_depth
+        stored = {}
+        for model in (IndexedCertificate, IndexedRevocation):
+            rows = (
+                model.objects.filter(
+                    contract_address=address,
+                    block_number__lt=checkpoint.block_number,
+                    block_number__gte=lowest,
+                )
+                .values_list("block_number", "block_hash")
+                .distinct()
+            )
+            stored.update(dict(rows))
+
+        safe_block, safe_hash = self.start_block - 1, ""
+        for block_number in sorted(stored, reverse=True):
+            if self._canonical_hash(block_number) == stored[block_number]:
+                safe_block, safe_hash = block_number, stored[block_number]
+                break
+
+        logger.warning(
+            f"Reorg detected for {address} at block {checkpoint.block_number}; rewinding to block {safe_block}"
+        )
+        # Certificates registered or revoked in the dropped blocks may read differently now.
+        rewound_ids = set()
+        for model in (IndexedCertificate, IndexedRevocation):
+            rewound_ids.update(
+                model.objects.filter(
+                    contract_address=address, block_number__gt=safe_block
+                ).values_list("diploma_id", flat=True)
+            )
+        with db_transaction.atomic():
+            IndexedCertificate.objects.filter(
+                contract_address=address, block_number__gt=safe_block
+            ).delete()
+            IndexedRevocation.objects.filter(
+                contract_address=address, block_number__gt=safe_block
+            ).delete()
+            checkpoint.block_number = safe_block
+            checkpoint.block_hash = safe_hash
+            checkpoint.rewinds = F("rewinds") + 1
+            checkpoint.save(
+                update_fields=["block_number", "block_hash", "rewinds", "updated_at"]
+            )
+            checkpoint.refresh_from_db(fields=["rewinds"])
+            rebuild_rollup(address, safe_block)
+        _invalidate_cached_certificates(address, sorted(rewound_ids))
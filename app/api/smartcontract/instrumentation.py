@@ -0,0 +1,246 @@
+import contextvars
+import logging
+import os
+import time
+from urllib.parse import urlsplit
+
+from app.metrics import SIZE_BUCKETS, registry
+from app.middleware import get_current_route, get_current_trace_id
+
+logger = logging.getLogger(__name__)
+
+RPC_SLOW_CALL_SECONDS = float(os.getenv("RPC_SLOW_CALL_SECONDS", "1"))
+
+RPC_METRICS_MIDDLEWARE = "rpc_metrics"
+
+# Calls are labelled with the route (URL pattern) of the API request that made
+# them, or "none" outside a request (Celery tasks, management commands). The
+# trace id is logged with every call instead of being used as a label, so the
+# series stay bounded by routes x endpoints x methods. Endpoints are labelled by
+# host only, and nodes the application is not configured with share one label
+# (see providers.endpoint_metrics_label), so clients cannot add series and URLs
+# with credentials in them are never published.
+rpc_duration = registry.histogram(
+    "web3_rpc_request_duration_seconds",
+    "JSON-RPC call latency as seen by the application.",
+    ("route", "endpoint", "method"),
+)
+rpc_requests = registry.counter(
+    "web3_rpc_requests_total",
+    "JSON-RPC calls by outcome (ok, error, exception).",
+    ("route", "endpoint", "method", "status"),
+)
+rpc_http_duration = registry.histogram(
+    "web3_rpc_http_duration_seconds",
+    "HTTP round trip to one RPC endpoint (single call or batch).",
+    ("endpoint", "kind"),
+)
+rpc_request_bytes = registry.histogram(
+    "web3_rpc_request_bytes",
+    "Size of JSON-RPC request bodies.",
+    ("endpoint", "kind"),
+    buckets=SIZE_BUCKETS,
+)
+rpc_response_bytes = registry.histogram(
+    "web3_rpc_response_bytes",
+    "Size of JSON-RPC response bodies.",
+    ("endpoint", "kind"),
+    buckets=SIZE_BUCKETS,
+)
+rpc_batched_calls = registry.counter(
+    "web3_rpc_batched_calls_total",
+    "Calls sent inside JSON-RPC batches (see rpc_batch).",
+    ("endpoint", "method"),
+)
+ipfs_duration = registry.histogram(
+    "ipfs_request_duration_seconds", "IPFS HTTP client call latency.", ("operation",)
+)
+ipfs_requests = registry.counter(
+    "ipfs_requests_total",
+    "IPFS HTTP client calls by outcome (ok, exception).",
+    ("operation", "status"),
+)
+ipfs_bytes = registry.histogram(
+    "ipfs_transferred_bytes",
+    "Bytes uploaded to or downloaded from IPFS.",
+    ("operation", "direction"),
+    buckets=SIZE_BUCKETS,
+)
+
+
+OTHER_ENDPOINT = "other"
+NO_ROUTE = "none"
+
+
+def in_current_context(fn):
+    """``fn`` wrapped to run in a copy of the caller's context, for executor threads.
+
+    Without it, calls made on pool threads would have no route or trace id.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time; each call gets its own copy.
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+def redact_endpoint(uri):
+    """host[:port] of an RPC URL, without scheme, credentials, path or query."""
+    parts = urlsplit(str(uri))
+    host = parts.hostname or OTHER_ENDPOINT
+    return f"{host}:{parts.port}" if parts.port else host
+
+
+def endpoint_label(provider):
+    """Metrics label of ``provider``: the ``metrics_label`` it was given, or "other"."""
+    label = getattr(provider, "metrics_label", None)
+    if label:
+        return label
+    return (
+        OTHER_ENDPOINT
+        if getattr(provider, "endpoint_uri", None)
+        else type(provider).__name__
+    )
+
+
+def _observe_rpc(endpoint, method, status, seconds):
+    route = get_current_route() or NO_ROUTE
+    rpc_duration.observe(seconds, route=route, endpoint=endpoint, method=method)
+    rpc_requests.inc(route=route, endpoint=endpoint, method=method, status=status)
+    trace_id = get_current_trace_id()
+    if seconds >= RPC_SLOW_CALL_SECONDS:
+        logger.warning(
+            f"Slow JSON-RPC {method} on {endpoint} for {route}: {seconds:.3f}s ({status}) trace_id={trace_id}"
+        )
+    else:
+        logger.debug(
+            f"JSON-RPC {method} on {endpoint} for {route}: {seconds:.3f}s ({status}) trace_id={trace_id}"
+        )
+
+
+def rpc_metrics_middleware(make_request, w3):
+    """Web3 middleware recording the latency and outcome of every JSON-RPC call."""
+    endpoint = endpoint_label(w3.provider)
+
+    def middleware(method, params):
+        started = time.perf_counter()
+        status = "exception"
+        try:
+            response = make_request(method, params)
+            status = "error" if "error" in response else "ok"
+            return response
+        finally:
+            _observe_rpc(endpoint, method, status, time.perf_counter() - started)
+
+    return middleware
+
+
+async def async_rpc_metrics_middleware(make_request, w3):
+    """AsyncWeb3 counterpart of rpc_metrics_middleware."""
+    endpoint = endpoint_label(w3.provider)
+
+    async def middleware(method, params):
+        started = time.perf_counter()
+        status = "exception"
+        try:
+            response = await make_request(method, params)
+            status = "error" if "error" in response else "ok"
+            return response
+        finally:
+            _observe_rpc(endpoint, method, status, time.perf_counter() - started)
+
+    return middleware
+
+
+def instrument_web3(web3):
+    """Add the metrics middleware (outermost) to ``web3`` unless it is already there."""
+    if RPC_METRICS_MIDDLEWARE not in web3.middleware_onion:
+        is_async = getattr(web3.provider, "is_async", False)
+        web3.middleware_onion.add(
+            async_rpc_metrics_middleware if is_async else rpc_metrics_middleware,
+            RPC_METRICS_MIDDLEWARE,
+        )
+    return web3
+
+
+def observe_http_round_trip(endpoint, kind, request_body, response_body, seconds):
+    """Called by PooledHTTPProvider for every POST; ``kind`` is "single" or "batch"."""
+    rpc_http_duration.observe(seconds, endpoint=endpoint, kind=kind)
+    rpc_request_bytes.observe(len(request_body), endpoint=endpoint, kind=kind)
+    if response_body is not None:
+        rpc_response_bytes.observe(len(response_body), endpoint=endpoint, kind=kind)
+
+
+def count_batched_calls(provider, calls):
+    endpoint = endpoint_label(provider)
+    for method, _params in calls:
+        rpc_batched_calls.inc(endpoint=endpoint, method=method)
+
+
+def _payload_size(value):
+    return len(value) if isinstance(value, (bytes, bytearray, str)) else None
+
+
+class InstrumentedIPFSClient:
+    """Proxy around an ipfshttpclient client that times each top-level call.
+
+    Works as a context manager like the wrapped client. Bytes passed in
+    (``add_bytes``) and returned (``cat``) are recorded as transfer sizes.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                _observe_ipfs(name, "exception", time.perf_counter() - started)
+                raise
+            _observe_ipfs(name, "ok", time.perf_counter() - started)
+            if name.startswith("add"):
+                sent = _payload_size(args[0]) if args else None
+                if sent is not None:
+                    ipfs_bytes.observe(sent, operation=name, direction="upload")
+            elif _payload_size(result) is not None:
+                ipfs_bytes.observe(len(result), operation=name, direction="download")
+            return result
+
+        return call
+
+    def __enter__(self):
+        self._client.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._client.__exit__(*exc_info)
+
+
+def _observe_ipfs(operation, status, seconds):
+    ipfs_duration.observe(seconds, operation=operation)
+    ipfs_requests.inc(operation=operation, status=status)
+    logger.debug(
+        f"IPFS {operation}: {seconds:.3f}s ({status}) trace_id={get_current_trace_id()}"
+    )
+
+
+def ipfs_connect(url):
+    """``ipfshttpclient.connect(url)`` with every call recorded in the IPFS metrics."""
+    import ipfshttpclient
+
+    started = time.perf_counter()
+    status = "exception"
+    try:
+        client = ipfshttpclient.connect(url)
+        status = "ok"
+    finally:
+        _observe_ipfs("connect", status, time.perf_counter() - started)
+    return InstrumentedIPFSClient(client)
@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api.smartcontract.instrumentation import in_current_context
+
+logger = logging.getLogger(__name__)
+
+LOG_SCAN_CHUNK_SIZE = int(os.getenv("LOG_SCAN_CHUNK_SIZE", "5000"))
+LOG_SCAN_MAX_CHUNK_SIZE = int(os.getenv("LOG_SCAN_MAX_CHUNK_SIZE", "100000"))
+LOG_SCAN_WORKERS = int(os.getenv("LOG_SCAN_WORKERS", "4"))
+
+# Error fragments used by geth, erigon, besu and hosted providers when a
+# range or its result set is over their limit.
+RANGE_TOO_LARGE_MARKERS = (
+    "query returned more than",
+    "block range",
+    "range too large",
+    "range is too large",
+    "too many blocks",
+    "response size",
+    "limit exceeded",
+    "exceeds the limit",
+    "query timeout",
+)
+
+
+def is_range_too_large(error):
+    message = str(error).lower()
+    return any(marker in message for marker in RANGE_TOO_LARGE_MARKERS)
+
+
+class _AdaptiveChunkSize:
+    """Chunk size shared by the workers of one scan."""
+
+    def __init__(self, initial, maximum):
+        self.maximum = max(1, maximum)
+        self.value = max(1, min(initial, self.maximum))
+        self._lock = threading.Lock()
+
+    def shrink(self, size):
+        with self._lock:
+            self.value = max(1, min(self.value, size))
+
+    def grow(self, fetched_size):
+        with self._lock:
+            if fetched_size >= self.value:
+                self.value = min(self.maximum, self.value * 2)
+
+
+def _fetch_range(event, start, end, argument_filters, chunk_size):
+    try:
+        logs = event.get_logs(
+            argument_filters=argument_filters, fromBlock=start, toBlock=end
+        )
+    except Exception as e:
+        if start == end or not is_range_too_large(e):
+            raise
+        middle = (start + end) // 2
+        chunk_size.shrink(middle - start + 1)
+        logger.info(f"Log range {start}-{end} rejected as too large, splitting: {e}")
+        return _fetch_range(
+            event, start, middle, argument_filters, chunk_size
+        ) + _fetch_range(event, middle + 1, end, argument_filters, chunk_size)
+    chunk_size.grow(end - start + 1)
+    return list(logs)
+
+
+def scan_logs(
+    event,
+    from_block=0,
+    to_block=None,
+    argument_filters=None,
+    chunk_size=LOG_SCAN_CHUNK_SIZE,
+    max_workers=LOG_SCAN_WORKERS,
+    reverse=False,
+):
+    """Yield decoded logs of ``event`` between two blocks, oldest first (newest first with ``reverse``).
+
+    ``event`` is a contract event such as ``contract.events.CertificateRegistered``.
+    The range is split into chunks fetched over a bounded thread pool; a chunk
+    the node rejects as too large is halved until it fits, and the chunk size
+    grows back after successful fetches. ``to_block`` defaults to the current head.
+    """
+    if to_block is None:
+        to_block = event.w3.eth.block_number
+    if from_block > to_block:
+        return
+
+    size = _AdaptiveChunkSize(chunk_size, LOG_SCAN_MAX_CHUNK_SIZE)
+    workers = max(1, max_workers)
+    low, high = from_block, to_block
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while low <= high or pending:
+            while low <= high and len(pending) < workers:
+                if reverse:
+                    start, end = max(low, high - size.value + 1), high
+                    high = start - 1
+                else:
+                    start, end = low, min(low + size.value - 1, high)
+                    low = end + 1
+                pending.append(
+                    executor.submit(
+                        in_current_context(_fetch_range),
+                        event,
+                        start,
+                        end,
+                        argument_filters,
+                        size,
+                    )
+                )
+            logs = pending.popleft().result()
+            yield from (reversed(logs) if reverse else logs)
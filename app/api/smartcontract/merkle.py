@@ -0,0 +1,62 @@
+from web3 import Web3
+
+
+def _bytes32(value):
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return Web3.to_bytes(hexstr=value)
+
+
+def leaf_hash(diploma_id, student):
+    """keccak256(abi.encodePacked(diplomaId, student)), the leaf the contract checks."""
+    return Web3.keccak(
+        _bytes32(diploma_id) + Web3.to_bytes(hexstr=Web3.to_checksum_address(student))
+    )
+
+
+def hash_pair(a, b):
+    # OpenZeppelin's Hashes.commutativeKeccak256: the smaller hash goes first.
+    return Web3.keccak(a + b if a < b else b + a)
+
+
+class MerkleTree:
+    """Merkle tree over 32-byte leaves, compatible with OpenZeppelin's MerkleProof.
+
+    Pairs are hashed sorted, so a proof is just the list of sibling hashes. A
+    node without a sibling is carried up to the next level unchanged.
+    """
+
+    def __init__(self, leaves):
+        if not leaves:
+            raise ValueError("A Merkle tree needs at least one leaf")
+        self.levels = [[bytes(leaf) for leaf in leaves]]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            self.levels.append(
+                [
+                    hash_pair(level[i], level[i + 1])
+                    if i + 1 < len(level)
+                    else level[i]
+                    for i in range(0, len(level), 2)
+                ]
+            )
+
+    @property
+    def root(self):
+        return self.levels[-1][0]
+
+    def proof(self, index):
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling])
+            index //= 2
+        return proof
+
+
+def verify_proof(leaf, proof, root):
+    computed = _bytes32(leaf)
+    for sibling in proof:
+        computed = hash_pair(computed, _bytes32(sibling))
+    return computed == _bytes32(root)
@@ -0,0 +1,308 @@
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache as shared_cache
+from web3 import Web3
+
+from app.api.smartcontract.fees import FEE_FIELDS, TRANSFER_GAS
+
+logger = logging.getLogger(__name__)
+
+NONCE_CACHE_TIMEOUT = int(os.getenv("NONCE_CACHE_TIMEOUT", "3600"))
+NONCE_LOCK_TIMEOUT = float(os.getenv("NONCE_LOCK_TIMEOUT", "10"))
+NONCE_RESYNC_INTERVAL = float(os.getenv("NONCE_RESYNC_INTERVAL", "30"))
+
+# Node error messages meaning the nonce we used no longer matches the chain.
+NONCE_ERRORS = (
+    "nonce too low",
+    "nonce too high",
+    "replacement transaction underpriced",
+    "invalid nonce",
+    "invalid transaction nonce",
+)
+# The node already has this exact transaction: it was broadcast, e.g. by an earlier attempt.
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction", "already imported")
+# Ganache: "Invalid transaction nonce: Expected 25, but got 26".
+_EXPECTED_NONCE = re.compile(r"expected (\d+),? but got (\d+)")
+
+
+# Called with (address, nonce, tx_hash) right before a transaction is
+# broadcast; tx_hash is None when the node signs it. See recording_broadcasts.
+_broadcast_recorder = ContextVar("broadcast_recorder", default=None)
+
+
+@contextmanager
+def recording_broadcasts(record):
+    """Call ``record(address, nonce, tx_hash)`` before each send in this block (gap fillers excluded).
+
+    Lets a caller persist what it is about to broadcast, so that a crash
+    between the broadcast and storing its result can be reconciled later.
+    """
+    token = _broadcast_recorder.set(record)
+    try:
+        yield
+    finally:
+        _broadcast_recorder.reset(token)
+
+
+def _record_broadcast(address, nonce, tx_hash=None):
+    record = _broadcast_recorder.get()
+    if record is not None:
+        record(address, nonce, tx_hash)
+
+
+def is_nonce_error(error):
+    message = str(error).lower()
+    return any(text in message for text in NONCE_ERRORS)
+
+
+def is_nonce_too_high(error):
+    """True if the node rejected a nonce ahead of its pending count (a gap below it)."""
+    message = str(error).lower()
+    if "too high" in message:
+        return True
+    match = _EXPECTED_NONCE.search(message)
+    return match is not None and int(match.group(2)) > int(match.group(1))
+
+
+def is_already_known(error):
+    message = str(error).lower()
+    return any(text in message for text in ALREADY_KNOWN_ERRORS)
+
+
+class NonceManager:
+    """Allocates consecutive nonces per sender address without asking the node each time.
+
+    The last nonce handed out for an address lives in the shared cache and is
+    taken with an atomic increment, so concurrent requests (and workers) get
+    distinct nonces and can broadcast without waiting for receipts. The
+    counter is (re)initialized from the pending transaction count under a
+    cache lock. Every transaction from an address must take its nonce here,
+    whether it is signed locally (send) or by the node (send_transaction).
+    The counter only ever moves up, since nonces other workers have allocated
+    but not broadcast yet must not be handed out again. It is moved up to the
+    node's pending count when sending fails with "nonce too low", and at most
+    every NONCE_RESYNC_INTERVAL seconds when someone else sent from the
+    address. A nonce that was allocated and never broadcast leaves a gap that
+    blocks every later transaction: a pending count stuck below the counter
+    for a whole interval, or a "nonce too high" error, has the gap filled with
+    a 0-value self-transfer (see fill_gaps) before the next send.
+    """
+
+    def __init__(self, web3, cache=shared_cache, resync_interval=NONCE_RESYNC_INTERVAL):
+        self.web3 = web3
+        self.cache = cache
+        self.resync_interval = resync_interval
+        self._chain_id = None
+        self._checked_at = {}
+        self._suspected_gaps = set()
+
+    @property
+    def chain_id(self):
+        if self._chain_id is None:
+            self._chain_id = self.web3.eth.chain_id
+        return self._chain_id
+
+    def key(self, address):
+        return f"nonce:{self.chain_id}:{Web3.to_checksum_address(address)}"
+
+    @contextmanager
+    def _locked(self, address):
+        lock_key = f"{self.key(address)}:lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + NONCE_LOCK_TIMEOUT
+        while not self.cache.add(lock_key, token, timeout=NONCE_LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for the nonce lock of {address}")
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+    def _pending_count(self, address):
+        return self.web3.eth.get_transaction_count(
+            Web3.to_checksum_address(address), "pending"
+        )
+
+    def allocate(self, address):
+        """Next nonce for ``address``; every call returns a different one."""
+        return self.allocate_many(address, 1)[0]
+
+    def allocate_many(self, address, count):
+        """``count`` consecutive nonces for ``address``, reserved with a single increment."""
+        key = self.key(address)
+        self._maybe_resync(address)
+        try:
+            last = self.cache.incr(key, count)
+        except ValueError:
+            # No counter yet (first use, or expired): start from the node's pending count.
+            with self._locked(address):
+                if self.cache.get(key) is None:
+                    self.cache.set(
+                        key,
+                        self._pending_count(address) - 1,
+                        timeout=NONCE_CACHE_TIMEOUT,
+                    )
+                    self._checked_at[key] = (time.monotonic(), None)
+                last = self.cache.incr(key, count)
+        return list(range(last - count + 1, last + 1))
+
+    def resync(self, address):
+        """Move the counter up to the node's pending count, if it is behind it; never down."""
+        key = self.key(address)
+        with self._locked(address):
+            pending = self._pending_count(address)
+            last = self.cache.get(key)
+            if last is None or last < pending - 1:
+                self.cache.set(key, pending - 1, timeout=NONCE_CACHE_TIMEOUT)
+        self._checked_at[key] = (time.monotonic(), None)
+        logger.info(f"Resynced nonce of {address} with the node")
+
+    def _maybe_resync(self, address):
+        key = self.key(address)
+        checked_at, seen_pending = self._checked_at.get(key, (0.0, None))
+        if time.monotonic() - checked_at < self.resync_interval:
+            return
+        last = self.cache.get(key)
+        if last is None:
+            return
+        pending = self._pending_count(address)
+        self._checked_at[key] = (time.monotonic(), pending)
+        if pending > last + 1:
+            logger.warning(
+                f"Nonce of {address} is behind the node ({last + 1} < {pending}); resyncing"
+            )
+            self.resync(address)
+        elif pending < last + 1 and pending == seen_pending:
+            logger.warning(
+                f"Nonce gap for {address}: node stuck at {pending}, next local nonce {last + 1}; "
+                f"filling it at the next send"
+            )
+            self._suspected_gaps.add(key)
+
+    def take_suspected_gap(self, address):
+        """True (once) if the periodic check saw the node stuck below the counter for ``address``."""
+        key = self.key(address)
+        if key in self._suspected_gaps:
+            self._suspected_gaps.discard(key)
+            return True
+        return False
+
+    def fill_gaps(self, address, below, send_filler):
+        """Fill the nonces the node is missing below ``below``, lowest first; returns how many were sent.
+
+        ``send_filler(nonce)`` sends a 0-value self-transfer at ``nonce``. Only
+        the node's pending count is ever filled, a nonce it has no transaction
+        for, so nothing already in its pool is replaced. A worker that was
+        about to broadcast at a filled nonce gets "nonce too low" and sends
+        again at a fresh one.
+        """
+        filled, last_filled = 0, None
+        while True:
+            pending = self._pending_count(address)
+            if pending >= below or pending == last_filled:
+                # No gap left, or the last filler did not get in (the send reported why).
+                return filled
+            try:
+                send_filler(pending)
+            except Exception as e:
+                # Too low: another sender has just used it, which closes the gap as well.
+                if not is_nonce_error(e):
+                    raise
+            logger.warning(f"Filled the nonce gap of {address} at {pending}")
+            filled, last_filled = filled + 1, pending
+
+    @staticmethod
+    def filler(address, tx, nonce):
+        """0-value self-transfer at ``nonce``, with the fees and chain id of ``tx``."""
+        filler = {k: v for k, v in tx.items() if k in FEE_FIELDS or k == "chainId"}
+        return dict(filler, to=address, value=0, gas=TRANSFER_GAS, nonce=nonce)
+
+    def _submit(self, address, tx, submit):
+        def send_filler(nonce):
+            filler = dict(self.filler(address, tx, nonce), **{"from": address})
+            return submit(filler, record=False)
+
+        if "nonce" not in tx:
+            tx = dict(tx, nonce=self.allocate(address))
+        if self.take_suspected_gap(address):
+            self.fill_gaps(address, tx["nonce"], send_filler)
+        for attempt in (1, 2):
+            try:
+                return submit(tx)
+            except Exception as e:
+                # Other errors leave the counter alone: resetting it would hand out
+                # nonces other workers already hold. A nonce allocated here and
+                # never broadcast is closed by the periodic gap check.
+                if not is_nonce_error(e) or attempt == 2:
+                    raise
+                if is_nonce_too_high(e):
+                    # A nonce below ours was never broadcast: fill it and send again at the same nonce.
+                    if not self.fill_gaps(address, tx["nonce"], send_filler):
+                        raise
+                else:
+                    # Too low: someone else used it, move up and send at a fresh nonce.
+                    self.resync(address)
+                    tx = dict(tx, nonce=self.allocate(address))
+                logger.warning(f"Nonce of {address} rejected ({e}); retrying")
+
+    def send(self, account, tx):
+        """Sign ``tx`` with ``account`` (a local account) and broadcast it.
+
+        ``tx`` keeps its nonce if it has one (allocate it before
+        build_transaction, which would otherwise ask the node); otherwise the
+        next one is allocated. On "nonce too low" the counter is resynced and
+        the transaction is signed and sent once more at a fresh nonce; on
+        "nonce too high" the gap below it is filled and it is sent again at
+        the same nonce. A node that already has the transaction counts as sent.
+        """
+
+        def submit(tx, record=True):
+            signed = account.sign_transaction(tx)
+            if record:
+                _record_broadcast(account.address, tx["nonce"], signed.hash)
+            try:
+                return self.web3.eth.send_raw_transaction(signed.raw_transaction)
+            except Exception as e:
+                if not is_already_known(e):
+                    raise
+                return signed.hash
+
+        return self._submit(account.address, tx, submit)
+
+    def send_transaction(self, tx):
+        """eth_sendTransaction from a node-managed account at a nonce from this counter.
+
+        Left to itself the node would pick the nonce and collide with the ones
+        allocated here for the same address (e.g. the funder, which is also
+        ``accounts[0]``). Nonce errors are handled like in send().
+        """
+
+        def submit(tx, record=True):
+            if record:
+                _record_broadcast(tx["from"], tx["nonce"])
+            return self.web3.eth.send_transaction(tx)
+
+        return self._submit(tx["from"], tx, submit)
+
+
+_nonce_managers = weakref.WeakKeyDictionary()
+_nonce_managers_lock = threading.Lock()
+
+
+def get_nonce_manager(web3):
+    """NonceManager for ``web3``; the counters themselves are shared through the cache."""
+    with _nonce_managers_lock:
+        manager = _nonce_managers.get(web3)
+        if manager is None:
+            manager = _nonce_managers[web3] = NonceManager(web3)
+        return manager
@@ -0,0 +1,523 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from aiohttp import ClientTimeout
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from web3 import AsyncHTTPProvider, AsyncWeb3, HTTPProvider, Web3
+from web3._utils.request import get_default_http_endpoint
+from web3.middleware import async_geth_poa_middleware, geth_poa_middleware
+from web3.providers import JSONBaseProvider
+
+from app.api.smartcontract.instrumentation import (
+    OTHER_ENDPOINT,
+    endpoint_label,
+    in_current_context,
+    instrument_web3,
+    observe_http_round_trip,
+    redact_endpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+WEB3_HTTP_TIMEOUT = float(os.getenv("WEB3_HTTP_TIMEOUT", "30"))
+WEB3_HTTP_POOL_CONNECTIONS = int(os.getenv("WEB3_HTTP_POOL_CONNECTIONS", "10"))
+WEB3_HTTP_POOL_MAXSIZE = int(os.getenv("WEB3_HTTP_POOL_MAXSIZE", "50"))
+WEB3_HTTP_RETRIES = int(os.getenv("WEB3_HTTP_RETRIES", "3"))
+WEB3_HTTP_BACKOFF = float(os.getenv("WEB3_HTTP_BACKOFF", "0.2"))
+WEB3_PROVIDER_REGISTRY_SIZE = int(os.getenv("WEB3_PROVIDER_REGISTRY_SIZE", "32"))
+WEB3_CLIENT_REGISTRY_SIZE = int(os.getenv("WEB3_CLIENT_REGISTRY_SIZE", "8"))
+
+CONTRACT_RPC_URL = os.getenv("CONTRACT_RPC_URL", "http://ganache:8545")
+WEB3_RPC_URLS = [
+    url.strip() for url in os.getenv("WEB3_RPC_URLS", "").split(",") if url.strip()
+]
+WEB3_RPC_PRIMARY = os.getenv("WEB3_RPC_PRIMARY", "")
+WEB3_HEDGE_DELAY = os.getenv(
+    "WEB3_HEDGE_DELAY", ""
+)  # seconds; empty = p95 latency of the endpoint
+WEB3_HEDGE_MIN_DELAY = float(os.getenv("WEB3_HEDGE_MIN_DELAY", "0.05"))
+WEB3_HEDGE_WORKERS = int(os.getenv("WEB3_HEDGE_WORKERS", "16"))
+WEB3_HEALTH_WINDOW = int(os.getenv("WEB3_HEALTH_WINDOW", "100"))
+WEB3_FAILURE_THRESHOLD = int(os.getenv("WEB3_FAILURE_THRESHOLD", "3"))
+WEB3_ENDPOINT_COOLDOWN = float(os.getenv("WEB3_ENDPOINT_COOLDOWN", "10"))
+WEB3_SHARED_RPC_URLS = [
+    url.strip()
+    for url in os.getenv("WEB3_SHARED_RPC_URLS", "").split(",")
+    if url.strip()
+]
+
+# Nodes the application is configured with; only these get a shared, registered Web3 instance.
+SHARED_RPC_URLS = frozenset(
+    url
+    for url in (
+        CONTRACT_RPC_URL,
+        os.getenv("WEB3_RPC"),
+        WEB3_RPC_PRIMARY,
+        *WEB3_RPC_URLS,
+        *WEB3_SHARED_RPC_URLS,
+    )
+    if url
+)
+
+# Calls that change state, depend on node-local state (unlocked accounts,
+# filters, pending nonces) or must not be duplicated; these go to the primary only.
+PRIMARY_METHODS = frozenset(
+    {
+        "eth_sendTransaction",
+        "eth_sendRawTransaction",
+        "eth_sign",
+        "eth_signTransaction",
+        "eth_signTypedData",
+        "eth_accounts",
+        "eth_getTransactionCount",
+        "eth_newFilter",
+        "eth_newBlockFilter",
+        "eth_newPendingTransactionFilter",
+        "eth_getFilterChanges",
+        "eth_getFilterLogs",
+        "eth_uninstallFilter",
+        "eth_subscribe",
+        "eth_unsubscribe",
+        "personal_sign",
+        "personal_unlockAccount",
+        "personal_sendTransaction",
+    }
+)
+
+
+def is_shared_rpc_url(rpc_url):
+    """Whether ``rpc_url`` is a node the application is configured with (or web3's default one)."""
+    return (
+        str(rpc_url) in SHARED_RPC_URLS or str(rpc_url) == get_default_http_endpoint()
+    )
+
+
+def endpoint_metrics_label(rpc_url):
+    """Host of a configured node, OTHER_ENDPOINT for any other URL; keeps metric labels bounded and secret-free."""
+    return redact_endpoint(rpc_url) if is_shared_rpc_url(rpc_url) else OTHER_ENDPOINT
+
+
+def build_session(
+    pool_connections=WEB3_HTTP_POOL_CONNECTIONS,
+    pool_maxsize=WEB3_HTTP_POOL_MAXSIZE,
+    retries=WEB3_HTTP_RETRIES,
+    backoff=WEB3_HTTP_BACKOFF,
+):
+    """requests session with a keep-alive pool and a retry policy suited to JSON-RPC.
+
+    Only failures where the node cannot have processed the call are retried
+    (connection errors and 429/502/503/504); read timeouts are not, so a slow
+    eth_sendRawTransaction is never submitted twice by the transport.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """HTTPProvider that sends every request through one shared, pooled session.
+
+    The stock provider keeps a session per thread; this one is shared by all
+    threads so the keep-alive pool and retry policy apply process-wide.
+    """
+
+    def __init__(self, endpoint_uri=None, request_kwargs=None, session=None):
+        super().__init__(
+            endpoint_uri,
+            request_kwargs={"timeout": WEB3_HTTP_TIMEOUT, **(request_kwargs or {})},
+        )
+        self.session = session or build_session()
+        self.metrics_label = endpoint_metrics_label(self.endpoint_uri)
+
+    def _post(self, data, kind):
+        started = time.perf_counter()
+        content = None
+        try:
+            response = self.session.post(
+                self.endpoint_uri, data=data, **self.get_request_kwargs()
+            )
+            response.raise_for_status()
+            content = response.content
+            return content
+        finally:
+            observe_http_round_trip(
+                endpoint_label(self), kind, data, content, time.perf_counter() - started
+            )
+
+    def post(self, data):
+        """Raw POST of an encoded JSON-RPC batch (see rpc_batch)."""
+        return self._post(data, "batch")
+
+    def make_request(self, method, params):
+        self.logger.debug(
+            f"Making request HTTP. URI: {self.endpoint_uri}, Method: {method}"
+        )
+        return self.decode_rpc_response(
+            self._post(self.encode_rpc_request(method, params), "single")
+        )
+
+
+class EndpointHealth:
+    """Recent latencies and failures of one RPC endpoint."""
+
+    def __init__(self, provider, window=WEB3_HEALTH_WINDOW):
+        self.provider = provider
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.failures_in_row = 0
+        self.down_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(seconds)
+                self.failures_in_row = 0
+            else:
+                self.failures_in_row += 1
+                if self.failures_in_row >= WEB3_FAILURE_THRESHOLD:
+                    self.down_until = time.monotonic() + WEB3_ENDPOINT_COOLDOWN
+
+    def is_down(self):
+        return time.monotonic() < self.down_until
+
+    def error_rate(self):
+        with self._lock:
+            return (
+                self.outcomes.count(False) / len(self.outcomes)
+                if self.outcomes
+                else 0.0
+            )
+
+    def p95(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        return latencies[int(len(latencies) * 0.95)] if latencies else None
+
+    def score(self):
+        """Lower is better: mean latency weighted by the recent error rate. Unused endpoints come first."""
+        with self._lock:
+            if self.latencies:
+                mean = sum(self.latencies) / len(self.latencies)
+            else:
+                # Never answered: as bad as a timeout if it has failed, untried otherwise.
+                mean = WEB3_HTTP_TIMEOUT if self.outcomes else 0.0
+        return mean * (1 + 10 * self.error_rate())
+
+    def snapshot(self):
+        return {
+            "endpoint": self.provider.endpoint_uri,
+            "p95": self.p95(),
+            "error_rate": self.error_rate(),
+            "down": self.is_down(),
+        }
+
+
+class HedgeTimer:
+    """One daemon thread that hands delayed calls to an executor when they are due.
+
+    Waiting for a hedge delay does not hold an executor thread, so the pool
+    only runs hedges that actually fire. Calls run in the context they were
+    scheduled from, so their metrics keep the request's route and trace id.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, delay, fn, *args):
+        """Future of ``fn(*args)``, run on the executor after ``delay`` seconds unless it is cancelled first."""
+        future = Future()
+        with self._condition:
+            heapq.heappush(
+                self._queue,
+                (
+                    time.monotonic() + delay,
+                    next(self._sequence),
+                    future,
+                    in_current_context(fn),
+                    args,
+                ),
+            )
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="rpc-hedge-timer", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    self._condition.wait(
+                        self._queue[0][0] - time.monotonic() if self._queue else None
+                    )
+                _, _, future, fn, args = heapq.heappop(self._queue)
+            if future.set_running_or_notify_cancel():
+                self.executor.submit(self._complete, future, fn, args)
+
+    @staticmethod
+    def _complete(future, fn, args):
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+
+class FailoverHTTPProvider(JSONBaseProvider):
+    """Provider over several RPC endpoints of the same chain.
+
+    Reads go to the healthiest endpoint (lowest error-weighted latency, skipping
+    endpoints that failed WEB3_FAILURE_THRESHOLD times in a row for
+    WEB3_ENDPOINT_COOLDOWN seconds), on the calling thread. If it has not
+    answered within the hedge delay (WEB3_HEDGE_DELAY, or that endpoint's p95
+    latency) the same read is sent to the next endpoint from a shared pool, so
+    that a failing or timed-out first attempt falls back to an answer already
+    in flight; the remaining endpoints are then tried in turn. PRIMARY_METHODS
+    (writes, nonces, filters), and batches containing any of them, are only
+    sent to the primary and never duplicated.
+    """
+
+    _executor = ThreadPoolExecutor(
+        max_workers=WEB3_HEDGE_WORKERS, thread_name_prefix="rpc-hedge"
+    )
+    _hedges = HedgeTimer(_executor)
+
+    def __init__(self, endpoint_uris, primary_uri=None, hedge_delay=WEB3_HEDGE_DELAY):
+        super().__init__()
+        endpoint_uris = list(dict.fromkeys(endpoint_uris))
+        if not endpoint_uris:
+            raise ValueError("FailoverHTTPProvider needs at least one endpoint")
+        primary_uri = primary_uri or endpoint_uris[0]
+        if primary_uri not in endpoint_uris:
+            endpoint_uris.insert(0, primary_uri)
+        # Failover replaces transport retries, so each endpoint gets a session without them.
+        self.endpoints = [
+            EndpointHealth(PooledHTTPProvider(uri, session=build_session(retries=0)))
+            for uri in endpoint_uris
+        ]
+        self.primary = self.endpoints[endpoint_uris.index(primary_uri)]
+        self.endpoint_uri = primary_uri
+        self.metrics_label = "failover"
+        self.hedge_delay = float(hedge_delay) if hedge_delay not in (None, "") else None
+
+    def __str__(self):
+        return f"RPC failover {[endpoint.provider.endpoint_uri for endpoint in self.endpoints]}"
+
+    def _ranked(self):
+        healthy = [endpoint for endpoint in self.endpoints if not endpoint.is_down()]
+        return sorted(healthy or self.endpoints, key=lambda endpoint: endpoint.score())
+
+    def _delay(self, endpoint):
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        p95 = endpoint.p95()
+        return max(WEB3_HEDGE_MIN_DELAY, p95) if p95 is not None else None
+
+    @staticmethod
+    def _timed(endpoint, call):
+        started = time.perf_counter()
+        try:
+            result = call(endpoint.provider)
+        except Exception:
+            endpoint.record(time.perf_counter() - started, ok=False)
+            raise
+        endpoint.record(time.perf_counter() - started, ok=True)
+        return result
+
+    def _read(self, call):
+        ranked = self._ranked()
+        first, rest = ranked[0], iter(ranked[1:])
+        hedge = None
+        delay = self._delay(first)
+        if len(ranked) > 1 and delay is not None:
+            hedge = self._hedges.schedule(delay, self._timed, ranked[1], call)
+        try:
+            result = self._timed(first, call)
+        except Exception as e:
+            logger.warning(f"RPC endpoint {first.provider.endpoint_uri} failed: {e}")
+            error = e
+        else:
+            if hedge is not None:
+                hedge.cancel()
+            return result
+        if hedge is not None and not hedge.cancel():
+            # The hedge was already sent to the next endpoint: wait for it rather than sending again.
+            endpoint = next(rest)
+            try:
+                return hedge.result()
+            except Exception as e:
+                logger.warning(
+                    f"RPC endpoint {endpoint.provider.endpoint_uri} failed: {e}"
+                )
+                error = e
+        for endpoint in rest:
+            try:
+                return self._timed(endpoint, call)
+            except Exception as e:
+                logger.warning(
+                    f"RPC endpoint {endpoint.provider.endpoint_uri} failed: {e}"
+                )
+                error = e
+        raise error
+
+    def make_request(self, method, params):
+        if method in PRIMARY_METHODS:
+            return self._timed(
+                self.primary, lambda provider: provider.make_request(method, params)
+            )
+        return self._read(lambda provider: provider.make_request(method, params))
+
+    def post(self, data):
+        """Raw JSON-RPC batch (see rpc_batch): to the primary if it has any PRIMARY_METHODS call, else like a read."""
+        calls = json.loads(data)
+        if any(
+            call.get("method") in PRIMARY_METHODS
+            for call in (calls if isinstance(calls, list) else [calls])
+        ):
+            return self._timed(self.primary, lambda provider: provider.post(data))
+        return self._read(lambda provider: provider.post(data))
+
+    def health(self):
+        return [endpoint.snapshot() for endpoint in self.endpoints]
+
+
+_registry = OrderedDict()
+_client_registry = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def _new_web3(rpc_url, poa):
+    web3 = instrument_web3(Web3(PooledHTTPProvider(rpc_url)))
+    if poa:
+        web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    return web3
+
+
+def _close_web3(web3):
+    try:
+        web3.provider.session.close()
+    except Exception as e:
+        logger.warning(f"Could not close the session of an evicted Web3 instance: {e}")
+
+
+def get_web3(rpc_url=None, poa=False):
+    """Process-wide Web3 instance for ``rpc_url`` (web3's default endpoint if None), created on first use.
+
+    ``poa=True`` returns a separate instance with geth_poa_middleware injected.
+    Configured nodes (SHARED_RPC_URLS) are kept in a registry of at most
+    WEB3_PROVIDER_REGISTRY_SIZE instances; a dropped one is not closed, since
+    other threads may still be using it. Any other URL, such as one sent by a
+    client, goes to a separate registry of WEB3_CLIENT_REGISTRY_SIZE
+    instances, so it can neither grow nor evict the first one, and the
+    session of an instance dropped from it is closed (a request still in
+    flight on it completes, its connection is just not kept alive).
+    """
+    rpc_url = str(rpc_url) if rpc_url is not None else get_default_http_endpoint()
+    shared = is_shared_rpc_url(rpc_url)
+    registry = _registry if shared else _client_registry
+    size = WEB3_PROVIDER_REGISTRY_SIZE if shared else WEB3_CLIENT_REGISTRY_SIZE
+    key = (rpc_url, bool(poa))
+    with _registry_lock:
+        web3 = registry.get(key)
+        if web3 is not None:
+            registry.move_to_end(key)
+            return web3
+        web3 = registry[key] = _new_web3(rpc_url, poa)
+        evicted = []
+        while len(registry) > max(1, size):
+            evicted.append(registry.popitem(last=False)[1])
+    if not shared:
+        for dropped in evicted:
+            _close_web3(dropped)
+    return web3
+
+
+_default_web3 = {}
+
+
+def get_default_web3(poa=False):
+    """Web3 for the node(s) the application is configured to use.
+
+    With several WEB3_RPC_URLS this is a FailoverHTTPProvider over all of them
+    (writes to WEB3_RPC_PRIMARY, or the first URL); otherwise the pooled
+    provider of the single URL (CONTRACT_RPC_URL by default).
+    """
+    if len(WEB3_RPC_URLS) < 2:
+        return get_web3(
+            WEB3_RPC_URLS[0] if WEB3_RPC_URLS else CONTRACT_RPC_URL, poa=poa
+        )
+    with _registry_lock:
+        web3 = _default_web3.get(bool(poa))
+        if web3 is None:
+            web3 = instrument_web3(
+                Web3(
+                    FailoverHTTPProvider(
+                        WEB3_RPC_URLS, primary_uri=WEB3_RPC_PRIMARY or None
+                    )
+                )
+            )
+            if poa:
+                web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+            _default_web3[bool(poa)] = web3
+        return web3
+
+
+_async_registry = OrderedDict()
+
+
+def get_async_web3(rpc_url, poa=False):
+    """Process-wide AsyncWeb3 instance for ``rpc_url``, the async counterpart of get_web3.
+
+    web3 keeps one aiohttp session per event loop and URL for these providers,
+    so concurrent coroutines share its connection pool. As in get_web3, only
+    SHARED_RPC_URLS are registered.
+    """
+    key = (str(rpc_url), bool(poa))
+    with _registry_lock:
+        web3 = _async_registry.get(key)
+        if web3 is not None:
+            _async_registry.move_to_end(key)
+            return web3
+        provider = AsyncHTTPProvider(
+            rpc_url, request_kwargs={"timeout": ClientTimeout(total=WEB3_HTTP_TIMEOUT)}
+        )
+        provider.metrics_label = endpoint_metrics_label(rpc_url)
+        web3 = instrument_web3(AsyncWeb3(provider))
+        if poa:
+            web3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+        if not is_shared_rpc_url(rpc_url):
+            return web3
+        _async_registry[key] = web3
+        while len(_async_registry) > WEB3_PROVIDER_REGISTRY_SIZE:
+            _async_registry.popitem(last=False)
+        return web3
@@ -0,0 +1,380 @@
+import base64
+import datetime
+import os
+
+from django.db.models import Q
+
+from app.api.smartcontract.block_cache import get_block_cache
+from app.api.smartcontract.indexer import (
+    index_checkpoint,
+    index_ready,
+    normalize_address,
+)
+from app.api.smartcontract.log_scanner import scan_logs
+from app.api.smartcontract.revocations import get_revocation_index, normalize_diploma_id
+from app.api.smartcontract.rollup import latest_operations
+from app.api.smartcontract.rpc_batch import gas_used_by_tx
+from app.models import IndexedCertificate
+
+CERTIFICATE_PAGE_MAX_LIMIT = int(os.getenv("CERTIFICATE_PAGE_MAX_LIMIT", "1000"))
+
+
+def _checksum_or_none(address):
+    try:
+        return normalize_address(address)
+    except ValueError:
+        return None
+
+
+def _format_timestamp(timestamp):
+    return (
+        datetime.datetime.fromtimestamp(timestamp).isoformat()
+        if timestamp is not None
+        else None
+    )
+
+
+def _item_from_row(row):
+    return {
+        "cert_hash": row.diploma_id,
+        "issuer": row.issuer,
+        "recipient": row.student,
+        "recipient_address": row.student,
+        "metadata": row.ipfs_hash,  # For compatibility with frontend/table
+        "content": None,
+        "ipfs_hash": row.ipfs_hash,
+        "issued_at": row.issued_at,
+        "block_number": row.block_number,
+        "transaction_hash": row.transaction_hash,
+        "log_index": row.log_index,
+        "gas_used": row.gas_used,
+    }
+
+
+def _item_from_event(event, gas_used):
+    ipfs_hash = getattr(event.args, "ipfsHash", None)
+    recipient = getattr(event.args, "student", None)
+    return {
+        "cert_hash": event.args.diplomaId.hex(),
+        "issuer": getattr(event.args, "issuer", None),
+        "recipient": recipient,
+        "recipient_address": recipient,
+        "metadata": ipfs_hash,  # For compatibility with frontend/table
+        "content": None,
+        "ipfs_hash": ipfs_hash,
+        "issued_at": getattr(event.args, "issuedAt", None),
+        "block_number": getattr(event, "blockNumber", None),
+        "transaction_hash": _tx_hash(event),
+        "log_index": getattr(event, "logIndex", None),
+        "gas_used": gas_used,
+    }
+
+
+def _tx_hash(event):
+    return event.transactionHash.hex() if hasattr(event, "transactionHash") else None
+
+
+def _argument_filters(issuer=None, student=None, diploma_id=None):
+    """Topic filters for CertificateRegistered; None when an address cannot match anything."""
+    filters = {}
+    for name, address in (("issuer", issuer), ("student", student)):
+        if address is None:
+            continue
+        checksummed = _checksum_or_none(address)
+        if checksummed is None:
+            return None
+        filters[name] = checksummed
+    if diploma_id is not None:
+        try:
+            filters["diplomaId"] = bytes.fromhex(normalize_diploma_id(diploma_id))
+        except ValueError:
+            return None
+    return filters
+
+
+def encode_cursor(block_number, log_index):
+    """Opaque keyset cursor for the position (block_number, log_index)."""
+    return (
+        base64.urlsafe_b64encode(f"{block_number}:{log_index}".encode())
+        .decode()
+        .rstrip("=")
+    )
+
+
+def decode_cursor(cursor):
+    """(block_number, log_index) from a cursor; ValueError when it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        block_number, log_index = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        )
+        return int(block_number), int(log_index)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def check_page_args(cursor=None, limit=None, direction="asc"):
+    """Validate paging arguments; returns (position, limit) or raises ValueError."""
+    if direction not in ("asc", "desc"):
+        raise ValueError(f"Invalid direction: {direction}")
+    if limit is not None:
+        if limit < 1:
+            raise ValueError(f"Invalid limit: {limit}")
+        limit = min(limit, CERTIFICATE_PAGE_MAX_LIMIT)
+    return (decode_cursor(cursor) if cursor else None), limit
+
+
+def _after_cursor(position, cursor, descending):
+    return position < cursor if descending else position > cursor
+
+
+def _keyset_condition(position, descending):
+    """Q selecting index rows after ``position`` in the page direction."""
+    block_number, log_index = position
+    if descending:
+        return Q(block_number__lt=block_number) | Q(
+            block_number=block_number, log_index__lt=log_index
+        )
+    return Q(block_number__gt=block_number) | Q(
+        block_number=block_number, log_index__gt=log_index
+    )
+
+
+def _index_page(
+    contract,
+    issuer,
+    student,
+    diploma_id,
+    from_block,
+    to_block,
+    position,
+    limit,
+    descending,
+):
+    """Up to ``limit + 1`` list rows read from the event index."""
+    rows = IndexedCertificate.objects.filter(
+        contract_address=normalize_address(contract.address)
+    )
+    if issuer is not None:
+        rows = rows.filter(issuer=_checksum_or_none(issuer))
+    if student is not None:
+        rows = rows.filter(student=_checksum_or_none(student))
+    if diploma_id is not None:
+        rows = rows.filter(diploma_id=normalize_diploma_id(diploma_id))
+    if from_block is not None:
+        rows = rows.filter(block_number__gte=from_block)
+    if to_block is not None:
+        rows = rows.filter(block_number__lte=to_block)
+    if position is not None:
+        rows = rows.filter(_keyset_condition(position, descending))
+    order = (
+        ("-block_number", "-log_index") if descending else ("block_number", "log_index")
+    )
+    rows = rows.order_by(*order)
+    if limit is not None:
+        rows = rows[: limit + 1]
+    return [_item_from_row(row) for row in rows]
+
+
+def _scan_page(
+    manager,
+    contract,
+    issuer,
+    student,
+    diploma_id,
+    from_block,
+    to_block,
+    position,
+    limit,
+    descending,
+    with_gas,
+):
+    """Up to ``limit + 1`` list rows read from CertificateRegistered logs on the chain."""
+    argument_filters = _argument_filters(issuer, student, diploma_id)
+    if argument_filters is None:
+        return []
+    scan_from, scan_to = from_block or 0, to_block
+    if position is not None:
+        if descending:
+            scan_to = position[0] if scan_to is None else min(scan_to, position[0])
+        else:
+            scan_from = max(scan_from, position[0])
+    if scan_to is not None and scan_to < scan_from:
+        return []
+    events = []
+    for event in scan_logs(
+        contract.events.CertificateRegistered,
+        from_block=scan_from,
+        to_block=scan_to,
+        argument_filters=argument_filters or None,
+        reverse=descending,
+    ):
+        if position is not None and not _after_cursor(
+            (event.blockNumber, event.logIndex), position, descending
+        ):
+            continue
+        events.append(event)
+        if limit is not None and len(events) > limit:
+            break
+    page_events = events if limit is None else events[:limit]
+    gas_by_tx = (
+        gas_used_by_tx(manager.web3, [_tx_hash(event) for event in page_events])
+        if with_gas
+        else {}
+    )
+    return [_item_from_event(event, gas_by_tx.get(_tx_hash(event))) for event in events]
+
+
+def list_certificate_page(
+    manager,
+    issuer=None,
+    student=None,
+    diploma_id=None,
+    from_block=None,
+    to_block=None,
+    cursor=None,
+    limit=None,
+    direction="asc",
+    with_gas=True,
+):
+    """One page of certificate list rows and the cursor of the next page (None on the last page).
+
+    Pages are keyset-paginated on (block_number, log_index): the cursor marks the
+    last row already returned, so every page is read with a range condition
+    instead of an offset. ``direction`` is "asc" (oldest first) or "desc";
+    ``limit`` is capped at CERTIFICATE_PAGE_MAX_LIMIT and ``limit=None`` returns
+    everything after the cursor. Invalid paging arguments raise ValueError
+    (see check_page_args).
+
+    ``issuer``, ``student`` and ``diploma_id`` can be combined with an inclusive
+    block range. Reads come from the event index up to its checkpoint, and from
+    CertificateRegistered logs on the chain above it (or for everything before
+    the first index run), with the filters sent to the node as topics so only
+    matching logs are returned and decoded.
+    """
+    position, limit = check_page_args(cursor, limit, direction)
+    descending = direction == "desc"
+
+    contract = manager.get_contract()
+    checkpoint = index_checkpoint(contract.address)
+    filters = (issuer, student, diploma_id)
+
+    def index_rows(limit):
+        # The index only holds blocks up to its checkpoint.
+        upper = checkpoint if to_block is None else min(to_block, checkpoint)
+        return _index_page(
+            contract, *filters, from_block, upper, position, limit, descending
+        )
+
+    def chain_rows(limit, above=-1):
+        lower = max(from_block or 0, above + 1)
+        return _scan_page(
+            manager,
+            contract,
+            *filters,
+            lower,
+            to_block,
+            position,
+            limit,
+            descending,
+            with_gas,
+        )
+
+    if checkpoint is None:
+        items = chain_rows(limit)
+    else:
+        # Blocks above the checkpoint are read from the chain, so a lagging
+        # index does not hide recent registrations.
+        first, second = (
+            (lambda n: chain_rows(n, checkpoint), index_rows)
+            if descending
+            else (index_rows, lambda n: chain_rows(n, checkpoint))
+        )
+        items = first(limit)
+        if limit is None or len(items) <= limit:
+            items += second(None if limit is None else limit - len(items))
+
+    next_cursor = None
+    if limit is not None and len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["block_number"], items[-1]["log_index"])
+    revoked = get_revocation_index(manager).revoked_among(
+        item["cert_hash"] for item in items
+    )
+    for item in items:
+        item["is_revoked"] = normalize_diploma_id(item["cert_hash"]) in revoked
+    return items, next_cursor
+
+
+def list_certificate_items(
+    manager,
+    issuer=None,
+    student=None,
+    diploma_id=None,
+    from_block=None,
+    to_block=None,
+    with_gas=True,
+):
+    """Every certificate list row matching the filters, oldest first."""
+    items, _ = list_certificate_page(
+        manager,
+        issuer=issuer,
+        student=student,
+        diploma_id=diploma_id,
+        from_block=from_block,
+        to_block=to_block,
+        with_gas=with_gas,
+    )
+    return items
+
+
+def certificate_operations(manager, limit=None):
+    """Registrations and revocations as dashboard operations, newest block first.
+
+    With ``limit`` only the newest ``limit`` operations are returned; from the
+    index those are read with ordered, limited queries.
+    """
+    contract = manager.get_contract()
+    operations = []
+    if index_ready(contract.address):
+        return latest_operations(normalize_address(contract.address), limit)
+
+    reg_events = list(scan_logs(contract.events.CertificateRegistered))
+    try:
+        rev_events = list(scan_logs(contract.events.CertificateRevoked))
+    except Exception:
+        rev_events = []
+    for event_name, operation, events in (
+        ("CertificateRegistered", "Issued Certificate", reg_events),
+        ("CertificateRevoked", "Revoked Certificate", rev_events),
+    ):
+        for event in events:
+            operations.append(
+                {
+                    "event": event_name,
+                    "blockNumber": getattr(event, "blockNumber", 0),
+                    "actor": getattr(event.args, "issuer", "unknown")
+                    if hasattr(event.args, "issuer")
+                    else "unknown",
+                    "operation": operation,
+                    "type": "On-chain",
+                    "metadata": getattr(event.args, "metadata", None),
+                    "event_obj": event,
+                }
+            )
+    operations = sorted(operations, key=lambda e: e["blockNumber"], reverse=True)
+    if limit is not None:
+        operations = operations[:limit]
+    gas_by_tx = gas_used_by_tx(
+        manager.web3, [_tx_hash(op["event_obj"]) for op in operations]
+    )
+    try:
+        timestamps = get_block_cache(manager.web3).timestamps(
+            op["blockNumber"] for op in operations
+        )
+    except Exception:
+        timestamps = {}
+    for op in operations:
+        op["timestamp"] = _format_timestamp(timestamps.get(op["blockNumber"]))
+        op["gas_used"] = gas_by_tx.get(_tx_hash(op.pop("event_obj")))
+    return operations
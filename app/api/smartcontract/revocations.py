@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+
+from app.api.smartcontract.indexer import index_ready, normalize_address
+from app.api.smartcontract.log_scanner import scan_logs
+from app.models import IndexedRevocation, IndexerCheckpoint
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_REFRESH_INTERVAL = float(os.getenv("REVOCATION_REFRESH_INTERVAL", "2"))
+
+
+def normalize_diploma_id(diploma_id):
+    """Lower-case hex without 0x, the form diploma ids are stored and compared in."""
+    value = (
+        diploma_id.hex()
+        if isinstance(diploma_id, (bytes, bytearray))
+        else str(diploma_id)
+    )
+    value = value.lower()
+    return value[2:] if value.startswith("0x") else value
+
+
+class RevocationIndex:
+    """In-process set of revoked diploma ids for one contract.
+
+    Lookups are set membership. The set is replaced, never mutated, so readers
+    do not need the lock. It is brought up to date at most every
+    REVOCATION_REFRESH_INTERVAL seconds: from IndexedRevocation when the
+    certificate indexer has a checkpoint for the contract, otherwise by
+    scanning CertificateRevoked logs from the last block seen. Both refreshes
+    only read what is new since the previous one; an indexer rewind (reorg)
+    since the last refresh, seen through the checkpoint's rewind counter,
+    triggers a full reload.
+    """
+
+    def __init__(
+        self, manager, contract_address, refresh_interval=REVOCATION_REFRESH_INTERVAL
+    ):
+        self.manager = manager
+        self.contract_address = normalize_address(contract_address)
+        self.refresh_interval = refresh_interval
+        self.synced_block = -1
+        self._revoked = set()
+        self._from_index = None
+        self._rewinds = None
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh_from_index(self):
+        checkpoint = IndexerCheckpoint.objects.filter(
+            contract_address=self.contract_address
+        ).first()
+        if checkpoint is None:
+            return
+        # The indexer may have rewound and moved past synced_block again since the
+        # last refresh, so a checkpoint that only went up does not rule out a reorg.
+        reload = (
+            self._from_index is not True
+            or checkpoint.rewinds != self._rewinds
+            or checkpoint.block_number < self.synced_block
+        )
+        synced_block = -1 if reload else self.synced_block
+        new_ids = set(
+            IndexedRevocation.objects.filter(
+                contract_address=self.contract_address,
+                block_number__gt=synced_block,
+                block_number__lte=checkpoint.block_number,
+            ).values_list("diploma_id", flat=True)
+        )
+        self._revoked = new_ids if reload else self._revoked | new_ids
+        self.synced_block, self._from_index = checkpoint.block_number, True
+        self._rewinds = checkpoint.rewinds
+
+    def _refresh_from_chain(self):
+        reload = self._from_index is not False
+        synced_block = -1 if reload else self.synced_block
+        head = self.manager.web3.eth.block_number
+        if head <= synced_block:
+            return
+        event = self.manager.get_contract().events.CertificateRevoked
+        new_ids = {
+            normalize_diploma_id(log.args.certHash)
+            for log in scan_logs(event, from_block=synced_block + 1, to_block=head)
+        }
+        self._revoked = new_ids if reload else self._revoked | new_ids
+        self.synced_block, self._from_index = head, False
+
+    def refresh(self, force=False):
+        with self._lock:
+            if (
+                not force
+                and time.monotonic() - self._refreshed_at < self.refresh_interval
+            ):
+                return
+            try:
+                if index_ready(self.contract_address):
+                    self._refresh_from_index()
+                else:
+                    self._refresh_from_chain()
+                self._refreshed_at = time.monotonic()
+            except Exception as e:
+                logger.warning(
+                    f"Revocation index refresh failed for {self.contract_address}: {e}"
+                )
+
+    def is_revoked(self, diploma_id):
+        self.refresh()
+        return normalize_diploma_id(diploma_id) in self._revoked
+
+    def revoked_among(self, diploma_ids):
+        """The subset of ``diploma_ids`` (normalized) that is revoked."""
+        self.refresh()
+        return {normalize_diploma_id(d) for d in diploma_ids} & self._revoked
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_revocation_index(manager):
+    """Process-wide RevocationIndex for the contract currently loaded by ``manager``."""
+    address = normalize_address(manager.get_contract().address)
+    with _indexes_lock:
+        if address not in _indexes:
+            _indexes[address] = RevocationIndex(manager, address)
+        return _indexes[address]
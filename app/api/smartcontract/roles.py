@@ -0,0 +1,150 @@
+import logging
+import os
+import threading
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+from app.api.smartcontract.rpc_batch import RPC_BATCH_SIZE, batch_request, chunked
+
+logger = logging.getLogger(__name__)
+
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "")
+ROLE_MULTICALL_CHUNK = int(os.getenv("ROLE_MULTICALL_CHUNK", "500"))
+
+# The DEFAULT_ADMIN_ROLE in OpenZeppelin's AccessControl is bytes32(0)
+ROLES = {
+    "Admin": b"\x00" * 32,
+    "Issuer": bytes(Web3.keccak(text="ISSUER_ROLE")),
+    "Student": bytes(Web3.keccak(text="STUDENT_ROLE")),
+}
+
+MULTICALL3_ABI = [
+    {
+        "name": "aggregate3",
+        "type": "function",
+        "stateMutability": "payable",
+        "inputs": [
+            {
+                "name": "calls",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+            }
+        ],
+        "outputs": [
+            {
+                "name": "returnData",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+            }
+        ],
+    },
+]
+
+
+def _decode_bool(data):
+    """ABI-decoded ``bool`` return value, or None for an empty/failed call."""
+    if not data:
+        return None
+    data = HexBytes(data)
+    return int.from_bytes(data[:32], "big") != 0 if len(data) >= 32 else None
+
+
+class RoleLookupService:
+    """Answers many ``hasRole(role, address)`` checks with one round trip per chunk.
+
+    With MULTICALL3_ADDRESS pointing at a deployed Multicall3 contract the checks
+    are folded into ``aggregate3`` eth_calls of ROLE_MULTICALL_CHUNK checks each;
+    otherwise they are sent as JSON-RPC batches of plain eth_calls.
+    """
+
+    def __init__(
+        self,
+        contract,
+        multicall_address=MULTICALL3_ADDRESS,
+        chunk_size=ROLE_MULTICALL_CHUNK,
+        batch_size=RPC_BATCH_SIZE,
+    ):
+        self.contract = contract
+        self.web3 = contract.w3
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.multicall = None
+        if multicall_address:
+            address = Web3.to_checksum_address(multicall_address)
+            if self.web3.eth.get_code(address):
+                self.multicall = self.web3.eth.contract(
+                    address=address, abi=MULTICALL3_ABI
+                )
+            else:
+                logger.warning(
+                    f"No Multicall3 contract at {address}; using JSON-RPC batches for role checks"
+                )
+
+    def _call_data(self, role_hash, address):
+        return self.contract.encodeABI(fn_name="hasRole", args=[role_hash, address])
+
+    def _via_multicall(self, call_data):
+        results = []
+        for chunk in chunked(call_data, self.chunk_size):
+            calls = [(self.contract.address, True, HexBytes(data)) for data in chunk]
+            results += [
+                _decode_bool(data) if success else None
+                for success, data in self.multicall.functions.aggregate3(calls).call()
+            ]
+        return results
+
+    def _via_batch(self, call_data):
+        calls = [
+            ("eth_call", [{"to": self.contract.address, "data": data}, "latest"])
+            for data in call_data
+        ]
+        return [
+            _decode_bool(result)
+            for result in batch_request(self.web3, calls, batch_size=self.batch_size)
+        ]
+
+    def has_roles(self, checks):
+        """``[(role_hash, address), ...]`` -> ``[True | False | None, ...]``; None when a check failed."""
+        call_data = [
+            self._call_data(role_hash, Web3.to_checksum_address(address))
+            for role_hash, address in checks
+        ]
+        if not call_data:
+            return []
+        if self.multicall is not None:
+            return self._via_multicall(call_data)
+        return self._via_batch(call_data)
+
+    def roles_for(self, addresses, roles=tuple(ROLES)):
+        """Names of the ``roles`` each of ``addresses`` holds, keyed by address as given.
+
+        A failed check counts as "not granted".
+        """
+        addresses = list(dict.fromkeys(addresses))
+        checks = [(ROLES[role], address) for address in addresses for role in roles]
+        granted = iter(self.has_roles(checks))
+        return {
+            address: [role for role in roles if next(granted) is True]
+            for address in addresses
+        }
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_role_service(contract):
+    """Process-wide RoleLookupService for ``contract``, rebuilt when the contract is reloaded."""
+    with _services_lock:
+        service = _services.get(contract.address)
+        if service is None or service.contract is not contract:
+            service = _services[contract.address] = RoleLookupService(contract)
+        return service
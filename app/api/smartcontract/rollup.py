@@ -0,0 +1,198 @@
+import datetime
+import os
+
+from django.db.models import Sum
+from django.db.models.functions import Length
+
+from app.models import DashboardRollup, IndexedCertificate, IndexedRevocation
+
+DASHBOARD_RECENT_OPERATIONS = int(os.getenv("DASHBOARD_RECENT_OPERATIONS", "50"))
+
+
+def is_offchain_metadata(metadata):
+    """Registrations whose metadata is an IPFS CID are counted as off-chain."""
+    return (
+        isinstance(metadata, str) and len(metadata) >= 46 and metadata.startswith("Qm")
+    )
+
+
+def _format_timestamp(timestamp):
+    return (
+        datetime.datetime.fromtimestamp(timestamp).isoformat()
+        if timestamp is not None
+        else None
+    )
+
+
+def operation_from_certificate(row):
+    return {
+        "event": "CertificateRegistered",
+        "blockNumber": row.block_number,
+        "logIndex": row.log_index,
+        "actor": row.issuer,
+        "operation": "Issued Certificate",
+        "type": "On-chain",
+        "metadata": row.metadata,
+        "timestamp": _format_timestamp(row.issued_at),
+        "gas_used": row.gas_used,
+    }
+
+
+def operation_from_revocation(row):
+    return {
+        "event": "CertificateRevoked",
+        "blockNumber": row.block_number,
+        "logIndex": row.log_index,
+        "actor": "unknown",
+        "operation": "Revoked Certificate",
+        "type": "On-chain",
+        "metadata": None,
+        "timestamp": _format_timestamp(row.block_timestamp),
+        "gas_used": row.gas_used,
+    }
+
+
+def _newest_first(operations):
+    return sorted(
+        operations, key=lambda op: (op["blockNumber"], op["logIndex"]), reverse=True
+    )
+
+
+def apply_rows(
+    rollup, certificates, revocations, block_number, limit=DASHBOARD_RECENT_OPERATIONS
+):
+    """Fold newly indexed rows into ``rollup`` and save it.
+
+    The caller runs this in the same transaction that stores the rows, so the
+    rollup never counts blocks the index does not hold.
+    """
+    rollup.registrations += len(certificates)
+    rollup.offchain_registrations += sum(
+        1 for row in certificates if is_offchain_metadata(row.metadata)
+    )
+    rollup.revocations += len(revocations)
+    rollup.total_gas += sum(
+        row.gas_used or 0 for row in list(certificates) + list(revocations)
+    )
+    operations = [operation_from_certificate(row) for row in certificates]
+    operations += [operation_from_revocation(row) for row in revocations]
+    rollup.recent_operations = _newest_first(
+        list(rollup.recent_operations) + operations
+    )[:limit]
+    rollup.block_number = block_number
+    rollup.save()
+    return rollup
+
+
+def latest_operations(contract_address, limit=DASHBOARD_RECENT_OPERATIONS):
+    """The ``limit`` newest indexed registrations and revocations, newest first."""
+    latest = [
+        operation_from_certificate(row)
+        for row in IndexedCertificate.objects.filter(
+            contract_address=contract_address
+        ).order_by("-block_number", "-log_index")[:limit]
+    ]
+    latest += [
+        operation_from_revocation(row)
+        for row in IndexedRevocation.objects.filter(
+            contract_address=contract_address
+        ).order_by("-block_number", "-log_index")[:limit]
+    ]
+    return _newest_first(latest)[:limit]
+
+
+def index_totals(contract_address, limit=DASHBOARD_RECENT_OPERATIONS):
+    """Rollup fields computed from the indexed tables with aggregate queries."""
+    certificates = IndexedCertificate.objects.filter(contract_address=contract_address)
+    revocations = IndexedRevocation.objects.filter(contract_address=contract_address)
+    return {
+        "registrations": certificates.count(),
+        "offchain_registrations": (
+            certificates.annotate(metadata_length=Length("metadata"))
+            .filter(metadata__startswith="Qm", metadata_length__gte=46)
+            .count()
+        ),
+        "revocations": revocations.count(),
+        "total_gas": (certificates.aggregate(total=Sum("gas_used"))["total"] or 0)
+        + (revocations.aggregate(total=Sum("gas_used"))["total"] or 0),
+        "recent_operations": latest_operations(contract_address, limit),
+    }
+
+
+def rebuild_rollup(contract_address, block_number, limit=DASHBOARD_RECENT_OPERATIONS):
+    """Recompute the rollup of ``contract_address`` from the indexed tables (after a reorg or upgrade)."""
+    rollup, _ = DashboardRollup.objects.get_or_create(contract_address=contract_address)
+    for field, value in index_totals(contract_address, limit).items():
+        setattr(rollup, field, value)
+    rollup.block_number = block_number
+    rollup.save()
+    return rollup
+
+
+def with_cumulative_gas(operations):
+    """Dashboard entries for ``operations``, each with the gas used by it and the entries before it."""
+    entries, cumulative_gas = [], 0
+    for op in operations:
+        gas_used = op["gas_used"]
+        if gas_used is not None:
+            cumulative_gas += gas_used
+        entries.append(
+            {
+                "timestamp": op["timestamp"],
+                "actor": op["actor"],
+                "operation": op["operation"],
+                "type": op["type"],
+                "gas_used": gas_used,
+                "cumulative_gas": cumulative_gas if gas_used is not None else None,
+            }
+        )
+    return entries
+
+
+def dashboard_totals(manager, contract, limit=DASHBOARD_RECENT_OPERATIONS):
+    """index_totals fields for ``contract``, from the cheapest source available.
+
+    The rollup when the indexer maintains one, aggregate queries when the
+    contract is indexed but not rolled up yet, and a scan of the chain
+    otherwise. ``block_number`` and ``lag_blocks`` (how far the rollup is
+    behind the head) are None unless the rollup was used.
+    """
+    # Imported here: the indexer and queries modules import this one.
+    from app.api.smartcontract.indexer import index_ready, normalize_address
+    from app.api.smartcontract.queries import certificate_operations
+
+    contract_address = normalize_address(contract.address)
+    rollup = DashboardRollup.objects.filter(contract_address=contract_address).first()
+    if rollup is not None:
+        try:
+            lag_blocks = max(0, manager.web3.eth.block_number - rollup.block_number)
+        except Exception:
+            lag_blocks = None
+        return {
+            "registrations": rollup.registrations,
+            "offchain_registrations": rollup.offchain_registrations,
+            "revocations": rollup.revocations,
+            "total_gas": rollup.total_gas,
+            "recent_operations": rollup.recent_operations,
+            "block_number": rollup.block_number,
+            "lag_blocks": lag_blocks,
+        }
+    if index_ready(contract_address):
+        totals = index_totals(contract_address, limit)
+    else:
+        operations = certificate_operations(manager)
+        registrations = [
+            op for op in operations if op["event"] == "CertificateRegistered"
+        ]
+        totals = {
+            "registrations": len(registrations),
+            "offchain_registrations": sum(
+                1 for op in registrations if is_offchain_metadata(op["metadata"])
+            ),
+            "revocations": len(operations) - len(registrations),
+            "total_gas": sum(
+                op["gas_used"] for op in operations if op["gas_used"] is not None
+            ),
+            "recent_operations": operations[:limit],
+        }
+    return dict(totals, block_number=None, lag_blocks=None)
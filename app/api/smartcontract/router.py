@@ -1,10 +1,10 @@
 import datetime
 import os
+import uuid
 from subprocess import run
 
 import web3
 from web3 import Web3
-import ipfshttpclient
 from django.contrib.auth import get_user_model
 from ninja import Router, Schema
 from ninja.errors import HttpError
@@ -13,8 +13,19 @@ import hashlib
 from PyPDF2 import PdfReader
 from ninja.files import UploadedFile
 from app.api.smartcontract import SEEDWeb3
+from app.api.smartcontract.batch_registration import BatchRegistrar, batch_job_results
+from app.api.smartcontract.certificate_cache import get_certificate_cache
 from app.api.smartcontract.contract_manager import ContractManager
-from django.http import HttpResponse
+from app.api.smartcontract.export import EXPORT_FORMATS, export_lines
+from app.api.smartcontract.fees import get_fee_oracle
+from app.api.smartcontract.instrumentation import ipfs_connect
+from app.api.smartcontract.queries import check_page_args, list_certificate_page
+from app.api.smartcontract.revocations import get_revocation_index, normalize_diploma_id
+from app.api.smartcontract.roles import ROLES, get_role_service
+from app.api.smartcontract.rollup import dashboard_totals, with_cumulative_gas
+from app.api.smartcontract.tx_jobs import UnsupportedContractError, enqueue_transaction, job_payload
+from app.models import TransactionJob
+from django.http import HttpResponse, StreamingHttpResponse
 from django.contrib.sessions.models import Session
 from django.utils import timezone
 from app.api.wallet.router import get_balance
@@ -22,7 +33,7 @@ import traceback
 from django.conf import settings
 from ninja import Schema
 from ninja.responses import Response
-from typing import List
+from typing import Dict, List, Optional
 
 router = Router(tags=["smartcontract"])
 
@@ -30,6 +41,9 @@ manager = ContractManager()
 # manager.refresh()
 
 IPFS_API_URL = os.getenv("IPFS_API_URL", "/dns/ipfs/tcp/5001/http")
+REVOCATION_CHECK_MAX_HASHES = int(os.getenv("REVOCATION_CHECK_MAX_HASHES", "10000"))
+ROLE_CHECK_MAX_ADDRESSES = int(os.getenv("ROLE_CHECK_MAX_ADDRESSES", "10000"))
+CERTIFICATE_BATCH_MAX_REQUEST = int(os.getenv("CERTIFICATE_BATCH_MAX_REQUEST", "10000"))
 
 
 class CertificateIn(BaseModel):
@@ -49,6 +63,12 @@ class CertificateOut(BaseModel):
     gas_used: int | None = None
 
 
+class QueuedCertificateOut(CertificateOut):
+    # The transaction is sent by the Celery worker; follow it at GET /tx/{job_id}.
+    job_id: str
+    status: str
+
+
 class CertificateUploadIn(BaseModel):
     recipient: str
     metadata: str = ""
@@ -69,6 +89,8 @@ class CertificateResponse(Schema):
     cert_hash: str
     tx_hash: str | None = None
     message: str | None = None
+    job_id: str | None = None
+    status: str | None = None
 
 
 class CertificateListItem(Schema):
@@ -82,10 +104,30 @@ class CertificateListItem(Schema):
     transaction_hash: str | None = None
     log_index: int | None = None
     gas_used: int | None = None
+    is_revoked: bool | None = None
 
 
 class CertificateListResponse(Schema):
     certificates: list[CertificateListItem]
+    next_cursor: str | None = None
+
+
+class RevocationCheckRequest(Schema):
+    cert_hashes: list[str]
+
+
+class RevocationCheckResponse(Schema):
+    revoked: list[str]
+    checked: int
+    synced_block: int
+
+
+class CertificateCacheStats(Schema):
+    local_hits: int
+    shared_hits: int
+    misses: int
+    local_entries: int
+    invalidations: int
 
 
 class DashboardMetrics(Schema):
@@ -112,6 +154,8 @@ class DashboardMetrics(Schema):
     total_gas_spent: int | None = None
     gas_balance: int | None = None
     wallet_gas_balance: str | None = None
+    rollup_block_number: int | None = None
+    rollup_lag_blocks: int | None = None
 
 
 class DashboardWalletBalanceRequest(Schema):
@@ -127,6 +171,16 @@ class ErrorResponse(Schema):
     error: str
 
 
+class BulkRolesRequest(Schema):
+    addresses: List[str]
+    roles: List[str] = list(ROLES)
+
+
+class BulkRolesResponse(Schema):
+    roles: Dict[str, List[str]]
+    invalid: List[str]
+
+
 class CheckRolesRequest(BaseModel):
     address: str
     signature: str | None = None
@@ -136,6 +190,47 @@ class StudentRoleRequest(BaseModel):
     address: str
 
 
+class BatchCertificateItem(Schema):
+    cert_hash: str
+    student_address: str
+    ipfs_cid: str
+    metadata: str = ""
+
+
+class BatchRegisterRequest(Schema):
+    certificates: List[BatchCertificateItem]
+
+
+class BatchItemResult(Schema):
+    cert_hash: str
+    # The transaction job registering the item (GET /tx/{job_id}); None if it was not queued.
+    job_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchRegisterResponse(Schema):
+    queued: int
+    failed: int
+    jobs: List[str]
+    results: List[BatchItemResult]
+
+
+class BatchItemOutcome(Schema):
+    cert_hash: str
+    success: Optional[bool] = None  # None until the job is final
+    error: Optional[str] = None
+
+
+class BatchJobResponse(Schema):
+    job_id: str
+    status: str
+    tx_hash: Optional[str] = None
+    block_number: Optional[int] = None
+    gas_used: Optional[int] = None
+    error: Optional[str] = None
+    results: List[BatchItemOutcome]
+
+
 class RegisterCertificateSchema(Schema):
     student_address: str
     pdf: str
@@ -154,7 +249,7 @@ def register_certificate_from_pdf(request, file: UploadedFile, recipient: str):
     cert_hash = hashlib.sha256(pdf_bytes).hexdigest()
 
     # 4. Upload to IPFS (offchain) and get IPFS hash
-    with ipfshttpclient.connect(IPFS_API_URL) as client:
+    with ipfs_connect(IPFS_API_URL) as client:
         res = client.add_bytes(pdf_bytes)
         ipfs_hash = res
 
@@ -185,14 +280,15 @@ def register_certificate_from_pdf(request, file: UploadedFile, recipient: str):
         raise HttpError(400, f"Recipient must be a valid Ethereum address (got: {recipient})")
     try:
         # Pass ipfs_hash as the metadata argument for compatibility with event parsing
-        tx_hash = contract.functions.registerCertificate(
+        register = contract.functions.registerCertificate(
             cert_hash_bytes,  # diplomaId
             Web3.to_checksum_address(recipient),  # student
             "{}",  # metadata (empty JSON object for now)
             1,  # storageMode (1 for OFF_CHAIN/IPFS)
             b'',  # pdfOnChain (empty bytes)
             ipfs_hash  # ipfsHash
-        ).transact({"from": issuer})
+        )
+        tx_hash = get_fee_oracle(contract.w3).transact(register, {"from": issuer})
         print(f"tx_hash: {tx_hash}")
         receipt = manager.web3.eth.get_transaction_receipt(tx_hash)
         print(f"receipt: {receipt}")
@@ -277,13 +373,16 @@ def compile_contract(request):
         success_process.append(success)
         output_process.append(output)
     # Refresh contract manager state after compilation (ABI may have changed)
-    manager.refresh()
+    manager.refresh(force=True)
     return CompileResponse(success=success_process, output=output_process)
 
 
 @router.post("/deploy/", response=DeployResponse)
 def deploy_contract(request):
-    manager.connect_web3()
+    try:
+        manager.connect_web3()
+    except ConnectionError as e:
+        raise HttpError(500, f"Web3 provider is not initialized. Cannot deploy contracts. {e}") from e
     if not manager.web3:
         print("Deploying contracts...")
         raise HttpError(500, "Web3 provider is not initialized. Cannot deploy contracts.")
@@ -326,13 +425,13 @@ def deploy_contract(request):
     if errors and not deployed_contracts:
         raise HttpError(500, " | ".join(errors))
     # Refresh contract manager state after deployment (address may have changed)
-    manager.refresh()
+    manager.refresh(force=True)
     return DeployResponse(success=[True]*len(deployed_contracts), output=deployed_contracts + errors)
 
 @router.post("/upload_offchain", response=CertificateResponse)
 def upload_certificate_offchain(request, file, payload):
     try:
-        with ipfshttpclient.connect(IPFS_API_URL) as client:
+        with ipfs_connect(IPFS_API_URL) as client:
             res = client.add(file.file)
             ipfs_hash = res["Hash"]
     except Exception as e:
@@ -340,12 +439,12 @@ def upload_certificate_offchain(request, file, payload):
     try:
         cert_hash = Web3.keccak(text=ipfs_hash).hex()
         issuer = web3.eth.accounts[0]
-        tx = manager.contract.functions.registerCertificate(
+        tx = get_fee_oracle(manager.web3).transact(manager.contract.functions.registerCertificate(
             Web3.to_bytes(hexstr=cert_hash),
             Web3.to_checksum_address(payload.recipient),
             ipfs_hash,
             "",
-        ).transact({"from": issuer})
+        ), {"from": issuer})
         web3.eth.wait_for_transaction_receipt(tx)
         # TODO: Log to PostgreSQL (certificate, tx hash, user info)
         return CertificateResponse(
@@ -357,12 +456,11 @@ def upload_certificate_offchain(request, file, payload):
 #
 @router.get("/download_offchain/{ipfs_hash}")
 def download_certificate_offchain(request, ipfs_hash: str):
-    import ipfshttpclient
-    from django.http import FileResponse, HttpResponse
+    from django.http import FileResponse
     import tempfile
     try:
         # Connect to local or remote IPFS node
-        client = ipfshttpclient.connect(IPFS_API_URL)
+        client = ipfs_connect(IPFS_API_URL)
         # Download the file from IPFS
         file_bytes = client.cat(ipfs_hash)
         # Write to a temporary file
@@ -377,46 +475,34 @@ def download_certificate_offchain(request, ipfs_hash: str):
         return HttpResponse(f"Failed to fetch file from IPFS: {e}", status=404)
 
 
+def certificate_list_response(cursor=None, limit=None, direction="asc", **filters):
+    """CertificateListResponse for one page; bad cursor/limit/direction values are a 400."""
+    try:
+        check_page_args(cursor, limit, direction)
+    except ValueError as e:
+        raise HttpError(400, str(e)) from e
+    certs, next_cursor = list_certificate_page(manager, cursor=cursor, limit=limit, direction=direction, **filters)
+    return CertificateListResponse(certificates=certs, next_cursor=next_cursor)
+
+
 @router.get("/list_certificates", response=CertificateListResponse)
-def list_certificates(request):
-    certificates = []
+def list_certificates(request, issuer: Optional[str] = None, student: Optional[str] = None,
+                      from_block: Optional[int] = None, to_block: Optional[int] = None,
+                      cursor: Optional[str] = None, limit: Optional[int] = None, direction: str = "asc"):
+    """List certificates, optionally filtered by issuer, student and an inclusive block range.
+
+    Pass ``limit`` to page through the results; ``next_cursor`` of the response is
+    the ``cursor`` of the next page.
+    """
     try:
         manager.refresh()
         contract = manager.get_contract()
         if contract is None:
             raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
-        events = contract.events.CertificateRegistered().get_logs(fromBlock=0)
-        for event in events:
-            cert_hash = event.args.diplomaId.hex()
-            issuer = getattr(event.args, 'issuer', None)
-            recipient = getattr(event.args, 'student', None)
-            ipfs_hash = getattr(event.args, 'ipfsHash', None)
-            metadata = ipfs_hash  # For compatibility with frontend/table
-            content = None
-            block_number = getattr(event, 'blockNumber', None)
-            transaction_hash = event.transactionHash.hex() if hasattr(event, 'transactionHash') else None
-            log_index = getattr(event, 'logIndex', None)
-            gas_used = None
-            if transaction_hash:
-                try:
-                    receipt = manager.web3.eth.get_transaction_receipt(transaction_hash)
-                    gas_used = receipt['gasUsed']
-                except Exception:
-                    gas_used = None
-            certificates.append({
-                "cert_hash": cert_hash,
-                "issuer": issuer,
-                "recipient": recipient,
-                "recipient_address": recipient,  # Add recipient address to the table
-                "metadata": metadata,
-                "content": content,
-                "ipfs_hash": ipfs_hash,
-                "block_number": block_number,
-                "transaction_hash": transaction_hash,
-                "log_index": log_index,
-                "gas_used": gas_used,
-            })
-        return CertificateListResponse(certificates=certificates)
+        return certificate_list_response(issuer=issuer, student=student, from_block=from_block, to_block=to_block,
+                                         cursor=cursor, limit=limit, direction=direction)
+    except HttpError:
+        raise
     except Exception as e:
         import traceback
         print('Exception in list_certificates:', e)
@@ -424,6 +510,77 @@ def list_certificates(request):
         raise HttpError(500, f"Failed to list certificates: {str(e)}") from e
 
 
+@router.post("/revocations/check", response=RevocationCheckResponse)
+def check_revocations(request, data: RevocationCheckRequest):
+    """Which of the given certificate hashes are revoked, answered from the revocation index."""
+    if len(data.cert_hashes) > REVOCATION_CHECK_MAX_HASHES:
+        raise HttpError(400, f"At most {REVOCATION_CHECK_MAX_HASHES} hashes can be checked per request")
+    manager.refresh()
+    if manager.get_contract() is None:
+        raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
+    index = get_revocation_index(manager)
+    revoked = index.revoked_among(data.cert_hashes)
+    return RevocationCheckResponse(
+        revoked=[cert_hash for cert_hash in data.cert_hashes if normalize_diploma_id(cert_hash) in revoked],
+        checked=len(data.cert_hashes),
+        synced_block=index.synced_block,
+    )
+
+
+@router.get("/certificate_cache/stats", response=CertificateCacheStats)
+def certificate_cache_stats(request):
+    """Hit/miss counters of this worker's certificate lookup cache."""
+    return CertificateCacheStats(**get_certificate_cache().stats())
+
+
+@router.get("/export_certificates")
+def export_certificates(request, format: str = "ndjson", from_block: Optional[int] = None):
+    """Stream the whole certificate registry as NDJSON or CSV.
+
+    Rows are produced page by page, so memory stays bounded whatever the registry
+    size. An interrupted export can be resumed with ``from_block`` set to the
+    ``block_number`` of the last row received (rows of that block are repeated).
+    """
+    if format not in EXPORT_FORMATS:
+        raise HttpError(400, f"Unsupported export format: {format}")
+    manager.refresh()
+    if manager.get_contract() is None:
+        raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
+    response = StreamingHttpResponse(export_lines(manager, format, from_block=from_block),
+                                     content_type=EXPORT_FORMATS[format])
+    response["Content-Disposition"] = f'attachment; filename="certificates.{format}"'
+    return response
+
+
+def _user_stats():
+    """(total_users, active_users, issuers, verifiers, active_sessions) for the dashboard."""
+    try:
+        User = get_user_model()
+        total_users = User.objects.count()
+        # Active users: unique user IDs with active sessions
+        session_keys = Session.objects.filter(expire_date__gt=timezone.now())
+        user_ids = set()
+        for session in session_keys:
+            data = session.get_decoded()
+            uid = data.get('_auth_user_id')
+            if uid:
+                user_ids.add(uid)
+        active_users = len(user_ids)
+        # Issuers: is_staff or group 'issuer'
+        issuers = User.objects.filter(is_staff=True).count() if hasattr(User, 'is_staff') else 0
+        # Verifiers: group 'verifier' or boolean field
+        try:
+            from django.contrib.auth.models import Group
+            verifier_group = Group.objects.get(name='verifier')
+            verifiers = verifier_group.user_set.count()
+        except Exception:
+            verifiers = User.objects.filter(is_verifier=True).count() if hasattr(User, 'is_verifier') else 0
+        active_sessions = session_keys.count()
+    except Exception:
+        return 0, 0, 0, 0, 0
+    return total_users, active_users, issuers, verifiers, active_sessions
+
+
 @router.get("/dashboard/metrics", response=DashboardMetrics)
 def dashboard_metrics(request):
     contract = manager.get_contract()
@@ -432,79 +589,24 @@ def dashboard_metrics(request):
     total_certificates = 0
     recent_registrations = 0
     total_gas_spent = 0
-    cumulative_gas = 0
     gas_balance = 0
     recent_operations = []
+    revocations = 0
+    rollup_block_number = None
+    rollup_lag_blocks = None
     try:
         if contract is not None:
-            # Fetch CertificateRegistered events
-            reg_events = contract.events.CertificateRegistered().get_logs(fromBlock=0)
-            onchain = len(reg_events)
-            offchain = 0
-            for event in reg_events:
-                metadata = event.args.metadata
-                if isinstance(metadata, str) and len(metadata) >= 46 and metadata.startswith("Qm"):
-                    offchain += 1
+            # Rollup, indexed tables or chain scan, whichever is available (see rollup.dashboard_totals).
+            totals = dashboard_totals(manager, contract)
+            onchain = totals["registrations"]
+            offchain = totals["offchain_registrations"]
+            revocations = totals["revocations"]
+            total_gas_spent = totals["total_gas"]
+            rollup_block_number = totals["block_number"]
+            rollup_lag_blocks = totals["lag_blocks"]
             total_certificates = onchain
-            # Fetch CertificateRevoked events if available
-            try:
-                rev_events = contract.events.CertificateRevoked().get_logs(fromBlock=0)
-            except Exception:
-                rev_events = []
-            # Combine all events for recent operations
-            all_events = []
-            for event in reg_events:
-                all_events.append({
-                    "event": "CertificateRegistered",
-                    "blockNumber": getattr(event, 'blockNumber', 0),
-                    "actor": getattr(event.args, 'issuer', 'unknown') if hasattr(event.args, 'issuer') else 'unknown',
-                    "operation": "Issued Certificate",
-                    "type": "On-chain",
-                    "event_obj": event
-                })
-            for event in rev_events:
-                all_events.append({
-                    "event": "CertificateRevoked",
-                    "blockNumber": getattr(event, 'blockNumber', 0),
-                    "actor": getattr(event.args, 'issuer', 'unknown') if hasattr(event.args, 'issuer') else 'unknown',
-                    "operation": "Revoked Certificate",
-                    "type": "On-chain",
-                    "event_obj": event
-                })
-            # Sort all events by blockNumber descending
-            all_events_sorted = sorted(all_events, key=lambda e: e['blockNumber'], reverse=True)
-            # Prepare recent_registrations and recent_operations
-            recent_registrations = min(8, len([e for e in all_events_sorted if e['event'] == 'CertificateRegistered']))
-
-            for e in all_events_sorted:
-                block_number = e['blockNumber']
-                timestamp = None
-                gas_used = None
-                tx_hash = getattr(e['event_obj'], 'transactionHash', None)
-                if block_number is not None:
-                    try:
-                        block = manager.web3.eth.get_block(block_number)
-                        timestamp = datetime.datetime.fromtimestamp(block.timestamp).isoformat()
-                    except Exception:
-                        timestamp = None
-                if tx_hash is not None:
-                    try:
-                        receipt = manager.web3.eth.get_transaction_receipt(tx_hash.hex() if hasattr(tx_hash, 'hex') else tx_hash)
-                        gas_used = receipt['gasUsed']
-                        total_gas_spent += gas_used
-                    except Exception:
-                        gas_used = None
-                # Calculate cumulative gas
-                if gas_used is not None:
-                    cumulative_gas += gas_used
-                recent_operations.append({
-                    "timestamp": timestamp,
-                    "actor": e['actor'],
-                    "operation": e['operation'],
-                    "type": e['type'],
-                    "gas_used": gas_used,
-                    "cumulative_gas": cumulative_gas if gas_used is not None else None,
-                })
+            recent_registrations = min(8, onchain)
+            recent_operations = with_cumulative_gas(totals["recent_operations"])
             # Get gas balance from the first account
             try:
                 gas_balance = manager.web3.eth.get_balance(manager.web3.eth.accounts[0])
@@ -517,10 +619,9 @@ def dashboard_metrics(request):
         total_certificates = 0
         recent_registrations = 0
         recent_operations = []
+        revocations = 0
         total_gas_spent = 0
         gas_balance = 0
-    # System activity (real data)
-    revocations = len([e for e in recent_operations if e['operation'] == 'Revoked Certificate'])
     # For signature_verifications, nfts_minted, nfts_transferred, oracle_calls, try to get from contract if available, else set to 0
     def get_contract_stat(func_name):
         try:
@@ -540,7 +641,7 @@ def dashboard_metrics(request):
         blockchain_node_status = "Unknown"
 
     try:
-        with ipfshttpclient.connect(IPFS_API_URL) as client:
+        with ipfs_connect(IPFS_API_URL) as client:
             ipfs_node_status = "Online" if client.id() else "Offline"
     except Exception:
         ipfs_node_status = "Offline"
@@ -548,34 +649,7 @@ def dashboard_metrics(request):
     queue_status = "Idle"  # If you have a queue system, replace with real status
     logs = []  # If you have logs, fetch from DB or file
     # User/issuer stats (real data)
-    try:
-        User = get_user_model()
-        total_users = User.objects.count()
-        # Active users: unique user IDs with active sessions
-        session_keys = Session.objects.filter(expire_date__gt=timezone.now())
-        user_ids = set()
-        for session in session_keys:
-            data = session.get_decoded()
-            uid = data.get('_auth_user_id')
-            if uid:
-                user_ids.add(uid)
-        active_users = len(user_ids)
-        # Issuers: is_staff or group 'issuer'
-        issuers = User.objects.filter(is_staff=True).count() if hasattr(User, 'is_staff') else 0
-        # Verifiers: group 'verifier' or boolean field
-        try:
-            from django.contrib.auth.models import Group
-            verifier_group = Group.objects.get(name='verifier')
-            verifiers = verifier_group.user_set.count()
-        except Exception:
-            verifiers = User.objects.filter(is_verifier=True).count() if hasattr(User, 'is_verifier') else 0
-        active_sessions = session_keys.count()
-    except Exception:
-        total_users = 0
-        active_users = 0
-        issuers = 0
-        verifiers = 0
-        active_sessions = 0
+    total_users, active_users, issuers, verifiers, active_sessions = _user_stats()
     return DashboardMetrics(
         total_certificates=total_certificates,
         onchain_certificates=onchain,
@@ -599,6 +673,8 @@ def dashboard_metrics(request):
         active_sessions=active_sessions,
         total_gas_spent=total_gas_spent,
         gas_balance=gas_balance,
+        rollup_block_number=rollup_block_number,
+        rollup_lag_blocks=rollup_lag_blocks,
     )
 
 
@@ -613,11 +689,8 @@ def dashboard_wallet_gas_balance(request, data: DashboardWalletBalanceRequest):
 def check_admin_role(request, address: str):
     """Check if the given address has the Admin role (DEFAULT_ADMIN_ROLE) on the blockchain."""
     try:
-        manager.connect_web3('ganache')
-        manager.load_abi()
-        manager.load_address()
-        manager.update_contract()
-        contract = manager.contract
+        manager.refresh()
+        contract = manager.get_contract()
         if not contract:
             raise Exception("Contract not loaded")
         DEFAULT_ADMIN_ROLE = Web3.keccak(text='DEFAULT_ADMIN_ROLE').hex()
@@ -631,11 +704,8 @@ def check_admin_role(request, address: str):
 def grant_role(request, address: str, role: str):
     """Grant a role (Admin, Issuer) to an address."""
     try:
-        manager.connect_web3('http://ganache:8545')
-        manager.load_abi()
-        manager.load_address()
-        manager.update_contract()
-        contract = manager.contract
+        manager.refresh()
+        contract = manager.get_contract()
         if not contract:
             raise Exception("Contract not loaded")
         if role == 'Admin':
@@ -646,7 +716,9 @@ def grant_role(request, address: str, role: str):
             raise Exception("Invalid role. Can only be 'Admin' or 'Issuer'.")
 
         admin_address = manager.web3.eth.accounts[0]
-        tx_hash = contract.functions.grantRole(role_hash, Web3.to_checksum_address(address)).transact({'from': admin_address})
+        tx_hash = get_fee_oracle(manager.web3).transact(
+            contract.functions.grantRole(role_hash, Web3.to_checksum_address(address)), {'from': admin_address}
+        )
 
         return {"success": True, "tx_hash": tx_hash.hex()}
     except Exception as e:
@@ -657,11 +729,8 @@ def grant_role(request, address: str, role: str):
 def revoke_role(request, address: str, role: str):
     """Revoke a role (Admin, Issuer) from an address."""
     try:
-        manager.connect_web3('http://ganache:8545')
-        manager.load_abi()
-        manager.load_address()
-        manager.update_contract()
-        contract = manager.contract
+        manager.refresh()
+        contract = manager.get_contract()
         if not contract:
             raise Exception("Contract not loaded")
         if role == 'Admin':
@@ -672,7 +741,9 @@ def revoke_role(request, address: str, role: str):
             raise Exception("Invalid role. Can only be 'Admin' or 'Issuer'.")
 
         admin_address = manager.web3.eth.accounts[0]
-        tx_hash = contract.functions.revokeRole(role_hash, Web3.to_checksum_address(address)).transact({'from': admin_address})
+        tx_hash = get_fee_oracle(manager.web3).transact(
+            contract.functions.revokeRole(role_hash, Web3.to_checksum_address(address)), {'from': admin_address}
+        )
 
         return {"success": True, "tx_hash": tx_hash.hex()}
     except Exception as e:
@@ -684,11 +755,8 @@ def grant_student_role(request, payload: StudentRoleRequest):
     """Grants the STUDENT_ROLE to a given address. Must be called by an account with ISSUER_ROLE."""
     print(f"Received payload for grant_student_role: {request.body}")  # Debugging line
     try:
-        manager.connect_web3('http://ganache:8545')
-        manager.load_abi()
-        manager.load_address()
-        manager.update_contract()
-        contract = manager.contract
+        manager.refresh()
+        contract = manager.get_contract()
         if not contract:
             return Response({"error": "Contract not loaded"}, status=400)
 
@@ -699,16 +767,11 @@ def grant_student_role(request, payload: StudentRoleRequest):
         if not hasattr(contract.functions, 'grantStudentRole'):
             return Response({"error": "grantStudentRole function not found on contract."}, status=400)
 
-        tx_hash = contract.functions.grantStudentRole(Web3.to_checksum_address(payload.address)).transact({'from': issuer_address})
-
-        # Wait for the transaction to be mined
-        receipt = manager.web3.eth.wait_for_transaction_receipt(tx_hash)
-
-        if receipt.status == 0:
-            # The transaction failed
-            return Response({"error": "Transaction to grant student role failed."}, status=400)
-
-        return {"success": True, "tx_hash": tx_hash.hex()}
+        # Sent and tracked by the Celery worker; progress at GET /tx/{job_id}
+        job = enqueue_transaction(
+            "grant_student_role", address=Web3.to_checksum_address(payload.address), sender=issuer_address
+        )
+        return {"success": True, "job_id": str(job.id), "status": job.status, "tx_hash": job.tx_hash or None}
     except Exception as e:
         return Response({"error": str(e)}, status=400)
 
@@ -717,58 +780,64 @@ def grant_student_role(request, payload: StudentRoleRequest):
 def revoke_student_role(request, payload: StudentRoleRequest):
     """Revokes the STUDENT_ROLE from a given address. Must be called by an account with ISSUER_ROLE."""
     try:
-        manager.connect_web3('http://ganache:8545')
-        manager.load_abi()
-        manager.load_address()
-        manager.update_contract()
-        contract = manager.contract
+        manager.refresh()
+        contract = manager.get_contract()
         if not contract:
             raise Exception("Contract not loaded")
 
         issuer_address = manager.web3.eth.accounts[0]
-        tx_hash = contract.functions.revokeStudentRole(Web3.to_checksum_address(payload.address)).transact({'from': issuer_address})
+        tx_hash = get_fee_oracle(manager.web3).transact(
+            contract.functions.revokeStudentRole(Web3.to_checksum_address(payload.address)), {'from': issuer_address}
+        )
 
         return {"success": True, "tx_hash": tx_hash.hex()}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+# Registered before /check_roles/{address}, which would otherwise match "bulk".
+@router.post("/check_roles/bulk", response={200: BulkRolesResponse, 400: ErrorResponse})
+def check_roles_bulk(request, data: BulkRolesRequest):
+    """Roles of many addresses at once, answered with a handful of aggregated eth_calls.
+
+    Addresses that are not valid are listed in ``invalid`` instead of failing the request.
+    """
+    if len(data.addresses) > ROLE_CHECK_MAX_ADDRESSES:
+        return Response({"error": f"At most {ROLE_CHECK_MAX_ADDRESSES} addresses can be checked per request"},
+                        status=400)
+    unknown = [role for role in data.roles if role not in ROLES]
+    if unknown:
+        return Response({"error": f"Unknown roles: {', '.join(unknown)}"}, status=400)
+    manager.refresh()
+    contract = manager.get_contract()
+    if not contract:
+        return Response({"error": "Contract not loaded"}, status=400)
+    valid, invalid = {}, []
+    for address in data.addresses:
+        try:
+            valid[address] = Web3.to_checksum_address(address)
+        except (ValueError, TypeError):
+            invalid.append(address)
+    try:
+        roles = get_role_service(contract).roles_for(list(valid.values()), roles=tuple(data.roles))
+    except Exception as e:
+        return Response({"error": str(e)}, status=400)
+    return BulkRolesResponse(roles={address: roles[checksummed] for address, checksummed in valid.items()},
+                             invalid=invalid)
+
+
 @router.get("/check_roles/{address}", response={200: RolesResponse, 400: ErrorResponse})
 def check_roles(request, address: str):
     """Return all blockchain roles (Admin, Issuer, Student) for a given address."""
     # Optionally, you can verify the signature here if needed
     try:
-        manager.connect_web3('http://ganache:8545')
-        manager.load_abi()
-        manager.load_address()
-        manager.update_contract()
-        contract = manager.contract
+        manager.refresh()
+        contract = manager.get_contract()
         if not contract:
             return Response({"error": "Contract not loaded"}, status=400)
-        roles = []
-        # The DEFAULT_ADMIN_ROLE in OpenZeppelin's AccessControl is bytes32(0)
-        DEFAULT_ADMIN_ROLE = b'\x00' * 32
-        # Check Admin
-        try:
-            if contract.functions.hasRole(DEFAULT_ADMIN_ROLE, Web3.to_checksum_address(address)).call():
-                roles.append('Admin')
-        except Exception:
-            pass # Ignore if role check fails
-        # Check Issuer
-        try:
-            issuer_role_hash = Web3.keccak(text='ISSUER_ROLE')
-            if contract.functions.hasRole(issuer_role_hash, Web3.to_checksum_address(address)).call():
-                roles.append('Issuer')
-        except Exception:
-            pass # Ignore if role check fails
-        # Check Student (if implemented)
-        try:
-            student_role_hash = Web3.keccak(text='STUDENT_ROLE')
-            if contract.functions.hasRole(student_role_hash, Web3.to_checksum_address(address)).call():
-                roles.append('Student')
-        except Exception:
-            pass
-        return {"roles": roles}
+        # The three hasRole checks go out in one round trip; a failed check counts as "not granted".
+        roles = get_role_service(contract).roles_for([Web3.to_checksum_address(address)])
+        return {"roles": next(iter(roles.values()))}
     except Exception as e:
         return Response({"error": str(e)}, status=400)
 
@@ -777,19 +846,12 @@ def check_roles(request, address: str):
 def verify_certificate(request, cert_hash: str):
     contract = manager.get_contract()
     try:
-        # Convert cert_hash to bytes32 if needed
-        if cert_hash.startswith('0x'):
-            cert_hash_bytes = bytes.fromhex(cert_hash[2:])
-        else:
-            cert_hash_bytes = bytes.fromhex(cert_hash)
-        # Try to get the certificate from the blockchain
-        cert_data = contract.functions.getCertificate(cert_hash_bytes).call()
-        # cert_data: (issuer, student, timestamp, isRevoked, ipfsCid)
-        if len(cert_data) == 5:
-            issuer, student, timestamp, is_revoked, ipfs_hash = cert_data
-        else:
-            issuer, student, timestamp, is_revoked = cert_data
-            ipfs_hash = ""
+        # Certificates are served from the read-through cache; only misses reach the node
+        cert = get_certificate_cache().lookup(cert_hash, contract)
+        if cert is None:
+            raise Exception("Certificate does not exist")
+        issuer, student, timestamp = cert["issuer"], cert["student"], cert["issued_at"]
+        is_revoked, ipfs_hash = cert["is_revoked"], cert["ipfs_hash"]
         # If the certificate is not revoked and has an IPFS hash, return details
         return {
             "hash": cert_hash,
@@ -802,10 +864,11 @@ def verify_certificate(request, cert_hash: str):
     except Exception as e:
         return {"error": f"Certificate not found or error: {str(e)}"}
 
-@router.post("/register_onchain/", response=CertificateOut)
+@router.post("/register_onchain/", response=QueuedCertificateOut)
 def register_certificate_onchain(request, cert_hash: str, recipient: str, metadata: str = "", ipfs_cid: str = ""):
     """
     Register a certificate hash on-chain, with optional IPFS CID.
+    The transaction is queued; gas_used is reported at GET /tx/{job_id}.
     """
     contract = manager.get_contract()
     if contract is None:
@@ -818,119 +881,125 @@ def register_certificate_onchain(request, cert_hash: str, recipient: str, metada
         # Use the first account from the connected web3 instance as the issuer
         issuer = manager.web3.eth.accounts[0]
 
-        tx = contract.functions.registerCertificate(
-            Web3.toBytes(hexstr=cert_hash),
-            Web3.to_checksum_address(recipient),
-            metadata,
-            storage_mode_enum,
-            pdf_on_chain,
-            ipfs_cid
-        ).transact({"from": issuer})
-
-        receipt = manager.web3.eth.wait_for_transaction_receipt(tx)
+        try:
+            existing = get_certificate_cache().lookup(cert_hash, contract)
+        except ValueError as e:
+            raise HttpError(400, str(e)) from e
+        if existing is not None:
+            raise HttpError(409, "Certificate already exists for this hash.")
+
+        job = enqueue_transaction(
+            "register_certificate",
+            cert_hash=cert_hash,
+            student=Web3.to_checksum_address(recipient),
+            metadata=metadata,
+            storage_mode=storage_mode_enum,
+            pdf_on_chain=pdf_on_chain.hex(),
+            ipfs_hash=ipfs_cid,
+            sender=issuer,
+        )
 
-        return CertificateOut(
+        return QueuedCertificateOut(
             cert_hash=cert_hash,
             issuer=issuer,
             student=recipient,
             issued_at=int(datetime.datetime.now().timestamp()),
             ipfs_cid=ipfs_cid,
             role="Issuer",
-            gas_used=receipt.gasUsed
+            gas_used=None,
+            job_id=str(job.id),
+            status=job.status,
         )
+    except HttpError:
+        raise
     except Exception as e:
         raise HttpError(500, f"Error registering certificate on-chain: {e}")
 
+@router.post("/register_batch/", response={200: BatchRegisterResponse, 400: ErrorResponse})
+def register_certificates_batch(request, data: BatchRegisterRequest):
+    """
+    Queue many off-chain (IPFS) certificates for registration, in gas-limit-sized
+    registerCertificatesBatch transactions sent by the Celery worker. Returns the
+    job of each item; GET /register_batch/{job_id} reports the per-item outcome.
+    """
+    if len(data.certificates) > CERTIFICATE_BATCH_MAX_REQUEST:
+        return Response({"error": f"At most {CERTIFICATE_BATCH_MAX_REQUEST} certificates can be registered per request"},
+                        status=400)
+    manager.refresh()
+    contract = manager.get_contract()
+    if contract is None:
+        raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
+    issuer = manager.web3.eth.accounts[0]
+    try:
+        registrar = BatchRegistrar(contract, issuer)
+    except UnsupportedContractError as e:
+        raise HttpError(501, str(e)) from e
+    results = registrar.register([
+        {"cert_hash": item.cert_hash, "student": item.student_address, "metadata": item.metadata, "ipfs_cid": item.ipfs_cid}
+        for item in data.certificates
+    ])
+    queued = sum(1 for result in results if result["job_id"])
+    return BatchRegisterResponse(
+        queued=queued,
+        failed=len(results) - queued,
+        jobs=list(dict.fromkeys(result["job_id"] for result in results if result["job_id"])),
+        results=results,
+    )
+
+@router.get("/register_batch/{job_id}", response={200: BatchJobResponse, 404: ErrorResponse})
+def register_certificates_batch_status(request, job_id: str):
+    """Status of one job queued by /register_batch/ and the outcome of each of its certificates."""
+    try:
+        job = TransactionJob.objects.filter(
+            pk=uuid.UUID(job_id), kind="register_certificates_batch"
+        ).first()
+    except ValueError:
+        job = None
+    if job is None:
+        return Response({"error": f"Batch registration job {job_id} not found."}, status=404)
+    manager.refresh()
+    contract = manager.get_contract()
+    if contract is None:
+        raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
+    payload = job_payload(job)
+    return BatchJobResponse(
+        job_id=payload["job_id"],
+        status=payload["status"],
+        tx_hash=payload["tx_hash"],
+        block_number=payload["block_number"],
+        gas_used=payload["gas_used"],
+        error=payload["error"],
+        results=batch_job_results(job, contract),
+    )
+
 @router.get("/list_certificates_by_issuer/", response=CertificateListResponse)
-def list_certificates_by_issuer(request, issuer_address: str):
+def list_certificates_by_issuer(request, issuer_address: str, cursor: Optional[str] = None,
+                                limit: Optional[int] = None, direction: str = "asc"):
     """List all certificates issued by the connected issuer account."""
-    certs = []
     try:
         manager.refresh()
         contract = manager.get_contract()
         if contract is None:
             raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
-        events = contract.events.CertificateRegistered().get_logs(fromBlock=0)
-        for event in events:
-            # Only include certificates where the issuer matches the connected account
-            if event.args.issuer.lower() == issuer_address.lower():
-                cert_hash = event.args.diplomaId.hex()
-                issuer = getattr(event.args, 'issuer', None)
-                recipient = getattr(event.args, 'student', None)
-                ipfs_hash = getattr(event.args, 'ipfsHash', None)
-                metadata = ipfs_hash  # For compatibility with frontend/table
-                content = None
-                block_number = getattr(event, 'blockNumber', None)
-                transaction_hash = event.transactionHash.hex() if hasattr(event, 'transactionHash') else None
-                log_index = getattr(event, 'logIndex', None)
-                gas_used = None
-                if transaction_hash:
-                    try:
-                        receipt = manager.web3.eth.get_transaction_receipt(transaction_hash)
-                        gas_used = receipt['gasUsed']
-                    except Exception:
-                        gas_used = None
-                certs.append({
-                    "cert_hash": cert_hash,
-                    "issuer": issuer,
-                    "recipient": recipient,
-                    "recipient_address": recipient,
-                    "metadata": metadata,
-                    "content": content,
-                    "ipfs_hash": ipfs_hash,
-                    "block_number": block_number,
-                    "transaction_hash": transaction_hash,
-                    "log_index": log_index,
-                    "gas_used": gas_used,
-                })
-        return CertificateListResponse(certificates=certs)
+        return certificate_list_response(issuer=issuer_address, cursor=cursor, limit=limit, direction=direction)
+    except HttpError:
+        raise
     except Exception as e:
         print(f"Error fetching certificates for issuer {issuer_address}: {e}")
         raise HttpError(500, f"Failed to list certificates: {str(e)}") from e
 
 @router.get("/list_certificates_by_student/", response=CertificateListResponse)
-def list_certificates_by_student(request, student_address: str):
+def list_certificates_by_student(request, student_address: str, cursor: Optional[str] = None,
+                                 limit: Optional[int] = None, direction: str = "asc"):
     """List all certificates for the connected student account."""
-    certs = []
     try:
         manager.refresh()
         contract = manager.get_contract()
         if contract is None:
             raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
-        events = contract.events.CertificateRegistered().get_logs(fromBlock=0)
-        for event in events:
-            # Only include certificates where the recipient matches the connected account
-            if event.args.student.lower() == student_address.lower():
-                cert_hash = event.args.diplomaId.hex()
-                issuer = getattr(event.args, 'issuer', None)
-                recipient = getattr(event.args, 'student', None)
-                ipfs_hash = getattr(event.args, 'ipfsHash', None)
-                metadata = ipfs_hash  # For compatibility with frontend/table
-                content = None
-                block_number = getattr(event, 'blockNumber', None)
-                transaction_hash = event.transactionHash.hex() if hasattr(event, 'transactionHash') else None
-                log_index = getattr(event, 'logIndex', None)
-                gas_used = None
-                if transaction_hash:
-                    try:
-                        receipt = manager.web3.eth.get_transaction_receipt(transaction_hash)
-                        gas_used = receipt['gasUsed']
-                    except Exception:
-                        gas_used = None
-                certs.append({
-                    "cert_hash": cert_hash,
-                    "issuer": issuer,
-                    "recipient": recipient,
-                    "recipient_address": recipient,
-                    "metadata": metadata,
-                    "content": content,
-                    "ipfs_hash": ipfs_hash,
-                    "block_number": block_number,
-                    "transaction_hash": transaction_hash,
-                    "log_index": log_index,
-                    "gas_used": gas_used,
-                })
-        return CertificateListResponse(certificates=certs)
+        return certificate_list_response(student=student_address, cursor=cursor, limit=limit, direction=direction)
+    except HttpError:
+        raise
     except Exception as e:
         print(f"Error fetching certificates for {student_address}: {e}")
         raise HttpError(500, f"Failed to list certificates: {str(e)}") from e
@@ -940,19 +1009,12 @@ def validate_certificate(request, cert_hash: str):
     """Validate a certificate by its hash. Returns certificate details if valid."""
     contract = manager.get_contract()
     try:
-        # Convert cert_hash to bytes32 if needed
-        if cert_hash.startswith('0x'):
-            cert_hash_bytes = bytes.fromhex(cert_hash[2:])
-        else:
-            cert_hash_bytes = bytes.fromhex(cert_hash)
-        # Try to get the certificate from the blockchain
-        cert_data = contract.functions.getCertificate(cert_hash_bytes).call()
-        # cert_data: (issuer, student, timestamp, isRevoked, ipfsCid)
-        if len(cert_data) == 5:
-            issuer, student, timestamp, is_revoked, ipfs_hash = cert_data
-        else:
-            issuer, student, timestamp, is_revoked = cert_data
-            ipfs_hash = ""
+        # Certificates are served from the read-through cache; only misses reach the node
+        cert = get_certificate_cache().lookup(cert_hash, contract)
+        if cert is None:
+            raise Exception("Certificate does not exist")
+        issuer, student, timestamp = cert["issuer"], cert["student"], cert["issued_at"]
+        is_revoked, ipfs_hash = cert["is_revoked"], cert["ipfs_hash"]
         # If the certificate is not revoked and has an IPFS hash, return details
         if not is_revoked and ipfs_hash:
             return CertificateOut(
@@ -1005,8 +1067,7 @@ def register_certificate(request, payload: RegisterCertificateSchema):
         if storage_mode == "ON_CHAIN":
             pdf_on_chain = pdf_bytes
         elif storage_mode == "OFF_CHAIN":
-            import ipfshttpclient
-            with ipfshttpclient.connect(IPFS_API_URL) as client:
+            with ipfs_connect(IPFS_API_URL) as client:
                 res = client.add_bytes(pdf_bytes)
                 ipfs_hash = res
         else:
@@ -1019,51 +1080,37 @@ def register_certificate(request, payload: RegisterCertificateSchema):
             if not contract:
                 raise HttpError(500, f"Contract not loaded: {manager.get_error()}")
 
-            tx_params = {
-                "from": issuer,
-                "gas": 25000000,  # Set gas limit close to the block gas limit
-            }
-
-            tx = contract.functions.registerCertificate(
-                Web3.to_bytes(hexstr=cert_hash),
-                Web3.to_checksum_address(recipient),
-                metadata,
-                0 if storage_mode == "ON_CHAIN" else 1,
-                pdf_on_chain,
-                ipfs_hash
-            ).transact(tx_params)
-            receipt = manager.web3.eth.wait_for_transaction_receipt(tx)
-            logging.info(f"Certificate registered: cert_hash={cert_hash}, tx_hash={tx.hex()}")
-
-            # Verify certificate is stored on-chain
-            verification_status = "Verification not performed"
-            if receipt.status == 1:
-                try:
-                    cert_hash_bytes = Web3.to_bytes(hexstr=cert_hash)
-                    cert_data = contract.functions.verifyCertificate(cert_hash_bytes).call()
-                    exists = cert_data[0]
-                    if exists:
-                        verification_status = "Certificate found on-chain."
-                        logging.info(f"Certificate verification success: cert_hash={cert_hash}, cert_data={cert_data}")
-                    else:
-                        verification_status = "Certificate NOT found on-chain after transaction."
-                        logging.error(f"Certificate verification failed: cert_hash={cert_hash} not found after tx.")
-                except Exception as verify_exc:
-                    logging.error(f"Certificate verification failed after tx: {verify_exc}")
-                    verification_status = f"Certificate verification failed with error: {verify_exc}"
-            else:
-                verification_status = "Transaction failed, certificate not registered."
-                logging.error(f"Transaction failed for cert_hash={cert_hash}, tx_hash={tx.hex()}")
+            # cert_hash is the keccak of the upload, so it is always a valid 32-byte hash.
+            if get_certificate_cache().lookup(cert_hash, contract) is not None:
+                raise HttpError(409, "Certificate already exists for this hash.")
+
+            job = enqueue_transaction(
+                "register_certificate",
+                cert_hash=cert_hash,
+                student=Web3.to_checksum_address(recipient),
+                metadata=metadata,
+                storage_mode=0 if storage_mode == "ON_CHAIN" else 1,
+                pdf_on_chain=pdf_on_chain.hex(),
+                ipfs_hash=ipfs_hash,
+                sender=issuer,
+            )
+            logging.info(f"Certificate registration queued: cert_hash={cert_hash}, job_id={job.id}")
 
             return CertificateResponse(
                 ipfs_hash=ipfs_hash,
                 cert_hash=cert_hash,
-                tx_hash=tx.hex(),
-                message=verification_status,
+                tx_hash=job.tx_hash or None,
+                message=f"Registration queued; follow it at /tx/{job.id}",
+                job_id=str(job.id),
+                status=job.status,
             )
+        except HttpError:
+            raise
         except Exception as e:
             logging.error(f"Blockchain registration failed: {str(e)}")
             raise HttpError(500, f"Blockchain registration failed: {str(e)}") from e
+    except HttpError:
+        raise
     except Exception as e:
         logging.error(f"Error in register_certificate: {str(e)}")
         raise HttpError(422, f"Unprocessable Entity: {str(e)}")
@@ -0,0 +1,169 @@
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from hexbytes import HexBytes
+from web3 import Web3
+from web3._utils.request import make_post_request
+
+from app.api.smartcontract.instrumentation import (
+    count_batched_calls,
+    in_current_context,
+)
+
+logger = logging.getLogger(__name__)
+
+RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", "100"))
+RPC_BATCH_WORKERS = int(os.getenv("RPC_BATCH_WORKERS", "1"))
+
+RECEIPT_INT_FIELDS = (
+    "blockNumber",
+    "cumulativeGasUsed",
+    "effectiveGasPrice",
+    "gasUsed",
+    "status",
+    "transactionIndex",
+    "type",
+)
+
+_request_ids = itertools.count(1)
+
+
+def chunked(items, size):
+    items = list(items)
+    for start in range(0, len(items), max(1, size)):
+        yield items[start : start + size]
+
+
+def to_hex_hash(value):
+    """0x-prefixed hex for a transaction/block hash given as bytes or str."""
+    if isinstance(value, str):
+        return value if value.startswith("0x") else "0x" + value
+    return Web3.to_hex(HexBytes(value))
+
+
+def hex_to_int(value):
+    """Raw JSON-RPC quantities are hex strings; tolerate nodes that already return ints."""
+    return int(value, 16) if isinstance(value, str) else value
+
+
+def _send_batch(provider, calls):
+    payload = [
+        {"jsonrpc": "2.0", "id": next(_request_ids), "method": method, "params": params}
+        for method, params in calls
+    ]
+    endpoint_uri = getattr(provider, "endpoint_uri", None)
+    if endpoint_uri is None:
+        # Non-HTTP providers (IPC, tester) cannot batch; keep the same raw response shape.
+        return [provider.make_request(method, params) for method, params in calls]
+
+    count_batched_calls(provider, calls)
+    data = json.dumps(payload).encode("utf-8")
+    if hasattr(provider, "post"):
+        # PooledHTTPProvider: reuse its shared session and retry policy.
+        raw = provider.post(data)
+    else:
+        raw = make_post_request(endpoint_uri, data, **provider.get_request_kwargs())
+    responses = json.loads(raw)
+    if not isinstance(responses, list):
+        # Some nodes answer a batch with a single error object (batching disabled).
+        logger.warning(
+            f"JSON-RPC batch rejected by {endpoint_uri}: {responses}; falling back to single requests"
+        )
+        return [provider.make_request(method, params) for method, params in calls]
+    by_id = {response.get("id"): response for response in responses}
+    return [
+        by_id.get(request["id"], {"error": {"message": "missing response"}})
+        for request in payload
+    ]
+
+
+def batch_request(
+    web3,
+    calls,
+    batch_size=RPC_BATCH_SIZE,
+    max_workers=RPC_BATCH_WORKERS,
+    with_errors=False,
+):
+    """Send (method, params) calls as JSON-RPC batches of ``batch_size``.
+
+    Returns the raw (unformatted) result of every call in call order, with None
+    for calls the node answered with an error or a null result. With
+    ``with_errors`` every entry is a (result, error) pair instead, ``error``
+    being the node's error object or None.
+    """
+    calls = list(calls)
+    if not calls:
+        return []
+    batches = list(chunked(calls, batch_size))
+    if max_workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            responses = list(
+                executor.map(
+                    in_current_context(lambda batch: _send_batch(web3.provider, batch)),
+                    batches,
+                )
+            )
+    else:
+        responses = [_send_batch(web3.provider, batch) for batch in batches]
+
+    results = []
+    for (method, params), response in zip(
+        calls, itertools.chain.from_iterable(responses), strict=True
+    ):
+        if "error" in response:
+            if not with_errors:
+                logger.warning(f"JSON-RPC {method}{params} failed: {response['error']}")
+            results.append((None, response["error"]) if with_errors else None)
+        else:
+            results.append(
+                (response.get("result"), None)
+                if with_errors
+                else response.get("result")
+            )
+    return results
+
+
+def _format_receipt(receipt):
+    formatted = dict(receipt)
+    for field in RECEIPT_INT_FIELDS:
+        if field in formatted:
+            formatted[field] = hex_to_int(formatted[field])
+    return formatted
+
+
+def fetch_receipts(
+    web3, tx_hashes, batch_size=RPC_BATCH_SIZE, max_workers=RPC_BATCH_WORKERS
+):
+    """Fetch transaction receipts in JSON-RPC batches.
+
+    Returns a dict keyed by the given hashes; receipts that are missing or failed
+    to load are left out. Integer fields such as ``gasUsed`` are decoded.
+    """
+    tx_hashes = list(dict.fromkeys(h for h in tx_hashes if h))
+    results = batch_request(
+        web3,
+        [
+            ("eth_getTransactionReceipt", [to_hex_hash(tx_hash)])
+            for tx_hash in tx_hashes
+        ],
+        batch_size=batch_size,
+        max_workers=max_workers,
+    )
+    return {
+        tx_hash: _format_receipt(receipt)
+        for tx_hash, receipt in zip(tx_hashes, results, strict=True)
+        if receipt
+    }
+
+
+def gas_used_by_tx(web3, tx_hashes, **kwargs):
+    """``gasUsed`` per transaction hash; an unreachable node yields an empty dict."""
+    try:
+        receipts = fetch_receipts(web3, tx_hashes, **kwargs)
+    except Exception as e:
+        logger.warning(f"Batched receipt fetch failed: {e}")
+        return {}
+    return {tx_hash: receipt.get("gasUsed") for tx_hash, receipt in receipts.items()}
@@ -0,0 +1,319 @@
+import logging
+import os
+
+from django.utils import timezone
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from app.api.smartcontract.contract_manager import ContractManager
+from app.api.smartcontract.fees import get_fee_oracle
+from app.api.smartcontract.nonces import get_nonce_manager
+from app.api.smartcontract.providers import get_web3
+from app.models import TransactionJob
+
+logger = logging.getLogger(__name__)
+
+TX_JOB_POLL_INTERVAL = float(os.getenv("TX_JOB_POLL_INTERVAL", "2"))
+TX_JOB_RECEIPT_WAIT = float(os.getenv("TX_JOB_RECEIPT_WAIT", "10"))
+TX_JOB_TIMEOUT = float(os.getenv("TX_JOB_TIMEOUT", "600"))
+# A job still SUBMITTING after this long lost its worker and is reconciled by the watcher.
+TX_JOB_SUBMIT_TIMEOUT = float(os.getenv("TX_JOB_SUBMIT_TIMEOUT", "300"))
+
+# Job kind -> function(params) returning (web3, tx_hash). Each one sends a single transaction.
+SUBMITTERS = {}
+
+
+def submitter(kind):
+    def register(fn):
+        SUBMITTERS[kind] = fn
+        return fn
+
+    return register
+
+
+def _contract():
+    manager = ContractManager()
+    manager.refresh()
+    contract = manager.get_contract()
+    if contract is None:
+        raise RuntimeError(f"Contract not loaded: {manager.get_error()}")
+    return manager.web3, contract
+
+
+@submitter("register_certificate")
+def _register_certificate(params):
+    web3, contract = _contract()
+    tx_params = {"from": params.get("sender") or web3.eth.accounts[0]}
+    if params.get("gas"):
+        tx_params["gas"] = params["gas"]
+    tx_hash = get_fee_oracle(web3).transact(
+        contract.functions.registerCertificate(
+            Web3.to_bytes(hexstr=params["cert_hash"]),
+            Web3.to_checksum_address(params["student"]),
+            params.get("metadata", ""),
+            params.get("storage_mode", 1),
+            bytes.fromhex(params.get("pdf_on_chain", "")),
+            params.get("ipfs_hash", ""),
+        ),
+        tx_params,
+    )
+    return web3, tx_hash
+
+
+@submitter("grant_student_role")
+def _grant_student_role(params):
+    web3, contract = _contract()
+    sender = params.get("sender") or web3.eth.accounts[0]
+    tx_hash = get_fee_oracle(web3).transact(
+        contract.functions.grantStudentRole(
+            Web3.to_checksum_address(params["address"])
+        ),
+        {"from": sender},
+    )
+    return web3, tx_hash
+
+
+@submitter("register_certificates_batch")
+def _register_certificates_batch(params):
+    from app.api.smartcontract.batch_registration import batch_call
+
+    web3, contract = _contract()
+    require_functions(contract, "registerCertificatesBatch")
+    tx_params = {"from": params.get("sender") or web3.eth.accounts[0]}
+    if params.get("gas"):
+        tx_params["gas"] = params["gas"]
+    return web3, get_fee_oracle(web3).transact(
+        batch_call(contract, params["certificates"]), tx_params
+    )
+
+
+class UnsupportedContractError(RuntimeError):
+    """The deployed contract's ABI lacks a function the feature needs (endpoints answer 501)."""
+
+
+def require_functions(contract, *functions):
+    missing = [name for name in functions if not hasattr(contract.functions, name)]
+    if missing:
+        raise UnsupportedContractError(
+            f"{', '.join(missing)} not in the deployed contract ABI; recompile and redeploy CertificateRegistry"
+        )
+
+
+@submitter("anchor_merkle_root")
+def _anchor_merkle_root(params):
+    web3, contract = _contract()
+    require_functions(contract, "anchorMerkleRoot")
+    sender = params.get("sender") or web3.eth.accounts[0]
+    tx_hash = get_fee_oracle(web3).transact(
+        contract.functions.anchorMerkleRoot(
+            Web3.to_bytes(hexstr=params["root"]), int(params["leaf_count"])
+        ),
+        {"from": sender},
+    )
+    return web3, tx_hash
+
+
+@submitter("revoke_anchored_certificate")
+def _revoke_anchored_certificate(params):
+    web3, contract = _contract()
+    require_functions(contract, "revokeAnchoredCertificate")
+    sender = params.get("sender") or web3.eth.accounts[0]
+    tx_hash = get_fee_oracle(web3).transact(
+        contract.functions.revokeAnchoredCertificate(
+            Web3.to_bytes(hexstr=params["root"]),
+            Web3.to_bytes(hexstr=params["cert_hash"]),
+            Web3.to_checksum_address(params["student"]),
+            [Web3.to_bytes(hexstr=sibling) for sibling in params["proof"]],
+        ),
+        {"from": sender},
+    )
+    return web3, tx_hash
+
+
+def _fixed_fees(params):
+    # Jobs queued with an explicit gas_price keep it; the others are priced by the fee oracle when sent.
+    return {"gasPrice": int(params["gas_price"])} if params.get("gas_price") else {}
+
+
+def _funder(web3):
+    from app.api.wallet.router import get_ganache_funder
+
+    _, funder_private_key = get_ganache_funder(web3)
+    if not funder_private_key:
+        raise RuntimeError(
+            "Funder private key not found. Set GANACHE_FUNDER_PRIVATE_KEY or provide a valid accounts.json."
+        )
+    return web3.eth.account.from_key(funder_private_key)
+
+
+@submitter("fund_account")
+def _fund_account(params):
+    web3 = get_web3(params["rpc_url"])
+    tx = get_fee_oracle(web3).prepare(
+        {
+            "to": Web3.to_checksum_address(params["address"]),
+            "value": int(params["value"]),
+            **_fixed_fees(params),
+        }
+    )
+    return web3, get_nonce_manager(web3).send(_funder(web3), tx)
+
+
+@submitter("wallet_role")
+def _wallet_role(params):
+    from app.api.wallet.provisioning import ROLE_GRANTS
+    from app.api.wallet.router import get_certificate_registry_contract
+
+    web3 = get_web3(params["rpc_url"])
+    funder = _funder(web3)
+    abi, contract_address = get_certificate_registry_contract()
+    contract = web3.eth.contract(
+        address=Web3.to_checksum_address(contract_address), abi=abi
+    )
+    address = Web3.to_checksum_address(params["address"])
+    # The same single-wallet grant as provisioning: grantRole(ISSUER_ROLE, ...) or grantStudentRole.
+    _, single_grant = ROLE_GRANTS[params["role"]]
+    function = single_grant(contract, address)
+    nonces = get_nonce_manager(web3)
+    tx = get_fee_oracle(web3).build_transaction(
+        function,
+        {
+            "from": funder.address,
+            "nonce": nonces.allocate(funder.address),
+            **_fixed_fees(params),
+        },
+    )
+    return web3, nonces.send(funder, tx)
+
+
+def job_web3(job):
+    """The Web3 the job's transaction was sent through."""
+    if job.params.get("rpc_url"):
+        return get_web3(job.params["rpc_url"])
+    return ContractManager().connect_web3()
+
+
+def record_receipt(job, receipt):
+    """Store the outcome of a SUBMITTED job's mined transaction; False if someone else already did."""
+    reverted = receipt.get("status", 1) != 1
+    fields = {
+        "status": TransactionJob.FAILED if reverted else TransactionJob.CONFIRMED,
+        "error": "Transaction reverted" if reverted else "",
+        "block_number": receipt["blockNumber"],
+        "gas_used": receipt["gasUsed"],
+        "updated_at": timezone.now(),
+    }
+    updated = TransactionJob.objects.filter(
+        pk=job.pk, status=TransactionJob.SUBMITTED
+    ).update(**fields)
+    if updated:
+        for name, value in fields.items():
+            setattr(job, name, value)
+        logger.info(
+            f"Transaction job {job.id} ({job.kind}) {job.status} in block {job.block_number}"
+        )
+    return bool(updated)
+
+
+def fail_job(job, error, status=TransactionJob.SUBMITTED):
+    """Mark the job failed unless it already moved on from ``status``."""
+    return bool(
+        TransactionJob.objects.filter(pk=job.pk, status=status).update(
+            status=TransactionJob.FAILED, error=error, updated_at=timezone.now()
+        )
+    )
+
+
+def check_receipt(job):
+    """Look the receipt of a SUBMITTED job up once, without waiting; records it when mined."""
+    try:
+        receipt = job_web3(job).eth.get_transaction_receipt(job.tx_hash)
+    except TransactionNotFound:
+        return False
+    return record_receipt(job, receipt)
+
+
+def reconcile_submitting_job(job):
+    """Settle a job left SUBMITTING by a worker that died around the broadcast.
+
+    The submit task records sender, nonce and (for locally signed
+    transactions) the hash right before broadcasting, so the chain can tell
+    what happened: a transaction the node knows moves the job to SUBMITTED; a
+    job that never got that far, or whose transaction the node does not
+    know, is queued again. A node-signed transaction has no hash to look up:
+    if its nonce is used the job is failed rather than sent twice. Returns
+    the job's new status, or None if it changed meanwhile.
+    """
+    from app.tasks import submit_transaction_job
+
+    stale = TransactionJob.objects.filter(
+        pk=job.pk, status=TransactionJob.SUBMITTING, updated_at=job.updated_at
+    )
+    web3 = job_web3(job)
+    if job.tx_hash:
+        try:
+            web3.eth.get_transaction(job.tx_hash)
+        except TransactionNotFound:
+            pass
+        else:
+            if not stale.update(
+                status=TransactionJob.SUBMITTED, updated_at=timezone.now()
+            ):
+                return None
+            return TransactionJob.SUBMITTED
+    elif job.nonce is not None:
+        sent = web3.eth.get_transaction_count(job.sender, "pending")
+        if sent > job.nonce:
+            error = (
+                f"Worker lost after sending from {job.sender} at nonce {job.nonce}; "
+                "the transaction hash is unknown, check the chain before queuing it again"
+            )
+            if not stale.update(
+                status=TransactionJob.FAILED, error=error, updated_at=timezone.now()
+            ):
+                return None
+            return TransactionJob.FAILED
+    if not stale.update(
+        status=TransactionJob.QUEUED,
+        tx_hash="",
+        sender="",
+        nonce=None,
+        updated_at=timezone.now(),
+    ):
+        return None
+    submit_transaction_job.delay(str(job.id))
+    return TransactionJob.QUEUED
+
+
+def enqueue_transaction(kind, **params):
+    """Create a TransactionJob and hand it to the Celery worker; returns the job."""
+    from app.tasks import submit_transaction_job
+
+    if kind not in SUBMITTERS:
+        raise ValueError(f"Unknown transaction job kind: {kind}")
+    job = TransactionJob.objects.create(kind=kind, params=params)
+    try:
+        submit_transaction_job.delay(str(job.id))
+    except Exception as e:
+        # Broker down: the job would never run, so do not leave it queued.
+        logger.error(f"Could not queue transaction job {job.id}: {e}")
+        TransactionJob.objects.filter(pk=job.pk).update(
+            status=TransactionJob.FAILED, error=f"Could not queue job: {e}"
+        )
+        raise
+    job.refresh_from_db()
+    return job
+
+
+def job_payload(job):
+    return {
+        "job_id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "tx_hash": job.tx_hash or None,
+        "block_number": job.block_number,
+        "gas_used": job.gas_used,
+        "error": job.error or None,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+    }
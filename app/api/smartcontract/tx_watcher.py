@@ -0,0 +1,184 @@
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from app.api.smartcontract import tx_jobs
+from app.api.smartcontract.providers import get_default_web3, get_web3
+from app.api.smartcontract.rpc_batch import batch_request, fetch_receipts, to_hex_hash
+from app.models import Transaction, TransactionJob
+
+logger = logging.getLogger(__name__)
+
+TX_WATCH_POLL_INTERVAL = float(os.getenv("TX_WATCH_POLL_INTERVAL", "2"))
+TX_WATCH_DROP_TIMEOUT = float(os.getenv("TX_WATCH_DROP_TIMEOUT", "900"))
+TX_WATCH_MAX_PENDING = int(os.getenv("TX_WATCH_MAX_PENDING", "5000"))
+
+
+class TransactionWatcher:
+    """Finalises pending Transaction rows from their receipts.
+
+    A single poller for every pending row: each node that has pending
+    transactions is asked for its head, and when it has a new block the
+    receipts of all its pending hashes are fetched in JSON-RPC batches. Rows
+    are bulk-updated to confirmed / failed with block number and gas used.
+    A row still without receipt after ``drop_timeout`` seconds is marked
+    dropped once the node no longer knows the transaction either.
+
+    Transaction jobs are swept the same way: SUBMITTED jobs are finalised
+    from batched receipts (failed after TX_JOB_TIMEOUT), and jobs left
+    SUBMITTING for ``submit_timeout`` seconds by a lost worker are reconciled
+    against the chain (see tx_jobs.reconcile_submitting_job).
+    """
+
+    def __init__(
+        self,
+        drop_timeout=TX_WATCH_DROP_TIMEOUT,
+        max_pending=TX_WATCH_MAX_PENDING,
+        submit_timeout=tx_jobs.TX_JOB_SUBMIT_TIMEOUT,
+    ):
+        self.drop_timeout = drop_timeout
+        self.max_pending = max(1, max_pending)
+        self.submit_timeout = submit_timeout
+        self._heads = {}
+        self._job_heads = {}
+
+    @staticmethod
+    def _web3(rpc_url):
+        return get_web3(rpc_url) if rpc_url else get_default_web3()
+
+    def sync_once(self):
+        """Check the pending rows of every node that has a new block. Returns the rows updated, by status."""
+        counts = Counter()
+        pending = Transaction.objects.filter(status=Transaction.PENDING)
+        for rpc_url in pending.order_by().values_list("rpc_url", flat=True).distinct():
+            try:
+                counts.update(self._sync_node(rpc_url))
+            except Exception as e:
+                logger.warning(
+                    f"Transaction watcher could not check {rpc_url or 'the default node'}: {e}"
+                )
+        counts.update(self._reap_submitting())
+        counts.update(self._sync_jobs())
+        return counts
+
+    def _reap_submitting(self):
+        counts = Counter()
+        cutoff = timezone.now() - timedelta(seconds=self.submit_timeout)
+        stale = TransactionJob.objects.filter(
+            status=TransactionJob.SUBMITTING, updated_at__lt=cutoff
+        ).order_by("updated_at")[: self.max_pending]
+        for job in stale:
+            try:
+                status = tx_jobs.reconcile_submitting_job(job)
+            except Exception as e:
+                logger.warning(f"Could not reconcile transaction job {job.id}: {e}")
+                continue
+            if status:
+                logger.warning(
+                    f"Transaction job {job.id} ({job.kind}) was stuck submitting: now {status}"
+                )
+                counts[f"job {status}"] += 1
+        return counts
+
+    def _sync_jobs(self):
+        by_node = defaultdict(list)
+        submitted = TransactionJob.objects.filter(
+            status=TransactionJob.SUBMITTED
+        ).order_by("created_at")[: self.max_pending]
+        for job in submitted:
+            by_node[job.params.get("rpc_url", "")].append(job)
+        counts = Counter()
+        for rpc_url, jobs in by_node.items():
+            try:
+                counts.update(self._sync_node_jobs(rpc_url, jobs))
+            except Exception as e:
+                logger.warning(
+                    f"Transaction watcher could not check jobs on {rpc_url or 'the default node'}: {e}"
+                )
+        return counts
+
+    def _sync_node_jobs(self, rpc_url, jobs):
+        web3 = tx_jobs.job_web3(jobs[0])
+        head = web3.eth.block_number
+        # Skip unless there is a new block, or jobs submitted since the last look at this one.
+        job_ids = {job.id for job in jobs}
+        seen_head, seen_ids = self._job_heads.get(rpc_url, (None, set()))
+        if seen_head == head and job_ids <= seen_ids:
+            return {}
+        receipts = fetch_receipts(web3, [job.tx_hash for job in jobs])
+
+        counts = Counter()
+        now = timezone.now()
+        for job in jobs:
+            receipt = receipts.get(job.tx_hash)
+            if receipt is not None:
+                if tx_jobs.record_receipt(job, receipt):
+                    counts[f"job {job.status}"] += 1
+            elif (now - job.created_at).total_seconds() > tx_jobs.TX_JOB_TIMEOUT:
+                error = f"No receipt within {tx_jobs.TX_JOB_TIMEOUT:.0f}s"
+                if tx_jobs.fail_job(job, error):
+                    counts[f"job {TransactionJob.FAILED}"] += 1
+        self._job_heads[rpc_url] = (head, job_ids)
+        return counts
+
+    def _sync_node(self, rpc_url):
+        web3 = self._web3(rpc_url)
+        head = web3.eth.block_number
+        if self._heads.get(rpc_url) == head:
+            return {}
+        rows = list(
+            Transaction.objects.filter(
+                status=Transaction.PENDING, rpc_url=rpc_url
+            ).order_by("timestamp")[: self.max_pending]
+        )
+        receipts = fetch_receipts(web3, [to_hex_hash(row.tx_hash) for row in rows])
+
+        updated, stale = [], []
+        now = timezone.now()
+        for row in rows:
+            receipt = receipts.get(to_hex_hash(row.tx_hash))
+            if receipt is not None:
+                row.status = (
+                    Transaction.CONFIRMED
+                    if receipt.get("status", 1) == 1
+                    else Transaction.FAILED
+                )
+                row.block_number = receipt["blockNumber"]
+                row.gas_used = receipt["gasUsed"]
+                updated.append(row)
+            elif (now - row.timestamp).total_seconds() > self.drop_timeout:
+                stale.append(row)
+        if stale:
+            # Still waiting in the node's pool means slow, not dropped.
+            known = batch_request(
+                web3,
+                [
+                    ("eth_getTransactionByHash", [to_hex_hash(row.tx_hash)])
+                    for row in stale
+                ],
+            )
+            for row, transaction in zip(stale, known, strict=True):
+                if transaction is None:
+                    row.status = Transaction.DROPPED
+                    updated.append(row)
+
+        Transaction.objects.bulk_update(
+            updated, ["status", "block_number", "gas_used"], batch_size=500
+        )
+        # Only move on once the rows are stored, so a failed update is retried on the same block.
+        self._heads[rpc_url] = head
+        return Counter(row.status for row in updated)
+
+    def run_forever(self, poll_interval=TX_WATCH_POLL_INTERVAL):
+        while True:
+            try:
+                counts = self.sync_once()
+                if counts:
+                    logger.info(f"Transaction watcher updated {dict(counts)}")
+            except Exception as e:
+                logger.error(f"Transaction watcher iteration failed: {e}")
+            time.sleep(poll_interval)
@@ -1,12 +1,14 @@
 from ninja import Router
-from typing import List
+from typing import List, Optional
 
 from app.api.authorization import JWTAuth
 from pydantic import BaseModel
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.conf import settings
+from django.http import HttpResponse
 
 from app.api.smartcontract.contract_manager import ContractManager
+from app.api.smartcontract.queries import check_page_args, list_certificate_page
 
 manager = ContractManager()
 # manager.refresh()
@@ -38,30 +40,32 @@ class StudentTokenResponse(BaseModel):
     "/certificates",
     response={200: List[CertificateDetails], 400: ErrorSchema, 500: ErrorSchema}
 )
-def get_my_certificates(request, student_address: str):
-    contract = manager.get_contract()
+def get_my_certificates(request, response: HttpResponse, student_address: str, cursor: Optional[str] = None,
+                        limit: Optional[int] = None, direction: str = "asc"):
+    """Certificates of a student. With ``limit`` the list is paged and the cursor of
+    the next page is returned in the ``X-Next-Cursor`` header."""
+    try:
+        check_page_args(cursor, limit, direction)
+    except ValueError as e:
+        return 400, {"error": str(e)}
     try:
-        # Use the event logs to get all certificates, then filter by student_address
-        events = contract.events.CertificateRegistered().get_logs(fromBlock=0)
         certificates = []
-        for event in events:
-            cert_hash = event.args.diplomaId.hex()
-            issuer = getattr(event.args, 'issuer', None)
-            student = getattr(event.args, 'student', None)
-            ipfs_hash = getattr(event.args, 'ipfsHash', None)
-            timestamp = getattr(event.args, 'issuedAt', None)
-            is_revoked = False  # You may want to check for revocation events if needed
-            if student and student.lower() == student_address.lower():
-                certificates.append(
-                    CertificateDetails(
-                        hash=cert_hash,
-                        issuer=issuer,
-                        student=student,
-                        timestamp=timestamp if timestamp is not None else 0,
-                        is_revoked=is_revoked,
-                        ipfs_hash=ipfs_hash or ""
-                    )
+        items, next_cursor = list_certificate_page(
+            manager, student=student_address, cursor=cursor, limit=limit, direction=direction, with_gas=False
+        )
+        if next_cursor:
+            response["X-Next-Cursor"] = next_cursor
+        for item in items:
+            certificates.append(
+                CertificateDetails(
+                    hash=item["cert_hash"],
+                    issuer=item["issuer"],
+                    student=item["recipient"],
+                    timestamp=item["issued_at"] if item["issued_at"] is not None else 0,
+                    is_revoked=item["is_revoked"],
+                    ipfs_hash=item["ipfs_hash"] or ""
                 )
+            )
         return certificates
     except Exception as e:
         print(f"Error fetching certificates for {student_address}: {e}")
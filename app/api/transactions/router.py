@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from ninja import Router, Schema
+
+from app.api.smartcontract.tx_jobs import (
+    TX_JOB_POLL_INTERVAL,
+    check_receipt,
+    job_payload,
+)
+from app.models import TransactionJob
+
+TX_JOB_MAX_WAIT = float(os.getenv("TX_JOB_MAX_WAIT", "30"))
+TX_JOB_WAIT_POLL = float(os.getenv("TX_JOB_WAIT_POLL", "0.25"))
+
+logger = logging.getLogger(__name__)
+
+router = Router(tags=["transactions"])
+
+
+class TransactionJobOut(Schema):
+    job_id: str
+    kind: str
+    status: str
+    tx_hash: Optional[str] = None
+    block_number: Optional[int] = None
+    gas_used: Optional[int] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+class ErrorResponse(Schema):
+    error: str
+
+
+def _lookup(job_ref):
+    # A job id, or the hash of the transaction the job sent.
+    try:
+        query = Q(pk=uuid.UUID(job_ref))
+    except ValueError:
+        tx_hash = (
+            job_ref.lower() if job_ref.startswith("0x") else "0x" + job_ref.lower()
+        )
+        query = Q(tx_hash=tx_hash)
+    return TransactionJob.objects.filter(query).order_by("-created_at")
+
+
+@router.get("/{job_ref}", response={200: TransactionJobOut, 404: ErrorResponse})
+async def transaction_status(
+    request, job_ref: str, wait: float = 0, status: Optional[str] = None
+):
+    """Progress of a queued transaction (by job id or tx hash).
+
+    ``wait`` (seconds, at most TX_JOB_MAX_WAIT) long-polls: the answer is sent
+    as soon as the job is final, or reaches ``status`` if given, or the time
+    is up. The event loop is not blocked while waiting. A submitted job's
+    receipt is looked up (every TX_JOB_POLL_INTERVAL at most), so jobs finish
+    here even without a worker tracking them, e.g. when run eagerly.
+    """
+    deadline = time.monotonic() + min(max(wait, 0), TX_JOB_MAX_WAIT)
+    next_check = 0
+    while True:
+        job = await _lookup(job_ref).afirst()
+        if job is None:
+            return 404, {"error": f"Transaction job {job_ref} not found."}
+        if job.status == TransactionJob.SUBMITTED and time.monotonic() >= next_check:
+            next_check = time.monotonic() + TX_JOB_POLL_INTERVAL
+            try:
+                await sync_to_async(check_receipt)(job)
+            except Exception as e:
+                logger.warning(
+                    f"Receipt lookup for transaction job {job.id} failed: {e}"
+                )
+        done = job.status in TransactionJob.FINAL_STATUSES or (
+            status is not None and job.status == status
+        )
+        if done or time.monotonic() >= deadline:
+            return job_payload(job)
+        await asyncio.sleep(TX_JOB_WAIT_POLL)
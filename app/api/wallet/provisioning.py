@@ -0,0 +1,460 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from eth_account import Account as EthAccount
+from mnemonic import Mnemonic
+from web3 import Web3
+
+from app.api.smartcontract.fees import FEE_FIELDS, TRANSFER_GAS, get_fee_oracle
+from app.api.smartcontract.nonces import (
+    get_nonce_manager,
+    is_already_known,
+    is_nonce_error,
+    is_nonce_too_high,
+)
+from app.api.smartcontract.providers import get_web3
+from app.api.smartcontract.rpc_batch import (
+    batch_request,
+    chunked,
+    fetch_receipts,
+    to_hex_hash,
+)
+from app.api.smartcontract.tx_jobs import require_functions
+from app.models import Account, AccountRole, ProvisionedWallet, ProvisioningJob, Wallet
+
+logger = logging.getLogger(__name__)
+
+PROVISION_MAX_WALLETS = int(os.getenv("PROVISION_MAX_WALLETS", "1000"))
+PROVISION_DERIVE_WORKERS = int(os.getenv("PROVISION_DERIVE_WORKERS", "8"))
+PROVISION_ROLE_BATCH_SIZE = int(os.getenv("PROVISION_ROLE_BATCH_SIZE", "200"))
+PROVISION_POLL_INTERVAL = float(os.getenv("PROVISION_POLL_INTERVAL", "2"))
+PROVISION_RECEIPT_TIMEOUT = float(os.getenv("PROVISION_RECEIPT_TIMEOUT", "600"))
+
+ROLES = ("Issuer", "Student")
+ISSUER_ROLE = Web3.keccak(text="ISSUER_ROLE")
+# Role -> (bulk contract function used by provisioning, function(contract, address) granting one wallet)
+ROLE_GRANTS = {
+    "Student": (
+        "grantStudentRoles",
+        lambda contract, address: contract.functions.grantStudentRole(address),
+    ),
+    "Issuer": (
+        "grantIssuerRoles",
+        lambda contract, address: contract.functions.grantRole(ISSUER_ROLE, address),
+    ),
+}
+
+_mnemonic = Mnemonic("english")
+
+
+def _broadcast(w3, signed):
+    """eth_sendRawTransaction for every signed transaction in one pass; (result, error) per transaction."""
+    # A single worker keeps the batches in nonce order.
+    return batch_request(
+        w3,
+        [
+            ("eth_sendRawTransaction", [Web3.to_hex(tx.raw_transaction)])
+            for tx in signed
+        ],
+        max_workers=1,
+        with_errors=True,
+    )
+
+
+def _fill_gaps(w3, account, gaps):
+    """Send a 0-value self-transfer at each (nonce, rejected tx) so the transactions after it can be mined."""
+    fillers = [
+        account.sign_transaction(
+            dict(
+                {k: v for k, v in tx.items() if k in FEE_FIELDS},
+                to=account.address,
+                value=0,
+                gas=TRANSFER_GAS,
+                chainId=tx["chainId"],
+                nonce=nonce,
+            )
+        )
+        for nonce, tx in gaps
+    ]
+    for (nonce, _), (_, error) in zip(gaps, _broadcast(w3, fillers), strict=True):
+        if error is not None and not is_already_known(error.get("message", "")):
+            logger.error(
+                f"Could not fill the nonce gap of {account.address} at {nonce}: {error}"
+            )
+
+
+def _send_round(w3, account, txs, pending, allocated, hashes, retry):
+    """Broadcast ``txs[i]`` at each allocated nonce and record the hashes.
+
+    With ``retry``, the (index, nonce) pairs rejected with a nonce error are
+    returned as (too low, too high) lists; other rejections, and nonce errors
+    without ``retry``, are filled with a 0-value self-transfer.
+    """
+    signed = [
+        account.sign_transaction(dict(txs[i], nonce=nonce))
+        for i, nonce in zip(pending, allocated, strict=True)
+    ]
+    too_low, too_high, gaps = [], [], []
+    for i, nonce, tx, (_, error) in zip(
+        pending, allocated, signed, _broadcast(w3, signed), strict=True
+    ):
+        message = error.get("message", "") if error is not None else ""
+        if error is None or is_already_known(message):
+            hashes[i] = tx.hash
+        elif is_nonce_error(message) and retry:
+            (too_high if is_nonce_too_high(message) else too_low).append((i, nonce))
+        else:
+            logger.warning(
+                f"Transaction {i} from {account.address} at nonce {nonce} rejected: {error}"
+            )
+            gaps.append((nonce, txs[i]))
+    if gaps:
+        _fill_gaps(w3, account, gaps)
+    return too_low, too_high
+
+
+def send_pipelined(w3, account, txs):
+    """Sign ``txs`` with ``account`` at consecutive nonces and broadcast them as JSON-RPC batches.
+
+    Nothing waits for a receipt, so later transactions can depend on earlier
+    ones from the same sender. A node that already has a transaction counts
+    as accepted. One that rejects a nonce as used elsewhere gets the
+    transaction again at a fresh nonce after a resync; one that rejects it as
+    too high (a nonce below it was never broadcast) gets the gap filled and
+    the transaction again at the same nonce. Any other rejection leaves a hole
+    in the nonces already broadcast after it, which is filled with a 0-value
+    self-transfer. Returns the hash of each transaction, or None for the ones
+    the node rejected.
+    """
+    nonces = get_nonce_manager(w3)
+
+    def send_filler(nonce):
+        _fill_gaps(w3, account, [(nonce, txs[0])])
+
+    hashes = [None] * len(txs)
+    pending = list(range(len(txs)))
+    allocated = nonces.allocate_many(account.address, len(pending))
+    if nonces.take_suspected_gap(account.address):
+        nonces.fill_gaps(account.address, allocated[0], send_filler)
+    for attempt in (1, 2):
+        too_low, too_high = _send_round(
+            w3, account, txs, pending, allocated, hashes, retry=attempt == 1
+        )
+        if not (too_low or too_high):
+            break
+        # Too high: fill the gap below and keep the nonces. Too low: they were used elsewhere, move up.
+        if too_high:
+            nonces.fill_gaps(
+                account.address, min(nonce for _, nonce in too_high), send_filler
+            )
+        if too_low:
+            nonces.resync(account.address)
+        pending = [i for i, _ in too_high] + [i for i, _ in too_low]
+        allocated = [nonce for _, nonce in too_high] + (
+            nonces.allocate_many(account.address, len(too_low)) if too_low else []
+        )
+    return hashes
+
+
+def registry_contract(web3):
+    from app.api.wallet.router import get_certificate_registry_contract
+
+    abi, contract_address = get_certificate_registry_contract()
+    return web3.eth.contract(
+        address=Web3.to_checksum_address(contract_address), abi=abi
+    )
+
+
+def require_role_grants(web3, role):
+    """Raise UnsupportedContractError unless the deployed contract can grant ``role`` in bulk."""
+    require_functions(registry_contract(web3), ROLE_GRANTS[role][0])
+
+
+def _derive(_):
+    mnemonic = _mnemonic.generate(strength=128)
+    return mnemonic, EthAccount.from_mnemonic(mnemonic, account_path="m/44'/60'/0'/0/0")
+
+
+def start_provisioning(role, count, name_prefix, rpc_url, fund_amount_wei, user=None):
+    """Create a ProvisioningJob and hand it to the Celery worker; returns the job."""
+    from app.tasks import provision_wallets
+
+    job = ProvisioningJob.objects.create(
+        user=user,
+        role=role,
+        count=count,
+        name_prefix=name_prefix,
+        rpc_url=rpc_url,
+        fund_amount_wei=str(fund_amount_wei),
+    )
+    try:
+        provision_wallets.delay(str(job.id))
+    except Exception as e:
+        logger.error(f"Could not queue provisioning job {job.id}: {e}")
+        ProvisioningJob.objects.filter(pk=job.pk).update(
+            status=ProvisioningJob.FAILED, error=f"Could not queue job: {e}"
+        )
+        raise
+    job.refresh_from_db()
+    return job
+
+
+class WalletProvisioner:
+    """Creates, funds and grants a role to the wallets of one ProvisioningJob.
+
+    Keys are derived on a thread pool (the PBKDF2 step of BIP-39 releases the
+    GIL) and stored with bulk_create before any transaction is sent. Then the
+    funding transfers and the role grants (``grantStudentRoles`` /
+    ``grantIssuerRoles`` over PROVISION_ROLE_BATCH_SIZE addresses each) are
+    signed by the funder at consecutive nonces and broadcast together. Receipts of all
+    outstanding transactions are fetched in one batch per poll, and each
+    wallet's progress is stored as it changes.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.web3 = get_web3(job.rpc_url)
+
+    def _funder(self):
+        from app.api.wallet.router import get_ganache_funder
+
+        _, funder_private_key = get_ganache_funder(self.web3)
+        if not funder_private_key:
+            raise RuntimeError(
+                "Funder private key not found. Set GANACHE_FUNDER_PRIVATE_KEY or provide a valid accounts.json."
+            )
+        return self.web3.eth.account.from_key(funder_private_key)
+
+    def _contract(self):
+        return registry_contract(self.web3)
+
+    def _create_wallets(self):
+        job = self.job
+        with ThreadPoolExecutor(
+            max_workers=max(1, PROVISION_DERIVE_WORKERS)
+        ) as executor:
+            derived = list(executor.map(_derive, range(job.count)))
+        names = [f"{job.name_prefix}-{index + 1}" for index in range(job.count)]
+        with db_transaction.atomic():
+            wallets = Wallet.objects.bulk_create(
+                [Wallet(user=job.user, name=name) for name in names], batch_size=500
+            )
+            accounts = Account.objects.bulk_create(
+                [
+                    Account(
+                        wallet=wallet,
+                        address=acct.address,
+                        role=job.role,
+                        name=name,
+                        private_key=acct.key.hex(),
+                        mnemonic=mnemonic,
+                        user=job.user,
+                    )
+                    for wallet, name, (mnemonic, acct) in zip(
+                        wallets, names, derived, strict=True
+                    )
+                ],
+                batch_size=500,
+            )
+            AccountRole.objects.bulk_create(
+                [AccountRole(account=account, role=job.role) for account in accounts],
+                batch_size=500,
+            )
+            return ProvisionedWallet.objects.bulk_create(
+                [
+                    ProvisionedWallet(
+                        job=job, index=index, account=account, address=account.address
+                    )
+                    for index, account in enumerate(accounts)
+                ],
+                batch_size=500,
+            )
+
+    def _role_transactions(self, contract, funder, rows):
+        """(rows, unsigned transaction) pairs granting the job's role to ``rows``."""
+        oracle = get_fee_oracle(self.web3)
+        bulk_function, _ = ROLE_GRANTS[self.job.role]
+        params = {
+            "from": funder.address,
+            "chainId": get_nonce_manager(self.web3).chain_id,
+        }
+        return [
+            (
+                chunk,
+                oracle.build_transaction(
+                    getattr(contract.functions, bulk_function)(
+                        [row.address for row in chunk]
+                    ),
+                    params,
+                ),
+            )
+            for chunk in chunked(rows, PROVISION_ROLE_BATCH_SIZE)
+        ]
+
+    def _send(self, rows):
+        funder = self._funder()
+        contract = self._contract()
+        amount = int(self.job.fund_amount_wei)
+        fees = get_fee_oracle(self.web3).fees()
+        chain_id = get_nonce_manager(self.web3).chain_id
+        txs = []
+        if amount > 0:
+            txs = [
+                (
+                    [row],
+                    dict(
+                        fees,
+                        to=row.address,
+                        value=amount,
+                        gas=TRANSFER_GAS,
+                        chainId=chain_id,
+                    ),
+                )
+                for row in rows
+            ]
+        fund_count = len(txs)
+        txs += self._role_transactions(contract, funder, rows)
+        # Funding and grants share the funder's nonce sequence, so they are all broadcast at once.
+        hashes = send_pipelined(self.web3, funder, [tx for _, tx in txs])
+        for position, ((targets, _), tx_hash) in enumerate(
+            zip(txs, hashes, strict=True)
+        ):
+            field = "fund_tx_hash" if position < fund_count else "role_tx_hash"
+            for row in targets:
+                if tx_hash is None:
+                    row.status, row.error = (
+                        ProvisionedWallet.FAILED,
+                        "Transaction rejected by the node",
+                    )
+                else:
+                    setattr(row, field, to_hex_hash(tx_hash))
+        ProvisionedWallet.objects.bulk_update(
+            rows, ["status", "error", "fund_tx_hash", "role_tx_hash"], batch_size=500
+        )
+
+    def _track(self, rows):
+        deadline = time.monotonic() + PROVISION_RECEIPT_TIMEOUT
+        receipts = {}
+        while True:
+            open_rows = [
+                row
+                for row in rows
+                if row.status not in ProvisionedWallet.FINAL_STATUSES
+            ]
+            if not open_rows:
+                return
+            waiting = {
+                h
+                for row in open_rows
+                for h in (row.fund_tx_hash, row.role_tx_hash)
+                if h and h not in receipts
+            }
+            receipts.update(fetch_receipts(self.web3, waiting))
+            changed = []
+            for row in open_rows:
+                status, error = self._wallet_status(row, receipts)
+                if (
+                    time.monotonic() > deadline
+                    and status not in ProvisionedWallet.FINAL_STATUSES
+                ):
+                    status, error = (
+                        ProvisionedWallet.FAILED,
+                        f"No receipt within {PROVISION_RECEIPT_TIMEOUT:.0f}s",
+                    )
+                if (status, error) != (row.status, row.error):
+                    row.status, row.error = status, error
+                    changed.append(row)
+            ProvisionedWallet.objects.bulk_update(
+                changed, ["status", "error"], batch_size=500
+            )
+            ProvisioningJob.objects.filter(pk=self.job.pk).update(
+                updated_at=timezone.now()
+            )
+            if any(
+                row.status not in ProvisionedWallet.FINAL_STATUSES for row in open_rows
+            ):
+                time.sleep(PROVISION_POLL_INTERVAL)
+
+    @staticmethod
+    def _wallet_status(row, receipts):
+        fund = receipts.get(row.fund_tx_hash) if row.fund_tx_hash else None
+        grant = receipts.get(row.role_tx_hash)
+        if fund is not None and fund.get("status", 1) != 1:
+            return ProvisionedWallet.FAILED, "Funding transaction reverted"
+        if grant is not None and grant.get("status", 1) != 1:
+            return ProvisionedWallet.FAILED, "Role grant reverted"
+        funded = not row.fund_tx_hash or fund is not None
+        if funded and grant is not None:
+            return ProvisionedWallet.READY, ""
+        return (
+            ProvisionedWallet.FUNDED
+            if row.fund_tx_hash and fund is not None
+            else ProvisionedWallet.CREATED
+        ), ""
+
+    def run(self):
+        # Fail before any wallet is created or funded if the grants cannot be sent.
+        require_role_grants(self.web3, self.job.role)
+        rows = self._create_wallets()
+        self._send(rows)
+        self._track(rows)
+
+
+def run_provisioning(job_id):
+    # Claim the job first: a redelivered message must not provision the cohort twice.
+    claimed = ProvisioningJob.objects.filter(
+        pk=job_id, status=ProvisioningJob.QUEUED
+    ).update(status=ProvisioningJob.RUNNING, updated_at=timezone.now())
+    if not claimed:
+        return
+    job = ProvisioningJob.objects.get(pk=job_id)
+    try:
+        WalletProvisioner(job).run()
+    except Exception as e:
+        logger.error(f"Provisioning job {job_id} failed: {e}")
+        job.status, job.error = ProvisioningJob.FAILED, str(e)
+        job.save(update_fields=["status", "error", "updated_at"])
+        return
+    job.status = ProvisioningJob.COMPLETED
+    job.save(update_fields=["status", "updated_at"])
+    logger.info(f"Provisioning job {job_id} completed")
+
+
+def job_progress(job):
+    wallets = list(job.wallets.order_by("index"))
+    progress = {
+        status: 0
+        for status in (
+            ProvisionedWallet.CREATED,
+            ProvisionedWallet.FUNDED,
+            ProvisionedWallet.READY,
+            ProvisionedWallet.FAILED,
+        )
+    }
+    for wallet in wallets:
+        progress[wallet.status] = progress.get(wallet.status, 0) + 1
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "role": job.role,
+        "count": job.count,
+        "error": job.error or None,
+        "progress": progress,
+        "wallets": [
+            {
+                "address": wallet.address,
+                "name": f"{job.name_prefix}-{wallet.index + 1}",
+                "status": wallet.status,
+                "fund_tx_hash": wallet.fund_tx_hash or None,
+                "role_tx_hash": wallet.role_tx_hash or None,
+                "error": wallet.error or None,
+            }
+            for wallet in wallets
+        ],
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+    }
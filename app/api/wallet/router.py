@@ -5,17 +5,25 @@ import os
 from django.conf import settings
 from pydantic import BaseModel
 from mnemonic import Mnemonic
-from web3.middleware import geth_poa_middleware
 import json
-from app.models import Account, Transaction, Wallet
-from django.db import transaction as db_transaction
+import uuid
+from app.models import Account, ProvisioningJob, Transaction, Wallet
 from app.models import AccountRole
+from app.api.smartcontract.fees import TRANSFER_GAS, get_fee_oracle
+from app.api.smartcontract.nonces import get_nonce_manager
+from app.api.smartcontract.providers import get_web3
+from app.api.smartcontract.roles import get_role_service
+from app.api.smartcontract.tx_jobs import UnsupportedContractError, enqueue_transaction
+from app.api.wallet.provisioning import (
+    PROVISION_MAX_WALLETS, ROLES, job_progress, require_role_grants, send_pipelined, start_provisioning,
+)
 
 
 
 GANACHE_URL = 'http://ganache:8545'
 GANACHE_PRIVATE_KEY = os.getenv('GANACHE_PRIVATE_KEY')  # Optional: can use the first Ganache account
 FUND_AMOUNT_ETHER = float(os.getenv('FUND_AMOUNT_ETHER', '1'))  # Default: 1 ETH
+WALLET_BULK_BATCH_SIZE = int(os.getenv('WALLET_BULK_BATCH_SIZE', '500'))
 
 router = Router(tags=["wallet"])
 
@@ -101,6 +109,7 @@ class WalletCreateResponse(BaseModel):
     address: str  # Add address field
     created_at: str
     roles: list[str]
+    jobs: list[str] = []  # transaction job ids (funding, role grant)
 
 class WalletImportRequest(BaseModel):
     mnemonic: str
@@ -136,6 +145,35 @@ class WalletAccountResponse(BaseModel):
     funded: bool
     tx_hashes: list[str]
 
+class WalletProvisionRequest(BaseModel):
+    role: str  # 'Issuer' or 'Student'
+    count: int
+    name_prefix: str
+    fund_amount_ether: float | None = None  # defaults to FUND_AMOUNT_ETHER
+
+class WalletProvisionResponse(BaseModel):
+    job_id: str
+    status: str
+
+class ProvisionedWalletItem(BaseModel):
+    address: str
+    name: str
+    status: str  # created, funded, ready or failed
+    fund_tx_hash: str | None = None
+    role_tx_hash: str | None = None
+    error: str | None = None
+
+class ProvisioningJobResponse(BaseModel):
+    job_id: str
+    status: str
+    role: str
+    count: int
+    error: str | None = None
+    progress: dict[str, int]
+    wallets: list[ProvisionedWalletItem]
+    created_at: str
+    updated_at: str
+
 class WalletListItem(BaseModel):
     id: int
     name: str
@@ -165,8 +203,25 @@ def get_certificate_registry_contract():
         address = f.read().strip()
     return abi, address
 
+def granted_roles(w3, address):
+    """Roles ``address`` holds on the contract right now; [] if the lookup fails."""
+    try:
+        abi, contract_address = get_certificate_registry_contract()
+        contract = w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=abi)
+        return get_role_service(contract).roles_for([address])[address]
+    except Exception as e:
+        import logging
+        logging.error(f"Failed to fetch roles from contract for {address}: {e}")
+        return []
+
 @router.post("/create", response=WalletCreateResponse)
 def create_wallet(request, data: WalletCreateRequest):
+    """
+    Create a wallet and queue its funding and role grant.
+    ``roles`` are the roles the contract reports when the response is built: the grant
+    is already in them when the worker runs jobs eagerly, otherwise it shows up once the
+    ``jobs`` (GET /tx/{job_id}) are confirmed.
+    """
     roles = []
     user = request.user if hasattr(request, 'user') and request.user.is_authenticated else None
     # generate mnemonic and derive account
@@ -194,64 +249,30 @@ def create_wallet(request, data: WalletCreateRequest):
     with open(filename, 'w') as f:
         f.write(f"address: {address}\nprivate_key: {private_key}\nmnemonic: {mnemonic}\n")
     # Fund the new wallet from Ganache
-    w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
+    w3 = get_web3(GANACHE_URL)
     funder_address, funder_private_key = get_ganache_funder(w3)
     if not funder_private_key:
         raise Exception('Funder private key not found. Set GANACHE_FUNDER_PRIVATE_KEY or provide a valid accounts.json.')
 
-    funder_account = w3.eth.account.from_key(funder_private_key)
-
     try:
-        # Get the initial nonce for the funder account
-        current_nonce = w3.eth.get_transaction_count(funder_address)
-        # 1. Fund the new wallet
-        tx_fund = {
-            'to': address,
-            'value': w3.to_wei(FUND_AMOUNT_ETHER, 'ether'),
-            'gas': 21000,
-            'gasPrice': w3.to_wei('1', 'gwei'),
-            'nonce': current_nonce,
-        }
-        signed_tx_fund = funder_account.sign_transaction(tx_fund)
-        tx_hash_fund = w3.eth.send_raw_transaction(signed_tx_fund.raw_transaction)
-        w3.eth.wait_for_transaction_receipt(tx_hash_fund)
-
-        import logging
-        logging.info(f"Wallet funding: Sent {FUND_AMOUNT_ETHER} ETH from {funder_address} to {address}. Tx hash: {tx_hash_fund.hex()}")
-        abi, contract_address = get_certificate_registry_contract()
-        contract_address = Web3.to_checksum_address(contract_address)
-        contract = w3.eth.contract(address=contract_address, abi=abi)
-
-        # 2. Grant the role on the smart contract
+        # Funding and role grant are sent by the Celery worker, the grant right behind the
+        # funding; their progress is at GET /tx/{job_id}.
+        jobs = [enqueue_transaction(
+            'fund_account',
+            rpc_url=GANACHE_URL,
+            address=address,
+            value=str(w3.to_wei(FUND_AMOUNT_ETHER, 'ether')),
+        )]
         if data.role in ["Issuer", "Student"]:
-            if data.role == "Issuer":
-                role_grant_func = contract.functions.grantIssuerRole(address)
-            else:  # Student
-                role_grant_func = contract.functions.grantStudentRole(address)
-
-            # Increment nonce for the next transaction
-            current_nonce += 1
-
-            tx_role = role_grant_func.build_transaction({
-                'from': funder_address,
-                'nonce': current_nonce,
-                'gas': 200000,
-                'gasPrice': w3.to_wei('1', 'gwei'),
-            })
-            signed_tx_role = funder_account.sign_transaction(tx_role)
-            tx_hash_role = w3.eth.send_raw_transaction(signed_tx_role.raw_transaction)
-            w3.eth.wait_for_transaction_receipt(tx_hash_role)
-
-            # Use the funder address as the caller for the view call to avoid invalid opcode
-            funder_address, _ = get_ganache_funder(w3)
-            call_params = {'from': funder_address} if funder_address else {}
-            try:
-                roles = contract.functions.getRoles(address).call(call_params)
-            except Exception as e:
-                logging.error(f"Failed to fetch roles from contract for {address}: {e}")
-                roles = []
-
-            logging.info(f"Successfully granted {data.role.upper()}_ROLE to {address}. Tx: {tx_hash_role.hex()}")
+            jobs.append(enqueue_transaction(
+                'wallet_role',
+                rpc_url=GANACHE_URL,
+                address=address,
+                role=data.role,
+            ))
+        import logging
+        logging.info(f"Wallet setup queued for {address}: {[str(job.id) for job in jobs]}")
+        roles = granted_roles(w3, address)
 
     except Exception as e:
         import logging
@@ -260,21 +281,67 @@ def create_wallet(request, data: WalletCreateRequest):
         # Clean up created records if setup fails
         account.delete()
         wallet.delete()
-        raise HttpError(500, f"Failed during wallet setup: {str(e)}")
+        raise HttpError(500, f"Failed during wallet setup: {str(e)}") from e
 
     return WalletCreateResponse(
         id=wallet.id,
         name=wallet.name,
         address=address,
         created_at=str(wallet.created_at),
-        roles=roles
+        roles=roles,
+        jobs=[str(job.id) for job in jobs],
     )
 
+@router.post("/provision", response=WalletProvisionResponse)
+def provision_wallets(request, data: WalletProvisionRequest):
+    """
+    Create a whole cohort of funded wallets with a role in the background.
+    Follow the per-wallet progress at GET /wallet/provision/{job_id}.
+    """
+    from ninja.errors import HttpError
+    if data.role not in ROLES:
+        raise HttpError(400, f"role must be one of {', '.join(ROLES)}")
+    if not 1 <= data.count <= PROVISION_MAX_WALLETS:
+        raise HttpError(400, f"count must be between 1 and {PROVISION_MAX_WALLETS}")
+    try:
+        require_role_grants(get_web3(GANACHE_URL), data.role)
+    except UnsupportedContractError as e:
+        raise HttpError(501, str(e)) from e
+    user = request.user if hasattr(request, 'user') and request.user.is_authenticated else None
+    fund_amount_ether = FUND_AMOUNT_ETHER if data.fund_amount_ether is None else data.fund_amount_ether
+    try:
+        job = start_provisioning(
+            role=data.role,
+            count=data.count,
+            name_prefix=data.name_prefix,
+            rpc_url=GANACHE_URL,
+            fund_amount_wei=Web3.to_wei(fund_amount_ether, 'ether'),
+            user=user,
+        )
+    except Exception as e:
+        raise HttpError(500, f"Could not queue wallet provisioning: {str(e)}") from e
+    return WalletProvisionResponse(job_id=str(job.id), status=job.status)
+
+@router.get("/provision/{job_id}", response=ProvisioningJobResponse)
+def provisioning_status(request, job_id: str):
+    from ninja.errors import HttpError
+    job = ProvisioningJob.objects.filter(pk=job_id).first() if _is_uuid(job_id) else None
+    if job is None:
+        raise HttpError(404, f"Provisioning job {job_id} not found.")
+    return job_progress(job)
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
 @router.get("/list", response=list[WalletListItem])
 def list_wallets(request):
     user = request.user if hasattr(request, 'user') and request.user.is_authenticated else None
     wallets = Wallet.objects.filter(user=user) if user else Wallet.objects.all()
-    w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
+    w3 = get_web3(GANACHE_URL)
     wallet_items = []
     for w in wallets:
         # Get the associated account
@@ -304,7 +371,7 @@ def import_wallet_private_key(request, data: WalletImportPrivateKeyRequest):
 @router.post("/balance", response=WalletBalanceResponse)
 def get_balance(request, data: WalletBalanceRequest):
     try:
-        w3 = Web3(Web3.HTTPProvider(data.rpc_url, request_kwargs={'timeout': 30}))
+        w3 = get_web3(data.rpc_url)
         addr = Web3.to_checksum_address(data.address)
         balance = w3.eth.get_balance(addr)
         return WalletBalanceResponse(address=data.address, balance=str(balance))
@@ -313,51 +380,47 @@ def get_balance(request, data: WalletBalanceRequest):
 
 @router.post("/generate_accounts", response=WalletAccountResponse)
 def generate_accounts_and_fund(request, data: WalletAccountRequest):
-    w3 = Web3(Web3.HTTPProvider(data.rpc_url, request_kwargs={'timeout': 30}))
-    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    w3 = get_web3(data.rpc_url, poa=True)
     funder_private_key = data.wallet_private_key
     if not funder_private_key:
         _, funder_private_key = get_ganache_funder(w3)
         if not funder_private_key:
             return WalletAccountResponse(accounts=[], funded=False, tx_hashes=[])
     funder = w3.eth.account.from_key(funder_private_key)
-    accounts = []
-    tx_hashes = []
-    funded = False
-    with db_transaction.atomic():
-        for idx in range(data.num_accounts):
-            acct = w3.eth.account.create()
-            accounts.append(acct.address)
-            db_account, _ = Account.objects.get_or_create(
-                address=acct.address,
-                defaults={
-                    'name': data.name if data.name else f'Generated Account {acct.address[:8]}',
-                    'private_key': acct.key.hex(),
-                    'mnemonic': None,
-                }
-            )
-            if data.fund_amount_wei > 0:
-                tx = {
-                    'to': acct.address,
-                    'value': data.fund_amount_wei,
-                    'gas': 21000,
-                    'gasPrice': w3.eth.gas_price,
-                    'nonce': w3.eth.get_transaction_count(funder.address),
-                    'chainId': w3.eth.chain_id
-                }
-                signed_tx = funder.sign_transaction(tx)
-                tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-                tx_hashes.append(tx_hash.hex())
-                funded = True
-                # Persist transaction
-                Transaction.objects.create(
-                    account=db_account,
-                    tx_hash=tx_hash.hex(),
-                    to_address=acct.address,
-                    amount=data.fund_amount_wei,
-                    status='pending',
-                )
-    return WalletAccountResponse(accounts=accounts, funded=funded, tx_hashes=tx_hashes)
+    new_accounts = [w3.eth.account.create() for _ in range(data.num_accounts)]
+    # Keys are stored before any funds are sent, so a failure below never strands ether.
+    db_accounts = Account.objects.bulk_create([
+        Account(
+            address=acct.address,
+            name=data.name if data.name else f'Generated Account {acct.address[:8]}',
+            private_key=acct.key.hex(),
+            mnemonic=None,
+        )
+        for acct in new_accounts
+    ], batch_size=WALLET_BULK_BATCH_SIZE)
+    accounts = [acct.address for acct in new_accounts]
+    if data.fund_amount_wei <= 0 or not new_accounts:
+        return WalletAccountResponse(accounts=accounts, funded=False, tx_hashes=[])
+
+    # Chain parameters are read once; every transfer is signed locally at a
+    # pre-reserved nonce, then broadcast as JSON-RPC batches.
+    base_tx = dict(get_fee_oracle(w3).fees(), gas=TRANSFER_GAS, value=data.fund_amount_wei,
+                   chainId=get_nonce_manager(w3).chain_id)
+    hashes = send_pipelined(w3, funder, [dict(base_tx, to=acct.address) for acct in new_accounts])
+    sent = [(db_account, tx_hash.hex()) for db_account, tx_hash in zip(db_accounts, hashes, strict=True) if tx_hash is not None]
+    Transaction.objects.bulk_create([
+        Transaction(
+            account=db_account,
+            tx_hash=tx_hash,
+            to_address=db_account.address,
+            amount=data.fund_amount_wei,
+            status=Transaction.PENDING,
+            rpc_url=data.rpc_url,
+        )
+        for db_account, tx_hash in sent
+    ], batch_size=WALLET_BULK_BATCH_SIZE)
+    tx_hashes = [tx_hash for _, tx_hash in sent]
+    return WalletAccountResponse(accounts=accounts, funded=bool(tx_hashes), tx_hashes=tx_hashes)
 
 @router.get("/account/list", response=list[AccountListItem])
 def list_accounts(request, wallet_id: int):
@@ -367,7 +430,7 @@ def list_accounts(request, wallet_id: int):
 
 @router.get("/account/balance", response=str)
 def get_account_balance(request, address: str, rpc_url: str = None):
-    w3 = Web3(Web3.HTTPProvider(rpc_url or 'http://ganache:8545'))
+    w3 = get_web3(rpc_url or 'http://ganache:8545')
     try:
         balance = w3.eth.get_balance(address)
         return str(balance)
@@ -388,7 +451,7 @@ def get_account_roles(request, address: str):
 
 @router.get("/all-accounts", response=list[dict])
 def list_all_accounts(request):
-    w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
+    w3 = get_web3(GANACHE_URL)
     accounts = Account.objects.all()
     result = []
     for acc in accounts:
@@ -399,7 +462,7 @@ def list_all_accounts(request):
             balance = None
         # Get transactions
         txs = list(Transaction.objects.filter(account=acc).values(
-            'tx_hash', 'to_address', 'amount', 'status', 'timestamp'))
+            'tx_hash', 'to_address', 'amount', 'status', 'block_number', 'gas_used', 'timestamp'))
         result.append({
             'name': acc.name,
             'address': acc.address,
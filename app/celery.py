@@ -0,0 +1,10 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+
+app = Celery("app")
+# All CELERY_* settings in app/settings.py apply.
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
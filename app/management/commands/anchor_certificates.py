@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.api.smartcontract import anchoring
+from app.api.smartcontract.contract_manager import ContractManager
+
+
+class Command(BaseCommand):
+    help = (
+        "Seal queued certificates into Merkle batches and anchor their roots on chain"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Seal everything pending now and exit"
+        )
+        parser.add_argument(
+            "--window",
+            type=float,
+            default=anchoring.MERKLE_BATCH_WINDOW,
+            help="Seconds a certificate may wait before its batch is sealed",
+        )
+
+    def handle(self, *args, **options):
+        manager = ContractManager()
+        manager.refresh()
+        contract = manager.get_contract()
+        if contract is None:
+            self.stderr.write(
+                self.style.ERROR(f"Contract not loaded: {manager.get_error()}")
+            )
+            return
+        sender = manager.web3.eth.accounts[0]
+        if options["once"]:
+            sealed = anchoring.seal_due_batches(contract.address, sender, window=0)
+            self.stdout.write(
+                self.style.SUCCESS(f"Sealed {len(sealed)} Merkle batches")
+            )
+            return
+        window = options["window"]
+        poll_interval = max(1.0, min(window / 10, 30.0))
+        self.stdout.write(
+            f"Sealing Merkle batches every {window}s (checking every {poll_interval}s)..."
+        )
+        while True:
+            for batch in anchoring.seal_due_batches(
+                contract.address, sender, window=window
+            ):
+                self.stdout.write(
+                    f"Sealed {batch.root}: {batch.leaf_count} certificates ({batch.status})"
+                )
+            time.sleep(poll_interval)
@@ -0,0 +1,416 @@
+import asyncio
+import builtins
+import contextlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+from web3 import Web3
+
+from app.api.smartcontract.block_cache import BlockHeaderCache
+from app.api.smartcontract.cache import TwoTierCache
+from app.api.smartcontract.contract_manager import (
+    ContractManager,
+    read_contract_artifacts,
+)
+from app.api.smartcontract.log_scanner import LOG_SCAN_CHUNK_SIZE, scan_logs
+from app.api.smartcontract.providers import get_web3
+from app.api.smartcontract.rpc_batch import (
+    RPC_BATCH_SIZE,
+    RPC_BATCH_WORKERS,
+    fetch_receipts,
+)
+
+
+@contextlib.contextmanager
+def count_http_round_trips():
+    """Count every HTTP request, and the response bytes, sent through ``requests`` while the block is active."""
+    counter = {"round_trips": 0, "bytes": 0}
+    original_send = requests.Session.send
+
+    def counting_send(session, request, **kwargs):
+        counter["round_trips"] += 1
+        response = original_send(session, request, **kwargs)
+        counter["bytes"] += len(response.content)
+        return response
+
+    requests.Session.send = counting_send
+    try:
+        yield counter
+    finally:
+        requests.Session.send = original_send
+
+
+@contextlib.contextmanager
+def count_file_io():
+    """Count files opened (and their size) and stat() calls made while the block is active."""
+    counter = {"opens": 0, "bytes": 0, "stats": 0}
+    original_open, original_stat = builtins.open, os.stat
+
+    def counting_open(file, *args, **kwargs):
+        handle = original_open(file, *args, **kwargs)
+        counter["opens"] += 1
+        with contextlib.suppress(Exception):
+            counter["bytes"] += os.fstat(handle.fileno()).st_size
+        return handle
+
+    def counting_stat(path, *args, **kwargs):
+        counter["stats"] += 1
+        return original_stat(path, *args, **kwargs)
+
+    builtins.open, os.stat = counting_open, counting_stat
+    try:
+        yield counter
+    finally:
+        builtins.open, os.stat = original_open, original_stat
+
+
+def measure(label, func):
+    with count_http_round_trips() as counter:
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+    return {
+        "label": label,
+        "round_trips": counter["round_trips"],
+        "bytes": counter["bytes"],
+        "seconds": elapsed,
+        "result": result,
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark JSON-RPC usage of the certificate endpoints against the configured node"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            choices=[
+                "receipts",
+                "block_timestamps",
+                "log_scan",
+                "student_filter",
+                "wallet_balance",
+                "async_endpoints",
+                "contract_reload",
+            ],
+            default="receipts",
+        )
+        parser.add_argument("--batch-size", type=int, default=RPC_BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=RPC_BATCH_WORKERS)
+        parser.add_argument("--chunk-size", type=int, default=LOG_SCAN_CHUNK_SIZE)
+        parser.add_argument(
+            "--student", help="Student address for the student_filter scenario"
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Requests per run for throughput scenarios",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Client threads for throughput scenarios",
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=200,
+            help="Concurrent clients for the async_endpoints scenario",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Server (e.g. daphne) to load-test; the app is called in-process over ASGI when omitted",
+        )
+
+    def handle(self, *args, **options):
+        getattr(self, f"scenario_{options['scenario']}")(options)
+
+    def report(self, rows):
+        for row in rows:
+            self.stdout.write(
+                f"{row['label']:<40} {row['round_trips']:>8} round trips {row['bytes']:>12} bytes {row['seconds']:>10.3f}s"
+            )
+
+    def report_throughput(self, rows, total):
+        for row in rows:
+            self.stdout.write(
+                f"{row['label']:<40} {total / row['seconds']:>10.1f} req/s {row['round_trips']:>8} round trips"
+            )
+
+    def load_manager(self):
+        manager = ContractManager()
+        manager.refresh()
+        if manager.get_contract() is None:
+            self.stderr.write(f"Contract not loaded: {manager.get_error()}")
+            return None
+        return manager
+
+    def scenario_receipts(self, options):
+        """Receipt lookups needed to fill gas_used for one full certificate listing."""
+        manager = self.load_manager()
+        if manager is None:
+            return
+        contract = manager.get_contract()
+        tx_hashes = [
+            event.transactionHash.hex()
+            for event in scan_logs(contract.events.CertificateRegistered)
+        ]
+        self.stdout.write(f"Listing has {len(tx_hashes)} certificates")
+
+        def sequential():
+            return [
+                manager.web3.eth.get_transaction_receipt(tx_hash)["gasUsed"]
+                for tx_hash in tx_hashes
+            ]
+
+        def batched():
+            receipts = fetch_receipts(
+                manager.web3,
+                tx_hashes,
+                batch_size=options["batch_size"],
+                max_workers=options["workers"],
+            )
+            return [receipts[tx_hash]["gasUsed"] for tx_hash in tx_hashes]
+
+        before = measure("sequential get_transaction_receipt", sequential)
+        after = measure(
+            f"batched (size={options['batch_size']}, workers={options['workers']})",
+            batched,
+        )
+        self.report([before, after])
+        if before["result"] != after["result"]:
+            self.stderr.write(
+                "gas_used values differ between sequential and batched fetches"
+            )
+
+    def scenario_block_timestamps(self, options):
+        """Block timestamps needed by the dashboard operations list."""
+        manager = self.load_manager()
+        if manager is None:
+            return
+        contract = manager.get_contract()
+        block_numbers = [
+            event.blockNumber
+            for event in scan_logs(contract.events.CertificateRegistered)
+        ]
+        block_numbers += [
+            event.blockNumber for event in scan_logs(contract.events.CertificateRevoked)
+        ]
+        self.stdout.write(f"Dashboard has {len(block_numbers)} operations")
+
+        def per_event():
+            return [manager.web3.eth.get_block(n).timestamp for n in block_numbers]
+
+        # A private prefix keeps the cold run cold even when Redis already holds headers.
+        block_cache = BlockHeaderCache(
+            manager.web3, cache=TwoTierCache(f"benchmark_block_header:{time.time()}")
+        )
+
+        def cached():
+            timestamps = block_cache.timestamps(block_numbers)
+            return [timestamps[n] for n in block_numbers]
+
+        rows = [
+            measure("per-event get_block", per_event),
+            measure("BlockHeaderCache (cold)", cached),
+            measure("BlockHeaderCache (warm)", cached),
+        ]
+        self.report(rows)
+        if any(row["result"] != rows[0]["result"] for row in rows):
+            self.stderr.write("timestamps differ between per-event and cached lookups")
+
+    def scenario_log_scan(self, options):
+        """One unbounded get_logs call against the chunked, parallel scanner."""
+        manager = self.load_manager()
+        if manager is None:
+            return
+        event = manager.get_contract().events.CertificateRegistered
+
+        def single_call():
+            return [
+                (log.blockNumber, log.logIndex) for log in event.get_logs(fromBlock=0)
+            ]
+
+        def scanned():
+            return [
+                (log.blockNumber, log.logIndex)
+                for log in scan_logs(
+                    event,
+                    chunk_size=options["chunk_size"],
+                    max_workers=options["workers"],
+                )
+            ]
+
+        before = measure("single get_logs(fromBlock=0)", single_call)
+        after = measure(
+            f"scan_logs (chunk={options['chunk_size']}, workers={options['workers']})",
+            scanned,
+        )
+        self.report([before, after])
+        if before["result"] != after["result"]:
+            self.stderr.write("logs differ between the single call and the scanner")
+
+    def scenario_student_filter(self, options):
+        """Certificates of one student: download-and-filter against node-side topic filtering."""
+        manager = self.load_manager()
+        if manager is None:
+            return
+        event = manager.get_contract().events.CertificateRegistered
+        student = options["student"] or next(iter(scan_logs(event))).args.student
+        self.stdout.write(f"Student {student}")
+
+        def python_filter():
+            return [
+                log.args.diplomaId
+                for log in scan_logs(event, chunk_size=options["chunk_size"])
+                if log.args.student.lower() == student.lower()
+            ]
+
+        def topic_filter():
+            return [
+                log.args.diplomaId
+                for log in scan_logs(
+                    event,
+                    chunk_size=options["chunk_size"],
+                    argument_filters={"student": student},
+                )
+            ]
+
+        before = measure("all logs, filtered in Python", python_filter)
+        after = measure("student topic filter", topic_filter)
+        self.report([before, after])
+        if before["result"] != after["result"]:
+            self.stderr.write("certificates differ between Python and topic filtering")
+
+    def scenario_wallet_balance(self, options):
+        """Throughput of wallet/balance: a new provider per request against the shared registry."""
+        from app.api.wallet.router import WalletBalanceRequest, get_balance
+
+        manager = self.load_manager()
+        if manager is None:
+            return
+        rpc_url = manager.web3.provider.endpoint_uri
+        address = manager.web3.eth.accounts[0]
+        total, concurrency = options["requests"], options["concurrency"]
+
+        def provider_per_request(_):
+            w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 30}))
+            return str(w3.eth.get_balance(Web3.to_checksum_address(address)))
+
+        def registry_view(_):
+            return get_balance(
+                None, WalletBalanceRequest(address=address, rpc_url=rpc_url)
+            ).balance
+
+        def run(func):
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                return set(executor.map(func, range(total)))
+
+        get_web3(rpc_url)  # warm the registry so both runs start with a connected node
+        rows = [
+            measure("new Web3 provider per request", lambda: run(provider_per_request)),
+            measure("shared provider registry", lambda: run(registry_view)),
+        ]
+        self.stdout.write(f"{total} requests, {concurrency} client threads")
+        self.report_throughput(rows, total)
+        if rows[0]["result"] != rows[1]["result"]:
+            self.stderr.write("balances differ between the two runs")
+
+    def scenario_contract_reload(self, options):
+        """Disk I/O of loading the contract per request against the change-detecting ContractManager.refresh()."""
+        manager = self.load_manager()
+        if manager is None:
+            return
+        total = options["requests"]
+
+        def per_request_reload():
+            # What every role endpoint used to do: re-read the ABI and address and rebuild the contract.
+            abi, address, _ = read_contract_artifacts(*manager.artifact_paths())
+            return manager.web3.eth.contract(
+                address=Web3.to_checksum_address(address), abi=abi
+            ).address
+
+        def cached_refresh():
+            manager.refresh()
+            return manager.get_contract().address
+
+        for label, func in (
+            ("reload artifacts per request", per_request_reload),
+            ("ContractManager.refresh()", cached_refresh),
+        ):
+            with count_file_io() as counter:
+                started = time.perf_counter()
+                addresses = {func() for _ in range(total)}
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label:<40} {counter['opens']:>8} opens {counter['bytes']:>12} bytes {counter['stats']:>8} stats "
+                f"{elapsed * 1e6 / total:>10.1f}us/request"
+            )
+            if len(addresses) != 1:
+                self.stderr.write(f"{label}: contract address changed during the run")
+
+    def scenario_async_endpoints(self, options):
+        """Throughput of the sync endpoints against their /async/ variants with many concurrent clients."""
+        manager = self.load_manager()
+        if manager is None:
+            return
+        address = manager.web3.eth.accounts[0]
+        event = manager.get_contract().events.CertificateRegistered
+        first = next(scan_logs(event), None)
+        cert_hash = Web3.to_hex(first.args.diplomaId) if first else "0x" + "00" * 32
+        prefix = "/app/v1/smartcontracts"
+        paths = [
+            ("check_roles", f"/check_roles/{address}"),
+            ("verify_certificate", f"/verify_certificate/{cert_hash}"),
+            ("validate_certificate", f"/validate_certificate/?cert_hash={cert_hash}"),
+        ]
+        total, clients = options["requests"], options["clients"]
+        self.stdout.write(f"{total} requests per run, {clients} concurrent clients")
+        for name, path in paths:
+            for label, url in (
+                (f"{name} (sync)", f"{prefix}/smartcontract{path}"),
+                (f"{name} (async)", f"{prefix}/async{path}"),
+            ):
+                started = time.perf_counter()
+                statuses = asyncio.run(
+                    self._load(url, total, clients, options.get("base_url"))
+                )
+                elapsed = time.perf_counter() - started
+                failed = sum(1 for status in statuses if status != 200)
+                self.stdout.write(
+                    f"{label:<40} {total / elapsed:>10.1f} req/s {failed:>8} failed"
+                )
+
+    async def _load(self, url, total, clients, base_url=None):
+        remaining = iter(range(total))
+        statuses = []
+        if base_url:
+            import aiohttp
+
+            async with aiohttp.ClientSession(base_url.rstrip("/")) as session:
+
+                async def client():
+                    for _ in remaining:
+                        async with session.get(url) as response:
+                            await response.read()
+                            statuses.append(response.status)
+
+                await asyncio.gather(*(client() for _ in range(clients)))
+        else:
+            # Django runs sync views on its single thread-sensitive executor under
+            # ASGI, exactly as it would under daphne.
+            from django.test import AsyncClient
+
+            async_client = AsyncClient()
+
+            async def client():
+                for _ in remaining:
+                    statuses.append((await async_client.get(url)).status_code)
+
+            await asyncio.gather(*(client() for _ in range(clients)))
+        return statuses
@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.api.smartcontract.contract_manager import ContractManager
+from app.api.smartcontract.export import EXPORT_FORMATS, EXPORT_PAGE_SIZE, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream the certificate registry as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=sorted(EXPORT_FORMATS), default="ndjson"
+        )
+        parser.add_argument(
+            "--from-block",
+            type=int,
+            default=None,
+            help="Resume an export from this block (inclusive)",
+        )
+        parser.add_argument("--page-size", type=int, default=EXPORT_PAGE_SIZE)
+        parser.add_argument("--output", help="File to write to (default: stdout)")
+
+    def handle(self, *args, **options):
+        manager = ContractManager()
+        manager.refresh()
+        if manager.get_contract() is None:
+            raise CommandError(f"Contract not loaded: {manager.get_error()}")
+
+        lines = export_lines(
+            manager,
+            options["format"],
+            from_block=options["from_block"],
+            page_size=options["page_size"],
+        )
+        if options["output"]:
+            with open(options["output"], "w", newline="") as f:
+                count = self._write(f, lines)
+            self.stderr.write(
+                self.style.SUCCESS(f"Wrote {count} lines to {options['output']}")
+            )
+        else:
+            self._write(sys.stdout, lines)
+
+    @staticmethod
+    def _write(f, lines):
+        count = 0
+        for line in lines:
+            f.write(line)
+            count += 1
+        return count
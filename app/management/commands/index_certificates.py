@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from app.api.smartcontract import indexer
+
+
+class Command(BaseCommand):
+    help = "Index CertificateRegistered / CertificateRevoked events into the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Index up to the current head and exit"
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=indexer.INDEXER_POLL_INTERVAL
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=indexer.INDEXER_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--confirmations", type=int, default=indexer.INDEXER_CONFIRMATIONS
+        )
+        parser.add_argument(
+            "--start-block", type=int, default=indexer.INDEXER_START_BLOCK
+        )
+
+    def handle(self, *args, **options):
+        certificate_indexer = indexer.CertificateIndexer(
+            batch_size=options["batch_size"],
+            confirmations=options["confirmations"],
+            start_block=options["start_block"],
+        )
+        if options["once"]:
+            written = certificate_indexer.sync_once()
+            self.stdout.write(
+                self.style.SUCCESS(f"Indexed {written} certificate events")
+            )
+            return
+        self.stdout.write(
+            f"Tailing certificate events every {options['poll_interval']}s..."
+        )
+        certificate_indexer.run_forever(poll_interval=options["poll_interval"])
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from app.api.smartcontract import tx_watcher
+
+
+class Command(BaseCommand):
+    help = "Finalise pending wallet transactions and transaction jobs from their receipts, once per new block"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Check the pending transactions once and exit",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=tx_watcher.TX_WATCH_POLL_INTERVAL
+        )
+        parser.add_argument(
+            "--drop-timeout",
+            type=float,
+            default=tx_watcher.TX_WATCH_DROP_TIMEOUT,
+            help="Seconds without a receipt before a transaction unknown to the node is dropped",
+        )
+
+    def handle(self, *args, **options):
+        watcher = tx_watcher.TransactionWatcher(drop_timeout=options["drop_timeout"])
+        if options["once"]:
+            counts = watcher.sync_once()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Updated {sum(counts.values())} transactions {dict(counts)}"
+                )
+            )
+            return
+        self.stdout.write(
+            f"Watching pending transactions every {options['poll_interval']}s..."
+        )
+        watcher.run_forever(poll_interval=options["poll_interval"])
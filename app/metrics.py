@@ -0,0 +1,170 @@
+import bisect
+import hmac
+import os
+import threading
+
+from django.http import HttpResponse, HttpResponseForbidden
+
+# /metrics answers requests carrying "Authorization: Bearer <METRICS_AUTH_TOKEN>"
+# and, without the token, only clients in METRICS_ALLOWED_IPS.
+METRICS_AUTH_TOKEN = os.getenv("METRICS_AUTH_TOKEN", "")
+METRICS_ALLOWED_IPS = frozenset(
+    ip.strip()
+    for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if ip.strip()
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [
+        f'{name}="{_escape(value)}"'
+        for name, value in list(zip(names, values, strict=True)) + list(extra)
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return (
+        "+Inf"
+        if value == float("inf")
+        else repr(float(value))
+        if isinstance(value, float)
+        else str(value)
+    )
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(
+                    f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                )
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "buckets": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            series["buckets"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels[name] for name in self.labelnames))
+        return series["count"] if series else 0
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, hits in zip(
+                    self.buckets + (float("inf"),), series["buckets"], strict=True
+                ):
+                    cumulative += hits
+                    le = _labels(self.labelnames, key, [("le", _number(bound))])
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                lines.append(
+                    f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series['sum'])}"
+                )
+                lines.append(
+                    f"{self.name}_count{_labels(self.labelnames, key)} {series['count']}"
+                )
+        return lines
+
+
+class Registry:
+    """Metrics of this process, rendered in the Prometheus text exposition format (0.0.4).
+
+    Values live in process memory: with several gunicorn or Celery worker
+    processes each one has its own registry, and a scrape of /metrics only
+    sees the process that served it.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+
+def metrics_allowed(request):
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+    if METRICS_AUTH_TOKEN and hmac.compare_digest(
+        authorization, f"Bearer {METRICS_AUTH_TOKEN}"
+    ):
+        return True
+    return request.META.get("REMOTE_ADDR") in METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, restricted to METRICS_AUTH_TOKEN holders and METRICS_ALLOWED_IPS."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,6 +1,6 @@
 import logging
 import uuid
-import threading
+from contextvars import ContextVar
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +22,18 @@ class RequestLoggingMiddleware:
 
         return response
 
-_thread_locals = threading.local()
+# Context variables rather than thread-locals, so that the values follow the
+# request into async views and, through instrumentation.in_current_context,
+# into executor threads.
+_trace_id = ContextVar('trace_id', default=None)
+_route = ContextVar('route', default=None)
 
 def get_current_trace_id():
-    return getattr(_thread_locals, 'trace_id', None)
+    return _trace_id.get()
+
+def get_current_route():
+    """URL pattern of the view handling the current request, e.g. "app/v1/.../verify_certificate/<cert_hash>"."""
+    return _route.get()
 
 class TraceIDMiddleware:
     def __init__(self, get_response):
@@ -33,7 +41,17 @@ class TraceIDMiddleware:
 
     def __call__(self, request):
         trace_id = request.headers.get('X-Trace-ID', str(uuid.uuid4()))
-        _thread_locals.trace_id = trace_id
-        response = self.get_response(request)
+        trace_token = _trace_id.set(trace_id)
+        route_token = _route.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _trace_id.reset(trace_token)
+            _route.reset(route_token)
         response['X-Trace-ID'] = trace_id
         return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The URL is resolved by now; the pattern (not the path) keeps the metrics label bounded.
+        match = request.resolver_match
+        _route.set(match.route if match else None)
@@ -0,0 +1,139 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0007_account_role"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexerCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("contract_address", models.CharField(max_length=42, unique=True)),
+                (
+                    "block_number",
+                    models.BigIntegerField(
+                        default=-1,
+                        help_text="Last block whose events are fully indexed.",
+                    ),
+                ),
+                (
+                    "block_hash",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="Hash of the checkpoint block, used to detect reorgs.",
+                        max_length=66,
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="IndexedCertificate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("contract_address", models.CharField(max_length=42)),
+                ("diploma_id", models.CharField(max_length=66)),
+                ("issuer", models.CharField(max_length=42)),
+                ("student", models.CharField(max_length=42)),
+                ("issued_at", models.BigIntegerField()),
+                ("metadata", models.TextField(blank=True, default="")),
+                ("storage_mode", models.PositiveSmallIntegerField(default=0)),
+                ("ipfs_hash", models.CharField(blank=True, default="", max_length=255)),
+                ("block_number", models.BigIntegerField()),
+                ("block_hash", models.CharField(max_length=66)),
+                ("transaction_hash", models.CharField(max_length=66)),
+                ("log_index", models.IntegerField()),
+                ("gas_used", models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "contract_address",
+                            "issuer",
+                            "block_number",
+                            "log_index",
+                        ],
+                        name="idx_cert_issuer",
+                    ),
+                    models.Index(
+                        fields=[
+                            "contract_address",
+                            "student",
+                            "block_number",
+                            "log_index",
+                        ],
+                        name="idx_cert_student",
+                    ),
+                    models.Index(
+                        fields=["contract_address", "diploma_id"],
+                        name="idx_cert_diploma",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("contract_address", "block_number", "log_index"),
+                        name="uniq_indexed_certificate_log",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="IndexedRevocation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("contract_address", models.CharField(max_length=42)),
+                ("diploma_id", models.CharField(max_length=66)),
+                ("block_number", models.BigIntegerField()),
+                ("block_hash", models.CharField(max_length=66)),
+                ("block_timestamp", models.BigIntegerField(blank=True, null=True)),
+                ("transaction_hash", models.CharField(max_length=66)),
+                ("log_index", models.IntegerField()),
+                ("gas_used", models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["contract_address", "diploma_id"],
+                        name="idx_revocation_diploma",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("contract_address", "block_number", "log_index"),
+                        name="uniq_indexed_revocation_log",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0008_certificate_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("contract_address", models.CharField(max_length=42, unique=True)),
+                (
+                    "block_number",
+                    models.BigIntegerField(
+                        default=-1, help_text="Last block folded into the rollup."
+                    ),
+                ),
+                ("registrations", models.BigIntegerField(default=0)),
+                ("offchain_registrations", models.BigIntegerField(default=0)),
+                ("revocations", models.BigIntegerField(default=0)),
+                ("total_gas", models.BigIntegerField(default=0)),
+                (
+                    "recent_operations",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Latest operations, newest first.",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:47
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0009_dashboard_rollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransactionJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        help_text="Which transaction to send, see app/api/smartcontract/tx_jobs.py.",
+                        max_length=50,
+                    ),
+                ),
+                ("params", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("submitting", "Submitting"),
+                            ("submitted", "Submitted"),
+                            ("confirmed", "Confirmed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "tx_hash",
+                    models.CharField(
+                        blank=True, db_index=True, default="", max_length=66
+                    ),
+                ),
+                ("block_number", models.BigIntegerField(blank=True, null=True)),
+                ("gas_used", models.BigIntegerField(blank=True, null=True)),
+                ("error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"], name="idx_txjob_status"
+                    )
+                ],
+            },
+        ),
+    ]
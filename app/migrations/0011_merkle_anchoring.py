@@ -0,0 +1,125 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0010_transaction_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MerkleBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("contract_address", models.CharField(max_length=42)),
+                ("root", models.CharField(max_length=66)),
+                ("leaf_count", models.IntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("anchoring", "Anchoring"),
+                            ("anchored", "Anchored"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("anchored_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="merkle_batches",
+                        to="app.transactionjob",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AnchoredCertificate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("contract_address", models.CharField(max_length=42)),
+                (
+                    "diploma_id",
+                    models.CharField(help_text="Lower-case hex, no 0x.", max_length=66),
+                ),
+                ("student", models.CharField(max_length=42)),
+                ("issuer", models.CharField(blank=True, default="", max_length=42)),
+                ("metadata", models.TextField(blank=True, default="")),
+                ("ipfs_hash", models.CharField(blank=True, default="", max_length=255)),
+                ("leaf_index", models.IntegerField(blank=True, null=True)),
+                (
+                    "proof",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Sibling hashes from the leaf up to the root.",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "batch",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Empty until the certificate is sealed into a batch.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="certificates",
+                        to="app.merklebatch",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="merklebatch",
+            index=models.Index(
+                fields=["status", "created_at"], name="idx_merkle_batch_status"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="merklebatch",
+            constraint=models.UniqueConstraint(
+                fields=("contract_address", "root"), name="uniq_merkle_batch_root"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="anchoredcertificate",
+            index=models.Index(
+                fields=["contract_address", "batch", "created_at"],
+                name="idx_anchored_pending",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="anchoredcertificate",
+            constraint=models.UniqueConstraint(
+                fields=("contract_address", "diploma_id"),
+                name="uniq_anchored_certificate",
+            ),
+        ),
+    ]
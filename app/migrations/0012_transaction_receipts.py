@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0011_merkle_anchoring"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="block_number",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="gas_used",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="rpc_url",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Node the transaction was sent to; empty for the default one.",
+                max_length=255,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="status",
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:02
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0012_transaction_receipts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProvisioningJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("role", models.CharField(max_length=20)),
+                ("count", models.IntegerField()),
+                ("name_prefix", models.CharField(max_length=80)),
+                ("rpc_url", models.CharField(max_length=255)),
+                (
+                    "fund_amount_wei",
+                    models.CharField(
+                        help_text="Decimal string; wei amounts overflow BigIntegerField.",
+                        max_length=78,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                    ),
+                ),
+                ("error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ProvisionedWallet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.IntegerField()),
+                ("address", models.CharField(max_length=42)),
+                ("status", models.CharField(default="created", max_length=20)),
+                (
+                    "fund_tx_hash",
+                    models.CharField(blank=True, default="", max_length=66),
+                ),
+                (
+                    "role_tx_hash",
+                    models.CharField(blank=True, default="", max_length=66),
+                ),
+                ("error", models.TextField(blank=True, default="")),
+                (
+                    "account",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="app.account",
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="wallets",
+                        to="app.provisioningjob",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("job", "index"), name="uniq_provisioned_wallet_index"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0013_wallet_provisioning"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="indexercheckpoint",
+            name="rewinds",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Reorg rewinds so far; readers caching indexed rows reload when it changes.",
+            ),
+        ),
+    ]
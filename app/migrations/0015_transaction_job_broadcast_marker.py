@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0014_indexer_checkpoint_rewinds"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transactionjob",
+            name="nonce",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="transactionjob",
+            name="sender",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Set with nonce (and tx_hash when signed locally) right before the broadcast.",
+                max_length=42,
+            ),
+        ),
+    ]
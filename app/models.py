@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
@@ -44,12 +46,240 @@ class Certificate(models.Model):
         return f"Certificate {self.diploma_id} for {self.student_address}"
 
 class Transaction(models.Model):
+    PENDING = 'pending'
+    CONFIRMED = 'confirmed'
+    FAILED = 'failed'
+    DROPPED = 'dropped'
+
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='transactions')
     tx_hash = models.CharField(max_length=66, unique=True)
     to_address = models.CharField(max_length=42)
     amount = models.BigIntegerField()
-    status = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, db_index=True)
+    rpc_url = models.CharField(max_length=255, blank=True, default="", help_text="Node the transaction was sent to; empty for the default one.")
+    block_number = models.BigIntegerField(null=True, blank=True)
+    gas_used = models.BigIntegerField(null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.tx_hash
+
+class IndexerCheckpoint(models.Model):
+    contract_address = models.CharField(max_length=42, unique=True)
+    block_number = models.BigIntegerField(default=-1, help_text="Last block whose events are fully indexed.")
+    block_hash = models.CharField(max_length=66, blank=True, default="", help_text="Hash of the checkpoint block, used to detect reorgs.")
+    rewinds = models.PositiveIntegerField(default=0, help_text="Reorg rewinds so far; readers caching indexed rows reload when it changes.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.contract_address} @ {self.block_number}"
+
+class IndexedCertificate(models.Model):
+    contract_address = models.CharField(max_length=42)
+    diploma_id = models.CharField(max_length=66)
+    issuer = models.CharField(max_length=42)
+    student = models.CharField(max_length=42)
+    issued_at = models.BigIntegerField()
+    metadata = models.TextField(blank=True, default="")
+    storage_mode = models.PositiveSmallIntegerField(default=0)
+    ipfs_hash = models.CharField(max_length=255, blank=True, default="")
+    block_number = models.BigIntegerField()
+    block_hash = models.CharField(max_length=66)
+    transaction_hash = models.CharField(max_length=66)
+    log_index = models.IntegerField()
+    gas_used = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['contract_address', 'block_number', 'log_index'], name='uniq_indexed_certificate_log'),
+        ]
+        indexes = [
+            models.Index(fields=['contract_address', 'issuer', 'block_number', 'log_index'], name='idx_cert_issuer'),
+            models.Index(fields=['contract_address', 'student', 'block_number', 'log_index'], name='idx_cert_student'),
+            models.Index(fields=['contract_address', 'diploma_id'], name='idx_cert_diploma'),
+        ]
+
+    def __str__(self):
+        return f"Indexed certificate {self.diploma_id} (block {self.block_number})"
+
+class IndexedRevocation(models.Model):
+    contract_address = models.CharField(max_length=42)
+    diploma_id = models.CharField(max_length=66)
+    block_number = models.BigIntegerField()
+    block_hash = models.CharField(max_length=66)
+    block_timestamp = models.BigIntegerField(null=True, blank=True)
+    transaction_hash = models.CharField(max_length=66)
+    log_index = models.IntegerField()
+    gas_used = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['contract_address', 'block_number', 'log_index'], name='uniq_indexed_revocation_log'),
+        ]
+        indexes = [
+            models.Index(fields=['contract_address', 'diploma_id'], name='idx_revocation_diploma'),
+        ]
+
+    def __str__(self):
+        return f"Indexed revocation {self.diploma_id} (block {self.block_number})"
+
+class DashboardRollup(models.Model):
+    contract_address = models.CharField(max_length=42, unique=True)
+    block_number = models.BigIntegerField(default=-1, help_text="Last block folded into the rollup.")
+    registrations = models.BigIntegerField(default=0)
+    offchain_registrations = models.BigIntegerField(default=0)
+    revocations = models.BigIntegerField(default=0)
+    total_gas = models.BigIntegerField(default=0)
+    recent_operations = models.JSONField(default=list, blank=True, help_text="Latest operations, newest first.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard rollup {self.contract_address} @ {self.block_number}"
+
+
+class TransactionJob(models.Model):
+    QUEUED = 'queued'
+    SUBMITTING = 'submitting'
+    SUBMITTED = 'submitted'
+    CONFIRMED = 'confirmed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (SUBMITTING, 'Submitting'),
+        (SUBMITTED, 'Submitted'),
+        (CONFIRMED, 'Confirmed'),
+        (FAILED, 'Failed'),
+    ]
+    FINAL_STATUSES = (CONFIRMED, FAILED)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50, help_text="Which transaction to send, see app/api/smartcontract/tx_jobs.py.")
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    tx_hash = models.CharField(max_length=66, blank=True, default="", db_index=True)
+    sender = models.CharField(max_length=42, blank=True, default="", help_text="Set with nonce (and tx_hash when signed locally) right before the broadcast.")
+    nonce = models.BigIntegerField(null=True, blank=True)
+    block_number = models.BigIntegerField(null=True, blank=True)
+    gas_used = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='idx_txjob_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
+
+
+class MerkleBatch(models.Model):
+    PENDING = 'pending'
+    ANCHORING = 'anchoring'
+    ANCHORED = 'anchored'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (ANCHORING, 'Anchoring'),
+        (ANCHORED, 'Anchored'),
+        (FAILED, 'Failed'),
+    ]
+
+    contract_address = models.CharField(max_length=42)
+    root = models.CharField(max_length=66)
+    leaf_count = models.IntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    job = models.ForeignKey(TransactionJob, null=True, blank=True, on_delete=models.SET_NULL, related_name='merkle_batches')
+    created_at = models.DateTimeField(auto_now_add=True)
+    anchored_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['contract_address', 'root'], name='uniq_merkle_batch_root'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='idx_merkle_batch_status'),
+        ]
+
+    def __str__(self):
+        return f"Merkle batch {self.root} ({self.leaf_count} leaves, {self.status})"
+
+
+class AnchoredCertificate(models.Model):
+    contract_address = models.CharField(max_length=42)
+    diploma_id = models.CharField(max_length=66, help_text="Lower-case hex, no 0x.")
+    student = models.CharField(max_length=42)
+    issuer = models.CharField(max_length=42, blank=True, default="")
+    metadata = models.TextField(blank=True, default="")
+    ipfs_hash = models.CharField(max_length=255, blank=True, default="")
+    batch = models.ForeignKey(MerkleBatch, null=True, blank=True, on_delete=models.SET_NULL, related_name='certificates',
+                              help_text="Empty until the certificate is sealed into a batch.")
+    leaf_index = models.IntegerField(null=True, blank=True)
+    proof = models.JSONField(default=list, blank=True, help_text="Sibling hashes from the leaf up to the root.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['contract_address', 'diploma_id'], name='uniq_anchored_certificate'),
+        ]
+        indexes = [
+            models.Index(fields=['contract_address', 'batch', 'created_at'], name='idx_anchored_pending'),
+        ]
+
+    def __str__(self):
+        return f"Anchored certificate {self.diploma_id}"
+
+
+class ProvisioningJob(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    role = models.CharField(max_length=20)
+    count = models.IntegerField()
+    name_prefix = models.CharField(max_length=80)
+    rpc_url = models.CharField(max_length=255)
+    fund_amount_wei = models.CharField(max_length=78, help_text="Decimal string; wei amounts overflow BigIntegerField.")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Provisioning {self.count} {self.role} wallets ({self.status})"
+
+
+class ProvisionedWallet(models.Model):
+    # Progress of one wallet: created -> funded -> ready, or failed.
+    CREATED = 'created'
+    FUNDED = 'funded'
+    READY = 'ready'
+    FAILED = 'failed'
+    FINAL_STATUSES = (READY, FAILED)
+
+    job = models.ForeignKey(ProvisioningJob, on_delete=models.CASCADE, related_name='wallets')
+    index = models.IntegerField()
+    account = models.OneToOneField(Account, on_delete=models.SET_NULL, null=True, blank=True)
+    address = models.CharField(max_length=42)
+    status = models.CharField(max_length=20, default=CREATED)
+    fund_tx_hash = models.CharField(max_length=66, blank=True, default="")
+    role_tx_hash = models.CharField(max_length=66, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'index'], name='uniq_provisioned_wallet_index'),
+        ]
+
+    def __str__(self):
+        return f"{self.address} ({self.status})"
@@ -0,0 +1,111 @@
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+from web3.exceptions import TimeExhausted
+
+from app.models import TransactionJob
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def submit_transaction_job(job_id):
+    """Send the job's transaction, then hand it over to track_transaction_job."""
+    from app.api.smartcontract.nonces import recording_broadcasts
+    from app.api.smartcontract.rpc_batch import to_hex_hash
+    from app.api.smartcontract.tx_jobs import SUBMITTERS, TX_JOB_POLL_INTERVAL
+
+    # Claim the job first: a redelivered message must not send the transaction twice.
+    claimed = TransactionJob.objects.filter(
+        pk=job_id, status=TransactionJob.QUEUED
+    ).update(status=TransactionJob.SUBMITTING, updated_at=timezone.now())
+    if not claimed:
+        return
+    job = TransactionJob.objects.get(pk=job_id)
+    submitting = TransactionJob.objects.filter(
+        pk=job_id, status=TransactionJob.SUBMITTING
+    )
+
+    def mark(sender, nonce, tx_hash):
+        # Stored before the broadcast so the watcher can reconcile the job if this worker dies.
+        submitting.update(
+            sender=sender,
+            nonce=nonce,
+            tx_hash=to_hex_hash(tx_hash) if tx_hash else "",
+            updated_at=timezone.now(),
+        )
+
+    try:
+        with recording_broadcasts(mark):
+            _, tx_hash = SUBMITTERS[job.kind](job.params)
+    except Exception as e:
+        logger.error(f"Transaction job {job_id} ({job.kind}) failed to submit: {e}")
+        submitting.update(
+            status=TransactionJob.FAILED, error=str(e), updated_at=timezone.now()
+        )
+        return
+    tx_hash = to_hex_hash(tx_hash)
+    if not submitting.update(
+        tx_hash=tx_hash, status=TransactionJob.SUBMITTED, updated_at=timezone.now()
+    ):
+        return
+    logger.info(f"Transaction job {job_id} ({job.kind}) submitted: {tx_hash}")
+    track_transaction_job.apply_async((job_id,), countdown=TX_JOB_POLL_INTERVAL)
+
+
+@shared_task(bind=True, max_retries=None)
+def track_transaction_job(self, job_id):
+    """Wait (briefly) for the receipt and record the outcome; retried until mined or TX_JOB_TIMEOUT.
+
+    Run eagerly (CELERY_TASK_ALWAYS_EAGER) a retry would block the calling
+    request, so the receipt is looked up once and a job not mined yet is left
+    SUBMITTED for the transaction watcher and GET /tx to finish.
+    """
+    from app.api.smartcontract.tx_jobs import (
+        TX_JOB_POLL_INTERVAL,
+        TX_JOB_RECEIPT_WAIT,
+        TX_JOB_TIMEOUT,
+        check_receipt,
+        fail_job,
+        job_web3,
+        record_receipt,
+    )
+
+    job = TransactionJob.objects.get(pk=job_id)
+    if job.status != TransactionJob.SUBMITTED:
+        return
+    if self.request.is_eager:
+        check_receipt(job)
+        return
+    web3 = job_web3(job)
+    try:
+        receipt = web3.eth.wait_for_transaction_receipt(
+            job.tx_hash, timeout=TX_JOB_RECEIPT_WAIT, poll_latency=0.5
+        )
+    except Exception as e:
+        # Not mined yet (TimeExhausted) or the node is unreachable: look again later.
+        if (timezone.now() - job.created_at).total_seconds() > TX_JOB_TIMEOUT:
+            fail_job(job, f"No receipt within {TX_JOB_TIMEOUT:.0f}s ({e})")
+            return
+        if not isinstance(e, TimeExhausted):
+            logger.warning(f"Receipt lookup for transaction job {job_id} failed: {e}")
+        raise self.retry(countdown=TX_JOB_POLL_INTERVAL) from e
+    record_receipt(job, receipt)
+
+
+@shared_task
+def seal_merkle_batch(contract_address, sender):
+    """Seal the pending certificates of ``contract_address`` into a Merkle batch and queue its anchor."""
+    from app.api.smartcontract.anchoring import seal_batch
+
+    batch = seal_batch(contract_address, sender)
+    return batch.root if batch else None
+
+
+@shared_task
+def provision_wallets(job_id):
+    """Create, fund and grant roles to the wallets of a ProvisioningJob."""
+    from app.api.wallet.provisioning import run_provisioning
+
+    run_provisioning(job_id)
@@ -7,6 +7,7 @@ from django.conf import settings
 
 from app.api.api import api
 from app.api.auth.admin_login import admin_login
+from app.metrics import metrics_view
 from app.views import issuer_certificates
 
 urlpatterns = [
@@ -14,4 +15,5 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/admin/login/", admin_login, name="admin_login"),
     path("issuer/certificates/", issuer_certificates, name="issuer_certificates"),
+    path("metrics", metrics_view, name="metrics"),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
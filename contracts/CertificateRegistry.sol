@@ -2,6 +2,7 @@
 pragma solidity ^0.8.25;
 
 import "@openzeppelin/contracts/access/AccessControl.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
 
 contract CertificateRegistry is AccessControl {
     bytes32 public constant ISSUER_ROLE = keccak256("ISSUER_ROLE");
@@ -24,6 +25,11 @@ contract CertificateRegistry is AccessControl {
 
     mapping(bytes32 => Certificate) public certificates;
     mapping(address => bytes32[]) public certificatesByStudent;
+    // Merkle anchoring: only the root of a batch is stored; proofs are kept off-chain.
+    // Leaves are keccak256(abi.encodePacked(diplomaId, student)), pairs are hashed sorted.
+    mapping(bytes32 => uint256) public merkleRoots;
+    mapping(bytes32 => address) public merkleRootIssuers;
+    mapping(bytes32 => bool) public anchoredRevoked;
 
     event CertificateRegistered(
         bytes32 indexed diplomaId,
@@ -36,6 +42,8 @@ contract CertificateRegistry is AccessControl {
         bytes pdfOnChain
     );
     event CertificateRevoked(bytes32 indexed certHash);
+    event CertificateSkipped(bytes32 indexed diplomaId, string reason);
+    event MerkleRootAnchored(bytes32 indexed root, address indexed issuer, uint256 leafCount, uint256 anchoredAt);
 
     constructor() {
         _grantRole(DEFAULT_ADMIN_ROLE, msg.sender);
@@ -59,6 +67,44 @@ contract CertificateRegistry is AccessControl {
             require(bytes(ipfsHash).length > 0, "IPFS hash is required for off-chain storage");
         }
 
+        _storeCertificate(diplomaId, student, metadata, storageMode, pdfOnChain, ipfsHash);
+    }
+
+    /// Registers many off-chain (IPFS) certificates in one transaction. Invalid or
+    /// already registered entries are skipped with a CertificateSkipped event instead
+    /// of reverting the whole batch; the others emit CertificateRegistered as usual.
+    function registerCertificatesBatch(
+        bytes32[] calldata diplomaIds,
+        address[] calldata students,
+        string[] calldata metadata,
+        string[] calldata ipfsHashes
+    ) external onlyRole(ISSUER_ROLE) returns (uint256 registered) {
+        require(
+            students.length == diplomaIds.length && metadata.length == diplomaIds.length && ipfsHashes.length == diplomaIds.length,
+            "Array lengths differ"
+        );
+        for (uint256 i = 0; i < diplomaIds.length; i++) {
+            if (students[i] == address(0)) {
+                emit CertificateSkipped(diplomaIds[i], "Invalid student address");
+            } else if (certificates[diplomaIds[i]].issuedAt != 0) {
+                emit CertificateSkipped(diplomaIds[i], "Certificate already exists");
+            } else if (bytes(ipfsHashes[i]).length == 0) {
+                emit CertificateSkipped(diplomaIds[i], "IPFS hash is required for off-chain storage");
+            } else {
+                _storeCertificate(diplomaIds[i], students[i], metadata[i], StorageMode.OFF_CHAIN, "", ipfsHashes[i]);
+                registered++;
+            }
+        }
+    }
+
+    function _storeCertificate(
+        bytes32 diplomaId,
+        address student,
+        string memory metadata,
+        StorageMode storageMode,
+        bytes memory pdfOnChain,
+        string memory ipfsHash
+    ) internal {
         certificates[diplomaId] = Certificate({
             diplomaId: diplomaId,
             issuer: msg.sender,
@@ -89,6 +135,48 @@ contract CertificateRegistry is AccessControl {
         emit CertificateRevoked(certHash);
     }
 
+    function anchorMerkleRoot(bytes32 root, uint256 leafCount) external onlyRole(ISSUER_ROLE) {
+        require(root != bytes32(0), "Invalid root");
+        require(merkleRoots[root] == 0, "Root already anchored");
+        merkleRoots[root] = block.timestamp;
+        merkleRootIssuers[root] = msg.sender;
+        emit MerkleRootAnchored(root, msg.sender, leafCount, block.timestamp);
+    }
+
+    function verifyAnchoredCertificate(
+        bytes32 root,
+        bytes32 diplomaId,
+        address student,
+        bytes32[] calldata proof
+    ) external view returns (bool valid, bool isRevoked, uint256 anchoredAt) {
+        anchoredAt = merkleRoots[root];
+        bytes32 leaf = keccak256(abi.encodePacked(diplomaId, student));
+        valid = anchoredAt != 0 && MerkleProof.verifyCalldata(proof, root, leaf);
+        isRevoked = anchoredRevoked[diplomaId];
+    }
+
+    /// Anchored certificates are not in `certificates`; revoking one emits the usual CertificateRevoked.
+    /// Only the issuer that anchored `root` (or an admin) can revoke, with a proof that the certificate is in it.
+    function revokeAnchoredCertificate(
+        bytes32 root,
+        bytes32 diplomaId,
+        address student,
+        bytes32[] calldata proof
+    ) external {
+        require(merkleRoots[root] != 0, "Root not anchored");
+        require(
+            (msg.sender == merkleRootIssuers[root] && hasRole(ISSUER_ROLE, msg.sender))
+                || hasRole(DEFAULT_ADMIN_ROLE, msg.sender),
+            "Only the anchoring issuer or an admin can revoke"
+        );
+        bytes32 leaf = keccak256(abi.encodePacked(diplomaId, student));
+        require(MerkleProof.verifyCalldata(proof, root, leaf), "Invalid proof");
+        require(certificates[diplomaId].issuedAt == 0, "Use revokeCertificate for registered certificates");
+        require(!anchoredRevoked[diplomaId], "Certificate already revoked");
+        anchoredRevoked[diplomaId] = true;
+        emit CertificateRevoked(diplomaId);
+    }
+
     function getCertificate(bytes32 certHash) external view returns (address issuer, address student, uint256 timestamp, bool isRevoked) {
         require(certificates[certHash].issuedAt != 0, "Certificate does not exist");
         Certificate memory cert = certificates[certHash];
@@ -132,6 +220,19 @@ contract CertificateRegistry is AccessControl {
         _revokeRole(STUDENT_ROLE, account);
     }
 
+    /// Bulk onboarding: one transaction grants the role to a whole cohort (already granted accounts are skipped).
+    function grantStudentRoles(address[] calldata accounts) external onlyRole(ISSUER_ROLE) {
+        for (uint256 i = 0; i < accounts.length; i++) {
+            _grantRole(STUDENT_ROLE, accounts[i]);
+        }
+    }
+
+    function grantIssuerRoles(address[] calldata accounts) external onlyRole(DEFAULT_ADMIN_ROLE) {
+        for (uint256 i = 0; i < accounts.length; i++) {
+            _grantRole(ISSUER_ROLE, accounts[i]);
+        }
+    }
+
     function supportsInterface(bytes4 interfaceId) public view virtual override returns (bool) {
         return interfaceId == type(IAccessControl).interfaceId || super.supportsInterface(interfaceId);
     }
@@ -1,18 +1,14 @@
-import os
 import sys
-from web3 import Web3
-
-# Add project root to the Python path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
+from datetime import datetime
 
+from app.api.smartcontract.certificate_cache import get_certificate_cache
 from app.api.smartcontract.contract_manager import ContractManager
 
+
 def get_certificate_details(cert_hash):
     """
-    Connects to the blockchain, calls the verifyCertificate function on the
-    CertificateRegistry contract, and prints the certificate details.
+    Looks up the certificate through the certificate cache (verifyCertificate on
+    the CertificateRegistry contract on a miss) and prints its details.
     """
     manager = ContractManager()
     manager.refresh()
@@ -22,28 +18,21 @@ def get_certificate_details(cert_hash):
         print(f"Contract not loaded: {manager.get_error()}")
         return
 
-    if cert_hash.startswith('0x'):
-        cert_hash_bytes = bytes.fromhex(cert_hash[2:])
-    else:
-        cert_hash_bytes = bytes.fromhex(cert_hash)
-
     try:
-        cert_data = contract.functions.verifyCertificate(cert_hash_bytes).call()
-        (exists, issuer, student, issuedAt, metadata, storageMode, pdfOnChain, ipfsHash, isRevoked) = cert_data
+        cert = get_certificate_cache().lookup(cert_hash, contract)
 
-        if not exists:
+        if cert is None:
             print("Certificate not found.")
             return
 
         print(f"Hash: {cert_hash}")
-        print(f"Issuer: {issuer}")
-        print(f"Recipient: {student}")
-        from datetime import datetime
-        print(f"Issued At: {datetime.fromtimestamp(issuedAt).strftime('%m/%d/%Y, %I:%M:%S %p')}")
-        print(f"Metadata: {metadata}")
-        print(f"IPFS Hash: {ipfsHash}")
-        print(f"Revoked: {isRevoked}")
-        print(f"Storage Mode: {'ON_CHAIN' if storageMode == 0 else 'OFF_CHAIN'}")
+        print(f"Issuer: {cert['issuer']}")
+        print(f"Recipient: {cert['student']}")
+        print(f"Issued At: {datetime.fromtimestamp(cert['issued_at']).strftime('%m/%d/%Y, %I:%M:%S %p')}")
+        print(f"Metadata: {cert['metadata']}")
+        print(f"IPFS Hash: {cert['ipfs_hash']}")
+        print(f"Revoked: {cert['is_revoked']}")
+        print(f"Storage Mode: {'ON_CHAIN' if cert['storage_mode'] == 0 else 'OFF_CHAIN'}")
 
     except Exception as e:
         print(f"An error occurred: {e}")
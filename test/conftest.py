@@ -0,0 +1,57 @@
+import os
+
+import django
+import pytest
+
+# app.settings validates these on import (app/environment.py); the unit tests never reach the services.
+TEST_ENVIRONMENT = {
+    "REDIS_PASSWORD": "test",
+    "REDIS_PORT": "6379",
+    "GANACHE_PORT": "8545",
+    "GANACHE_NETWORK_ID": "1337",
+    "GANACHE_CHAIN_ID": "1337",
+    "GANACHE_MNEMONIC": "test test test test test test test test test test test junk",
+    "GANACHE_GAS_PRICE": "1",
+    "DJANGO_SECRET_KEY": "test",
+    "DJANGO_SETTINGS_MODULE": "app.settings",
+    "WEB3_RPC": "http://localhost:8545",
+    "CHAIN_ID": "1337",
+    "IPFS_API": "/dns/localhost/tcp/5001/http",
+    "IPFS_5001_PORT": "5001",
+    "IPFS_8080_PORT": "8080",
+    "IPFS_4001_PORT": "4001",
+}
+for name, value in TEST_ENVIRONMENT.items():
+    os.environ.setdefault(name, value)
+
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+# No Redis in the test run: the shared cache is process-local.
+override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+).enable()
+
+
+@pytest.fixture(scope="session")
+def test_database():
+    """A migrated test database (in-memory SQLite) for the whole run."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    yield
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    teardown_test_environment()
+
+
+@pytest.fixture
+def db(test_database):
+    """Database access for one test; everything it writes is rolled back."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+from web3 import Web3
+
+from app.api.smartcontract import anchoring
+from app.api.smartcontract.merkle import leaf_hash, verify_proof
+from app.models import MerkleBatch, TransactionJob
+
+CONTRACT = SimpleNamespace(address="0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF")
+ISSUER = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+STUDENT = "0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69"
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    jobs = []
+
+    def enqueue(kind, **params):
+        job = TransactionJob.objects.create(kind=kind, params=params)
+        jobs.append(job)
+        return job
+
+    monkeypatch.setattr(anchoring, "enqueue_transaction", enqueue)
+    return jobs
+
+
+def _anchored_batch(count):
+    for i in range(count):
+        anchoring.queue_certificate(
+            CONTRACT, Web3.keccak(text=str(i)).hex(), STUDENT, issuer=ISSUER
+        )
+    batch = anchoring.seal_batch(CONTRACT.address, ISSUER)
+    TransactionJob.objects.filter(pk=batch.job_id).update(
+        status=TransactionJob.CONFIRMED
+    )
+    return batch
+
+
+def test_revocation_is_sent_by_the_anchoring_issuer_with_a_proof(db, queued):
+    batch = _anchored_batch(3)
+    certificate = batch.certificates.order_by("leaf_index")[1]
+
+    job = anchoring.revoke_anchored(certificate)
+    params = job.params
+    assert (params["root"], params["sender"]) == (batch.root, ISSUER)
+    assert verify_proof(
+        leaf_hash(params["cert_hash"], params["student"]),
+        params["proof"],
+        params["root"],
+    )
+
+
+def test_certificate_of_an_unanchored_batch_is_not_revoked(db, queued):
+    batch = _anchored_batch(2)
+    MerkleBatch.objects.filter(pk=batch.pk).update(status=MerkleBatch.ANCHORING)
+    TransactionJob.objects.filter(pk=batch.job_id).update(
+        status=TransactionJob.SUBMITTED
+    )
+    certificate = batch.certificates.first()
+    with pytest.raises(ValueError):
+        anchoring.revoke_anchored(certificate)
+    assert [job.kind for job in queued] == ["anchor_merkle_root"]
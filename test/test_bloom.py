@@ -0,0 +1,122 @@
+import os
+from types import SimpleNamespace
+
+from django.core.cache import cache
+
+from app.api.smartcontract import bloom as bloom_module
+from app.api.smartcontract.bloom import BloomFilter, CertificateBloom
+from app.models import IndexedCertificate
+
+CONTRACT = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter.for_capacity(1000, fp_rate=0.01)
+    items = [os.urandom(32) for _ in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    assert bloom.count == 1000
+
+
+def test_false_positive_rate_stays_near_target():
+    bloom = BloomFilter.for_capacity(1000, fp_rate=0.01)
+    for _ in range(1000):
+        bloom.add(os.urandom(32))
+    false_positives = sum(os.urandom(32) in bloom for _ in range(10000))
+    assert false_positives < 300
+    assert bloom.false_positive_rate() < 0.02
+
+
+def test_empty_filter_contains_nothing():
+    bloom = BloomFilter.for_capacity(10)
+    assert os.urandom(32) not in bloom
+
+
+def test_size_is_capped():
+    bloom = BloomFilter.for_capacity(10**9, fp_rate=0.001, max_bytes=1024)
+    assert bloom.num_bits == 1024 * 8
+    assert len(bloom.bits) == 1024
+
+
+def test_round_trip_through_bits():
+    bloom = BloomFilter.for_capacity(100)
+    item = os.urandom(32)
+    bloom.add(item)
+    copy = BloomFilter(bloom.num_bits, bloom.num_hashes, bytes(bloom.bits), bloom.count)
+    assert item in copy
+    assert copy.count == 1
+
+
+class FakeEth:
+    def __init__(self):
+        self.head = 0
+        self.calls = 0
+
+    @property
+    def block_number(self):
+        self.calls += 1
+        return self.head
+
+
+def _certificate_bloom(monkeypatch, registered):
+    # registered: (block, diplomaId) pairs, read at every scan
+    monkeypatch.setattr(
+        bloom_module,
+        "scan_logs",
+        lambda event, from_block, to_block: [
+            SimpleNamespace(args=SimpleNamespace(diplomaId=diploma))
+            for block, diploma in registered
+            if from_block <= block <= to_block
+        ],
+    )
+    cache.clear()
+    eth = FakeEth()
+    contract = SimpleNamespace(
+        address=CONTRACT,
+        w3=SimpleNamespace(eth=eth),
+        events=SimpleNamespace(CertificateRegistered=None),
+    )
+    return CertificateBloom(contract, capacity=100, refresh_interval=3600), eth
+
+
+def test_misses_are_answered_without_calling_the_node(db, monkeypatch):
+    old, new = os.urandom(32), os.urandom(32)
+    registered = [(1, old)]
+    bloom, eth = _certificate_bloom(monkeypatch, registered)
+    eth.head = 1
+    assert bloom.might_contain(old)
+    assert eth.calls == 1
+
+    # Registered after the last refresh and not indexed yet: a miss until the next refresh.
+    registered.append((2, new))
+    eth.head = 2
+    for _ in range(10):
+        assert not bloom.might_contain(os.urandom(32))
+    assert not bloom.might_contain(new)
+    assert eth.calls == 1
+
+    bloom._refreshed_at = 0
+    assert bloom.might_contain(new)
+    assert eth.calls == 2
+
+
+def test_certificates_indexed_after_the_last_refresh_are_found(db, monkeypatch):
+    bloom, eth = _certificate_bloom(monkeypatch, [])
+    eth.head = 1
+    new = os.urandom(32)
+    assert not bloom.might_contain(new)
+
+    IndexedCertificate.objects.create(
+        contract_address=bloom.contract_address,
+        diploma_id=new.hex(),
+        issuer=CONTRACT,
+        student=CONTRACT,
+        issued_at=1,
+        block_number=2,
+        block_hash="0x",
+        transaction_hash="0x",
+        log_index=0,
+    )
+    assert bloom.might_contain("0x" + new.hex())
+    assert eth.calls == 1
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+from web3.exceptions import ContractLogicError
+
+from app.api.smartcontract.certificate_cache import CertificateCache
+
+CONTRACT = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+DIPLOMA = "ab" * 32
+STUDENT = "0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69"
+
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries[key] = value
+
+    def delete(self, key):
+        self.entries.pop(key, None)
+
+
+class Call:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, diploma_id):
+        return self
+
+    def call(self):
+        self.calls += 1
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _contract(**functions):
+    return SimpleNamespace(address=CONTRACT, functions=SimpleNamespace(**functions))
+
+
+def _cache():
+    # No current contract, so cache hits skip the revocation index.
+    manager = SimpleNamespace(get_contract=lambda: None)
+    return CertificateCache(manager=manager, cache=DictCache())
+
+
+def test_malformed_hash_is_a_value_error():
+    contract = _contract(getCertificate=Call((CONTRACT, STUDENT, 1, False)))
+    for cert_hash in ("not-hex", "0xabcd", DIPLOMA + "00"):
+        with pytest.raises(ValueError):
+            _cache().lookup(cert_hash, contract)
+    assert contract.functions.getCertificate.calls == 0
+
+
+def test_abi_without_verify_certificate_uses_get_certificate():
+    contract = _contract(getCertificate=Call((CONTRACT, STUDENT, 1, False)))
+    cache = _cache()
+    record = cache.lookup("0x" + DIPLOMA, contract)
+    assert record["student"] == STUDENT and record["ipfs_hash"] == ""
+    assert cache.lookup(DIPLOMA, contract) == record
+    assert contract.functions.getCertificate.calls == 1
+
+
+def test_verify_certificate_revert_does_not_disable_it():
+    verify = Call(ContractLogicError("execution reverted"))
+    contract = _contract(verifyCertificate=verify, getCertificate=Call(None))
+    cache = _cache()
+    with pytest.raises(ContractLogicError):
+        cache.lookup(DIPLOMA, contract)
+
+    verify.result = (True, CONTRACT, STUDENT, 1, "{}", 1, b"", "Qm", False)
+    assert cache.lookup(DIPLOMA, contract)["ipfs_hash"] == "Qm"
+    assert contract.functions.getCertificate.calls == 0
@@ -0,0 +1,38 @@
+import pytest
+
+from app.api.smartcontract.queries import (
+    CERTIFICATE_PAGE_MAX_LIMIT,
+    check_page_args,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+@pytest.mark.parametrize("position", [(0, 0), (1, 2), (12345678, 99)])
+def test_cursor_round_trip(position):
+    cursor = encode_cursor(*position)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == position
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "MTIz", encode_cursor("a", 1)])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_page_args():
+    assert check_page_args() == (None, None)
+    assert check_page_args(encode_cursor(7, 3), 10, "desc") == ((7, 3), 10)
+    assert check_page_args(limit=CERTIFICATE_PAGE_MAX_LIMIT + 1) == (
+        None,
+        CERTIFICATE_PAGE_MAX_LIMIT,
+    )
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"limit": 0}, {"direction": "up"}, {"cursor": "%%"}]
+)
+def test_invalid_page_args(kwargs):
+    with pytest.raises(ValueError):
+        check_page_args(**kwargs)
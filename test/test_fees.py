@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from app.api.smartcontract.fees import GAS_ESTIMATE_MARGIN, TRANSFER_GAS, FeeOracle
+
+SENDER = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+CONTRACT = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+
+
+class FakeEth:
+    chain_id = 1337
+    block_number = 1
+    gas_price = 1
+
+    def __init__(self):
+        self.estimates = []
+        self.calls = []
+        # Gas a call needs besides its calldata; raise it to mimic a change in contract state.
+        self.execution = 30000
+
+    def _needed(self, tx):
+        data = tx.get("data", "")
+        return self.execution + 16 * (len(data) - 2) // 2
+
+    def estimate_gas(self, tx):
+        self.estimates.append(tx)
+        return self._needed(tx)
+
+    def call(self, tx):
+        self.calls.append(tx)
+        if tx["gas"] < self._needed(tx):
+            raise ValueError("out of gas")
+        return b""
+
+    def fee_history(self, *args):
+        raise ValueError("not supported")
+
+
+def _oracle():
+    eth = FakeEth()
+    # LocMemCache instances of the same name share their entries.
+    cache = LocMemCache("fees-test", {})
+    cache.clear()
+    return FeeOracle(SimpleNamespace(eth=eth), cache=cache), eth
+
+
+def _call(data):
+    return {"from": SENDER, "to": CONTRACT, "data": data}
+
+
+def test_plain_transfer_is_not_estimated():
+    oracle, eth = _oracle()
+    assert oracle.estimate_gas({"to": CONTRACT}) == TRANSFER_GAS
+    assert eth.estimates == []
+
+
+def test_estimate_covers_the_largest_calldata_of_its_bucket():
+    oracle, eth = _oracle()
+    # 5 bytes of calldata: bucket of up to 8 bytes.
+    limit = oracle.estimate_gas(_call("0x1234567800"))
+    assert limit == int((30000 + 16 * 8) * GAS_ESTIMATE_MARGIN)
+
+
+def test_same_function_and_size_bucket_reuse_the_estimate():
+    oracle, eth = _oracle()
+    first = oracle.estimate_gas(_call("0x12345678" + "00" * 30))
+    assert oracle.estimate_gas(_call("0x12345678" + "ff" * 60)) == first
+    assert len(eth.estimates) == 1
+    # The cached limit is checked with one eth_call at that limit.
+    assert [call["gas"] for call in eth.calls] == [first]
+
+
+def test_other_bucket_or_function_is_estimated_again():
+    oracle, eth = _oracle()
+    short = oracle.estimate_gas(_call("0x1234567800"))
+    long = oracle.estimate_gas(_call("0x12345678" + "00" * 64))
+    other = oracle.estimate_gas(_call("0x8765432100"))
+    assert long > short == other
+    assert len(eth.estimates) == 3
+
+
+def test_call_that_fails_at_the_cached_limit_is_estimated_live():
+    oracle, eth = _oracle()
+    first = oracle.estimate_gas(_call("0x1234567800"))
+    eth.execution = 60000
+    second = oracle.estimate_gas(_call("0x1234567800"))
+    assert second == int((60000 + 16 * 8) * GAS_ESTIMATE_MARGIN) > first
+    assert len(eth.estimates) == 2
+    # The bucket keeps the larger estimate.
+    assert oracle.estimate_gas(_call("0x1234567800")) == second
+    assert len(eth.estimates) == 2
@@ -0,0 +1,214 @@
+from types import SimpleNamespace
+
+import pytest
+from hexbytes import HexBytes
+
+from app.api.smartcontract import indexer as indexer_module
+from app.api.smartcontract.indexer import CertificateIndexer
+from app.models import IndexedCertificate, IndexedRevocation, IndexerCheckpoint
+
+CONTRACT = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+ISSUER = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+STUDENT = "0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69"
+
+
+class FakeChain:
+    """Blocks (as hashes) and the certificate logs in them; ``reorg`` replaces the tail."""
+
+    def __init__(self):
+        self.blocks = []
+        self.logs = []
+
+    def mine(self, count=1, fork="a"):
+        for _ in range(count):
+            self.blocks.append(HexBytes(bytes([len(self.blocks), ord(fork)]) * 16))
+
+    def register(self, diploma, fork="a"):
+        self.mine(fork=fork)
+        self._log(
+            "registered",
+            diploma,
+            SimpleNamespace(
+                diplomaId=HexBytes(diploma),
+                issuer=ISSUER,
+                student=STUDENT,
+                issuedAt=1,
+                metadata="",
+                storageMode=0,
+                ipfsHash="",
+            ),
+        )
+
+    def revoke(self, diploma, fork="a"):
+        self.mine(fork=fork)
+        self._log("revoked", diploma, SimpleNamespace(certHash=HexBytes(diploma)))
+
+    def _log(self, kind, diploma, args):
+        number = len(self.blocks) - 1
+        self.logs.append(
+            (
+                kind,
+                SimpleNamespace(
+                    args=args,
+                    blockNumber=number,
+                    blockHash=self.blocks[number],
+                    transactionHash=HexBytes(diploma[::-1]),
+                    logIndex=0,
+                ),
+            )
+        )
+
+    def reorg(self, from_block, fork="b"):
+        """Drop every block from ``from_block`` on; the caller mines the new branch."""
+        del self.blocks[from_block:]
+        self.logs = [
+            (kind, log) for kind, log in self.logs if log.blockNumber < from_block
+        ]
+
+    def get_block(self, number):
+        return (
+            SimpleNamespace(hash=self.blocks[number])
+            if number < len(self.blocks)
+            else None
+        )
+
+    @property
+    def block_number(self):
+        return len(self.blocks) - 1
+
+    def scan(self, event, from_block, to_block):
+        return [
+            log
+            for kind, log in self.logs
+            if kind == event and from_block <= log.blockNumber <= to_block
+        ]
+
+
+@pytest.fixture
+def chain(db, monkeypatch):
+    chain = FakeChain()
+    chain.mine(1)
+    monkeypatch.setattr(indexer_module, "scan_logs", chain.scan)
+    monkeypatch.setattr(
+        indexer_module,
+        "gas_used_by_tx",
+        lambda web3, hashes: {h: 21000 for h in hashes},
+    )
+    monkeypatch.setattr(
+        indexer_module,
+        "get_block_cache",
+        lambda web3: SimpleNamespace(
+            timestamps=lambda numbers: {number: 1000 + number for number in numbers}
+        ),
+    )
+    monkeypatch.setattr(
+        indexer_module, "_invalidate_cached_certificates", lambda address, ids: None
+    )
+    return chain
+
+
+def _indexer(chain, **kwargs):
+    contract = SimpleNamespace(
+        address=CONTRACT,
+        events=SimpleNamespace(
+            CertificateRegistered="registered", CertificateRevoked="revoked"
+        ),
+    )
+    manager = SimpleNamespace(
+        web3=SimpleNamespace(eth=chain),
+        refresh=lambda: None,
+        get_contract=lambda: contract,
+    )
+    kwargs.setdefault("confirmations", 0)
+    return CertificateIndexer(manager=manager, **kwargs)
+
+
+def _diploma(n):
+    return bytes([n]) * 32
+
+
+def _indexed_ids():
+    return sorted(IndexedCertificate.objects.values_list("diploma_id", flat=True))
+
+
+def _checkpoint():
+    return IndexerCheckpoint.objects.get(contract_address=CONTRACT)
+
+
+def test_sync_continues_from_the_checkpoint(chain):
+    indexer = _indexer(chain, batch_size=2)
+    chain.register(_diploma(1))
+    chain.register(_diploma(2))
+    assert indexer.sync_once() == 2
+    assert _checkpoint().block_number == 2
+    assert _checkpoint().block_hash == chain.blocks[2].hex()
+
+    chain.register(_diploma(3))
+    chain.revoke(_diploma(1))
+    assert indexer.sync_once() == 2
+    assert indexer.sync_once() == 0
+    assert _indexed_ids() == [_diploma(n).hex() for n in (1, 2, 3)]
+    assert IndexedRevocation.objects.get().block_timestamp == 1004
+    assert _checkpoint().block_number == 4
+
+
+def test_confirmations_hold_back_the_head(chain):
+    indexer = _indexer(chain, confirmations=2)
+    chain.register(_diploma(1))
+    chain.register(_diploma(2))
+    assert indexer.sync_once() == 0
+    chain.mine(2)
+    assert indexer.sync_once() == 2
+    assert _checkpoint().block_number == chain.block_number - 2
+
+
+def test_shallow_reorg_rewinds_to_the_last_canonical_block(chain):
+    indexer = _indexer(chain)
+    for n in (1, 2, 3):
+        chain.register(_diploma(n))
+    indexer.sync_once()
+
+    chain.reorg(3)
+    chain.register(_diploma(4), fork="b")
+    chain.mine(1, fork="b")
+    indexer.sync_once()
+    assert _indexed_ids() == [_diploma(n).hex() for n in (1, 2, 4)]
+    assert _checkpoint().rewinds == 1
+    assert _checkpoint().block_hash == chain.blocks[-1].hex()
+
+
+def test_reorg_deeper_than_the_limit_reindexes_everything(chain):
+    indexer = _indexer(chain, max_reorg_depth=2)
+    for n in (1, 2, 3, 4):
+        chain.register(_diploma(n))
+    indexer.sync_once()
+
+    chain.reorg(1)
+    chain.register(_diploma(5), fork="b")
+    chain.mine(4, fork="b")
+    indexer.sync_once()
+    assert _indexed_ids() == [_diploma(5).hex()]
+    assert _checkpoint().block_number == chain.block_number
+
+
+def test_range_is_not_stored_when_the_chain_changes_during_the_scan(chain, monkeypatch):
+    indexer = _indexer(chain)
+    chain.register(_diploma(1))
+    chain.register(_diploma(2))
+    scan = chain.scan
+
+    def scan_then_reorg(event, from_block, to_block):
+        logs = scan(event, from_block, to_block)
+        if event == "revoked":
+            chain.reorg(2)
+            chain.register(_diploma(3), fork="b")
+        return logs
+
+    monkeypatch.setattr(indexer_module, "scan_logs", scan_then_reorg)
+    assert indexer.sync_once() == 0
+    assert _checkpoint().block_number == -1
+    assert not IndexedCertificate.objects.exists()
+
+    monkeypatch.setattr(indexer_module, "scan_logs", scan)
+    assert indexer.sync_once() == 2
+    assert _indexed_ids() == [_diploma(n).hex() for n in (1, 3)]
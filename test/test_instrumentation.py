@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from app.api.smartcontract.instrumentation import (
+    NO_ROUTE,
+    in_current_context,
+    rpc_metrics_middleware,
+    rpc_requests,
+)
+from app.middleware import TraceIDMiddleware, get_current_route, get_current_trace_id
+
+ROUTE = "app/v1/things/<thing_id>"
+
+
+def _handle(view):
+    """Run ``view`` through TraceIDMiddleware as a request resolved to ROUTE."""
+    seen = []
+
+    def get_response(request):
+        middleware.process_view(request, view, (), {})
+        seen.append(view())
+        return HttpResponse()
+
+    middleware = TraceIDMiddleware(get_response)
+    request = RequestFactory().get("/app/v1/things/1", HTTP_X_TRACE_ID="trace-1")
+    request.resolver_match = SimpleNamespace(route=ROUTE)
+    response = middleware(request)
+    assert response["X-Trace-ID"] == "trace-1"
+    return seen[0]
+
+
+def test_route_and_trace_id_follow_the_request_into_pool_threads():
+    def view():
+        current = in_current_context(
+            lambda _: (get_current_route(), get_current_trace_id())
+        )
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return list(executor.map(current, range(4)))
+
+    assert _handle(view) == [(ROUTE, "trace-1")] * 4
+    assert get_current_route() is None
+    assert get_current_trace_id() is None
+
+
+def test_rpc_calls_are_counted_per_route():
+    labels = {"endpoint": "node:8545", "method": "eth_chainId", "status": "ok"}
+    call = rpc_metrics_middleware(
+        lambda method, params: {"result": "0x1"},
+        SimpleNamespace(provider=SimpleNamespace(metrics_label="node:8545")),
+    )
+    before = rpc_requests.value(route=ROUTE, **labels)
+    before_none = rpc_requests.value(route=NO_ROUTE, **labels)
+
+    _handle(lambda: call("eth_chainId", []))
+    call("eth_chainId", [])
+    assert rpc_requests.value(route=ROUTE, **labels) == before + 1
+    assert rpc_requests.value(route=NO_ROUTE, **labels) == before_none + 1
@@ -0,0 +1,54 @@
+import pytest
+from web3 import Web3
+
+from app.api.smartcontract.merkle import MerkleTree, hash_pair, leaf_hash, verify_proof
+
+STUDENT = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+
+
+def _leaves(count):
+    return [leaf_hash(Web3.keccak(text=str(i)), STUDENT) for i in range(count)]
+
+
+def test_leaf_hash_matches_abi_encode_packed():
+    diploma_id = Web3.keccak(text="diploma")
+    expected = Web3.solidity_keccak(["bytes32", "address"], [diploma_id, STUDENT])
+    assert leaf_hash(diploma_id, STUDENT) == expected
+    assert leaf_hash(diploma_id.hex(), STUDENT.lower()) == expected
+
+
+def test_hash_pair_is_commutative():
+    a, b = _leaves(2)
+    assert hash_pair(a, b) == hash_pair(b, a)
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8, 13])
+def test_every_proof_verifies(count):
+    leaves = _leaves(count)
+    tree = MerkleTree(leaves)
+    for index, leaf in enumerate(leaves):
+        assert verify_proof(leaf, tree.proof(index), tree.root)
+        assert verify_proof(
+            leaf.hex(),
+            [sibling.hex() for sibling in tree.proof(index)],
+            Web3.to_hex(tree.root),
+        )
+
+
+def test_single_leaf_is_the_root():
+    (leaf,) = _leaves(1)
+    tree = MerkleTree([leaf])
+    assert tree.root == leaf
+    assert tree.proof(0) == []
+
+
+def test_proof_rejects_other_leaves_and_roots():
+    leaves = _leaves(5)
+    tree = MerkleTree(leaves)
+    assert not verify_proof(leaves[1], tree.proof(0), tree.root)
+    assert not verify_proof(leaves[0], tree.proof(0), MerkleTree(leaves[:4]).root)
+
+
+def test_empty_tree_is_rejected():
+    with pytest.raises(ValueError):
+        MerkleTree([])
@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+
+from app.api.smartcontract.nonces import (
+    NonceManager,
+    is_already_known,
+    is_nonce_error,
+    is_nonce_too_high,
+)
+
+SENDER = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+OTHER = "0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "nonce too low",
+        "Nonce too high. Expected nonce to be 3 but got 5",
+        "replacement transaction underpriced",
+        "Invalid transaction nonce: Expected 25, but got 26",
+    ],
+)
+def test_nonce_errors(message):
+    assert is_nonce_error(ValueError({"message": message}))
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["already known", "known transaction: 0xabc", "insufficient funds for gas"],
+)
+def test_other_errors_are_not_nonce_errors(message):
+    assert not is_nonce_error(message)
+
+
+def test_already_known():
+    assert is_already_known(ValueError({"code": -32000, "message": "already known"}))
+    assert is_already_known("Known transaction: 0xabc")
+    assert not is_already_known("nonce too low")
+
+
+@pytest.mark.parametrize(
+    "message, too_high",
+    [
+        ("nonce too high", True),
+        ("Invalid transaction nonce: Expected 25, but got 26", True),
+        ("Invalid transaction nonce: Expected 25, but got 24", False),
+        ("nonce too low", False),
+    ],
+)
+def test_nonce_too_high(message, too_high):
+    assert is_nonce_too_high(message) is too_high
+
+
+class FakeEth:
+    """Pending nonce of one sender. Future nonces are rejected (Ganache) or queued (geth)."""
+
+    chain_id = 1337
+
+    def __init__(self, pending, queue_future=False):
+        self.pending = pending
+        self.queue_future = queue_future
+        self.queued = {}
+        self.mined = []
+
+    def get_transaction_count(self, address, block):
+        return self.pending
+
+    def send_transaction(self, tx):
+        nonce = tx["nonce"]
+        if nonce < self.pending:
+            raise ValueError({"message": "nonce too low"})
+        if nonce > self.pending and not self.queue_future:
+            raise ValueError(
+                {
+                    "message": f"Invalid transaction nonce: Expected {self.pending}, but got {nonce}"
+                }
+            )
+        self.queued[nonce] = tx
+        while self.pending in self.queued:
+            self.mined.append(self.queued.pop(self.pending))
+            self.pending += 1
+        return f"0x{nonce:064x}"
+
+
+def _nonce_manager(eth, resync_interval=3600):
+    cache.clear()
+    return NonceManager(
+        SimpleNamespace(eth=eth), cache=cache, resync_interval=resync_interval
+    )
+
+
+def _sent(eth):
+    return [(tx["nonce"], tx.get("value")) for tx in eth.mined]
+
+
+def test_gap_below_a_rejected_nonce_is_filled_not_rewound():
+    eth = FakeEth(pending=5)
+    nonces = _nonce_manager(eth)
+    assert nonces.allocate(SENDER) == 5
+    nonces.send_transaction({"from": SENDER, "to": OTHER, "value": 1, "nonce": 5})
+    assert nonces.allocate(SENDER) == 6  # allocated, never broadcast
+
+    nonces.send_transaction({"from": SENDER, "to": OTHER, "value": 1})
+    assert _sent(eth) == [(5, 1), (6, 0), (7, 1)]
+    assert eth.mined[1]["to"] == SENDER
+    assert nonces.allocate(SENDER) == 8
+
+
+def test_resync_never_moves_the_counter_down():
+    eth = FakeEth(pending=3)
+    nonces = _nonce_manager(eth)
+    nonces.allocate_many(SENDER, 5)
+    nonces.resync(SENDER)
+    assert nonces.allocate(SENDER) == 8
+
+    eth.pending = 20
+    nonces.resync(SENDER)
+    assert nonces.allocate(SENDER) == 20
+
+
+def test_nonce_used_elsewhere_is_sent_again_at_a_fresh_one():
+    eth = FakeEth(pending=0)
+    nonces = _nonce_manager(eth)
+    nonces.allocate(SENDER)
+    eth.pending = 4  # another sender used 0-3
+    nonces.send_transaction({"from": SENDER, "to": OTHER, "value": 1, "nonce": 0})
+    assert _sent(eth) == [(4, 1)]
+
+
+def test_stuck_node_has_its_gap_filled_at_the_next_send():
+    eth = FakeEth(pending=2, queue_future=True)
+    nonces = _nonce_manager(eth, resync_interval=0)
+    assert nonces.allocate_many(SENDER, 2) == [2, 3]  # never broadcast
+    nonces.allocate(SENDER)  # the node is at 2 ...
+    nonces.allocate(SENDER)  # ... and still is: a gap
+
+    # Without the fill, the node would queue nonce 6 behind the gap forever.
+    nonces.send_transaction({"from": SENDER, "to": OTHER, "value": 1})
+    assert _sent(eth) == [(2, 0), (3, 0), (4, 0), (5, 0), (6, 1)]
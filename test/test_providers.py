@@ -0,0 +1,71 @@
+import threading
+import time
+
+from app.api.smartcontract import providers
+from app.api.smartcontract.providers import (
+    CONTRACT_RPC_URL,
+    FailoverHTTPProvider,
+    get_web3,
+)
+
+
+def test_configured_url_is_shared():
+    assert get_web3(CONTRACT_RPC_URL) is get_web3(CONTRACT_RPC_URL)
+    assert get_web3(CONTRACT_RPC_URL, poa=True) is not get_web3(CONTRACT_RPC_URL)
+
+
+def test_client_urls_are_pooled_apart_and_closed_on_eviction(monkeypatch):
+    monkeypatch.setattr(providers, "WEB3_CLIENT_REGISTRY_SIZE", 2)
+    monkeypatch.setattr(providers, "_client_registry", providers.OrderedDict())
+    shared = get_web3(CONTRACT_RPC_URL)
+    first = get_web3("http://client-1:8545")
+    assert get_web3("http://client-1:8545") is first
+    closed = []
+    monkeypatch.setattr(first.provider.session, "close", lambda: closed.append(True))
+
+    get_web3("http://client-2:8545")
+    get_web3("http://client-3:8545")
+    assert closed == [True]
+    assert len(providers._client_registry) == 2
+    assert get_web3(CONTRACT_RPC_URL) is shared
+
+
+def _failover(hedge_delay, **answers):
+    provider = FailoverHTTPProvider(
+        ["http://node-a:8545", "http://node-b:8545"], hedge_delay=hedge_delay
+    )
+    threads = {}
+    for endpoint, name in zip(provider.endpoints, ("a", "b"), strict=True):
+
+        def make_request(method, params, name=name):
+            threads.setdefault(name, []).append(threading.current_thread())
+            return answers[name]()
+
+        endpoint.provider.make_request = make_request
+    return provider, threads
+
+
+def test_read_runs_on_the_calling_thread_without_a_hedge():
+    provider, threads = _failover(10, a=lambda: "a", b=lambda: "b")
+    assert provider.make_request("eth_call", []) == "a"
+    assert threads == {"a": [threading.current_thread()]}
+
+
+def test_slow_failing_read_falls_back_to_the_hedge_in_flight():
+    def slow_failure():
+        time.sleep(0.2)
+        raise ConnectionError("node-a is down")
+
+    provider, threads = _failover(0.01, a=slow_failure, b=lambda: "b")
+    assert provider.make_request("eth_call", []) == "b"
+    assert threads["a"] == [threading.current_thread()]
+    assert [thread.name.startswith("rpc-hedge") for thread in threads["b"]] == [True]
+
+
+def test_fast_failure_fails_over_without_the_pool():
+    def failure():
+        raise ConnectionError("node-a is down")
+
+    provider, threads = _failover(10, a=failure, b=lambda: "b")
+    assert provider.make_request("eth_call", []) == "b"
+    assert threads["b"] == [threading.current_thread()]
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.wallet.provisioning import WalletProvisioner
+from app.models import ProvisionedWallet
+
+FUND, GRANT = "0xf", "0xg"
+OK, REVERTED = {"status": 1}, {"status": 0}
+
+
+def _row(funded=True):
+    return SimpleNamespace(fund_tx_hash=FUND if funded else "", role_tx_hash=GRANT)
+
+
+@pytest.mark.parametrize(
+    "receipts, expected",
+    [
+        ({}, (ProvisionedWallet.CREATED, "")),
+        ({FUND: OK}, (ProvisionedWallet.FUNDED, "")),
+        ({GRANT: OK}, (ProvisionedWallet.CREATED, "")),
+        ({FUND: OK, GRANT: OK}, (ProvisionedWallet.READY, "")),
+        ({FUND: REVERTED}, (ProvisionedWallet.FAILED, "Funding transaction reverted")),
+        (
+            {FUND: OK, GRANT: REVERTED},
+            (ProvisionedWallet.FAILED, "Role grant reverted"),
+        ),
+    ],
+)
+def test_wallet_status(receipts, expected):
+    assert WalletProvisioner._wallet_status(_row(), receipts) == expected
+
+
+def test_unfunded_wallet_is_ready_after_the_grant():
+    assert WalletProvisioner._wallet_status(_row(funded=False), {}) == (
+        ProvisionedWallet.CREATED,
+        "",
+    )
+    assert WalletProvisioner._wallet_status(_row(funded=False), {GRANT: OK}) == (
+        ProvisionedWallet.READY,
+        "",
+    )
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.smartcontract import queries
+from app.api.smartcontract.queries import list_certificate_page
+from app.models import IndexedCertificate, IndexerCheckpoint
+
+CONTRACT = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+ADDRESS = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+INDEXED_BLOCKS = (1, 2, 3)
+CHAIN_BLOCKS = (4, 5)
+
+
+def _row(block_number):
+    return {
+        "cert_hash": f"{block_number:064x}",
+        "block_number": block_number,
+        "log_index": 0,
+    }
+
+
+@pytest.fixture
+def manager(db, monkeypatch):
+    for block_number in INDEXED_BLOCKS:
+        IndexedCertificate.objects.create(
+            contract_address=CONTRACT,
+            diploma_id=f"{block_number:064x}",
+            issuer=ADDRESS,
+            student=ADDRESS,
+            issued_at=0,
+            block_number=block_number,
+            block_hash="0x",
+            transaction_hash="0x",
+            log_index=0,
+        )
+    IndexerCheckpoint.objects.create(
+        contract_address=CONTRACT, block_number=INDEXED_BLOCKS[-1]
+    )
+
+    def scan_page(
+        manager,
+        contract,
+        issuer,
+        student,
+        diploma_id,
+        from_block,
+        to_block,
+        position,
+        limit,
+        descending,
+        with_gas,
+    ):
+        # Stands in for the log scan: the chain has blocks the index has not reached yet.
+        assert from_block > INDEXED_BLOCKS[-1]
+        rows = [_row(n) for n in sorted(CHAIN_BLOCKS, reverse=descending)]
+        rows = [
+            r
+            for r in rows
+            if position is None
+            or queries._after_cursor((r["block_number"], 0), position, descending)
+        ]
+        return rows if limit is None else rows[: limit + 1]
+
+    monkeypatch.setattr(queries, "_scan_page", scan_page)
+    monkeypatch.setattr(
+        queries,
+        "get_revocation_index",
+        lambda manager: SimpleNamespace(revoked_among=lambda ids: set()),
+    )
+    contract = SimpleNamespace(address=CONTRACT)
+    return SimpleNamespace(get_contract=lambda: contract)
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+def test_pages_cover_the_index_and_the_blocks_above_its_checkpoint(manager, direction):
+    seen, cursor = [], None
+    while True:
+        items, cursor = list_certificate_page(
+            manager, cursor=cursor, limit=2, direction=direction
+        )
+        seen += [item["block_number"] for item in items]
+        if cursor is None:
+            break
+    assert seen == sorted(INDEXED_BLOCKS + CHAIN_BLOCKS, reverse=direction == "desc")
+
+
+def test_unpaged_list_includes_the_gap(manager):
+    items, cursor = list_certificate_page(manager)
+    assert [item["block_number"] for item in items] == [1, 2, 3, 4, 5]
+    assert cursor is None
@@ -0,0 +1,46 @@
+from app.api.smartcontract.revocations import RevocationIndex
+from app.models import IndexedRevocation, IndexerCheckpoint
+
+CONTRACT = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+DIPLOMA = "ab" * 32
+
+
+def _revoke(block_number):
+    IndexedRevocation.objects.create(
+        contract_address=CONTRACT,
+        diploma_id=DIPLOMA,
+        block_number=block_number,
+        block_hash="0x",
+        transaction_hash="0x",
+        log_index=0,
+    )
+
+
+def test_new_revocations_are_picked_up(db):
+    checkpoint = IndexerCheckpoint.objects.create(
+        contract_address=CONTRACT, block_number=1
+    )
+    index = RevocationIndex(manager=None, contract_address=CONTRACT, refresh_interval=0)
+    assert not index.is_revoked(DIPLOMA)
+
+    _revoke(2)
+    checkpoint.block_number = 2
+    checkpoint.save()
+    assert index.is_revoked("0x" + DIPLOMA.upper())
+
+
+def test_rewind_between_refreshes_reloads_the_set(db):
+    _revoke(2)
+    checkpoint = IndexerCheckpoint.objects.create(
+        contract_address=CONTRACT, block_number=2
+    )
+    index = RevocationIndex(manager=None, contract_address=CONTRACT, refresh_interval=0)
+    assert index.is_revoked(DIPLOMA)
+
+    # The indexer rewound below block 2 (the revocation was reorged out) and
+    # then indexed past it again before the next refresh.
+    IndexedRevocation.objects.all().delete()
+    checkpoint.block_number = 5
+    checkpoint.rewinds = 1
+    checkpoint.save()
+    assert not index.is_revoked(DIPLOMA)
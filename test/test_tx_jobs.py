@@ -0,0 +1,169 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.utils import timezone
+from web3.exceptions import TransactionNotFound
+
+from app import tasks
+from app.api.smartcontract import tx_jobs, tx_watcher
+from app.api.smartcontract.nonces import _record_broadcast
+from app.models import TransactionJob
+
+SENDER = "0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69"
+TX_HASH = "0x" + "11" * 32
+
+
+class FakeEth:
+    def __init__(self, transactions=(), receipts=None, sent=0):
+        self.transactions = set(transactions)
+        self.receipts = receipts or {}
+        self.sent = sent
+        self.block_number = 10
+
+    def get_transaction(self, tx_hash):
+        if tx_hash not in self.transactions:
+            raise TransactionNotFound(tx_hash)
+        return {"hash": tx_hash}
+
+    def get_transaction_receipt(self, tx_hash):
+        if tx_hash not in self.receipts:
+            raise TransactionNotFound(tx_hash)
+        return self.receipts[tx_hash]
+
+    def get_transaction_count(self, address, block_identifier):
+        return self.sent
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    eth = FakeEth()
+    monkeypatch.setattr(tx_jobs, "job_web3", lambda job: SimpleNamespace(eth=eth))
+    return eth
+
+
+@pytest.fixture
+def resubmitted(monkeypatch):
+    queued = []
+    monkeypatch.setattr(tasks.submit_transaction_job, "delay", queued.append)
+    return queued
+
+
+def _job(status, **fields):
+    job = TransactionJob.objects.create(kind="fund_account", status=status, **fields)
+    # A lost worker: nothing touched the job for longer than the submit timeout.
+    TransactionJob.objects.filter(pk=job.pk).update(
+        updated_at=timezone.now() - timedelta(hours=1)
+    )
+    job.refresh_from_db()
+    return job
+
+
+def _receipt(status=1):
+    return {"blockNumber": 9, "gasUsed": 21000, "status": status}
+
+
+def test_submit_records_the_broadcast_before_sending(db, monkeypatch):
+    job = TransactionJob.objects.create(kind="test_send", params={})
+    seen = []
+
+    def send(params):
+        _record_broadcast(SENDER, 7, bytes.fromhex(TX_HASH[2:]))
+        seen.append(TransactionJob.objects.get(pk=job.pk))
+        return None, TX_HASH
+
+    monkeypatch.setitem(tx_jobs.SUBMITTERS, "test_send", send)
+    monkeypatch.setattr(
+        tasks.track_transaction_job, "apply_async", lambda *args, **kwargs: None
+    )
+    tasks.submit_transaction_job(str(job.pk))
+
+    marker = seen[0]
+    assert marker.status == TransactionJob.SUBMITTING
+    assert (marker.sender, marker.nonce, marker.tx_hash) == (SENDER, 7, TX_HASH)
+    job.refresh_from_db()
+    assert (job.status, job.tx_hash) == (TransactionJob.SUBMITTED, TX_HASH)
+
+
+def test_known_hash_moves_the_job_on(db, chain, resubmitted):
+    chain.transactions.add(TX_HASH)
+    job = _job(TransactionJob.SUBMITTING, sender=SENDER, nonce=3, tx_hash=TX_HASH)
+    assert tx_jobs.reconcile_submitting_job(job) == TransactionJob.SUBMITTED
+    assert resubmitted == []
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {},
+        {"sender": SENDER, "nonce": 3, "tx_hash": TX_HASH},
+        {"sender": SENDER, "nonce": 3},
+    ],
+    ids=["never-sent", "unknown-hash", "unused-nonce"],
+)
+def test_unsent_job_is_queued_again(db, chain, resubmitted, fields):
+    chain.sent = 3
+    job = _job(TransactionJob.SUBMITTING, **fields)
+    assert tx_jobs.reconcile_submitting_job(job) == TransactionJob.QUEUED
+    assert resubmitted == [str(job.pk)]
+    job.refresh_from_db()
+    assert (job.tx_hash, job.nonce) == ("", None)
+
+
+def test_used_nonce_without_hash_fails_instead_of_sending_twice(db, chain, resubmitted):
+    chain.sent = 4
+    job = _job(TransactionJob.SUBMITTING, sender=SENDER, nonce=3)
+    assert tx_jobs.reconcile_submitting_job(job) == TransactionJob.FAILED
+    assert resubmitted == []
+
+
+def test_job_changed_meanwhile_is_left_alone(db, chain, resubmitted):
+    job = _job(TransactionJob.SUBMITTING)
+    TransactionJob.objects.filter(pk=job.pk).update(updated_at=timezone.now())
+    assert tx_jobs.reconcile_submitting_job(job) is None
+    assert resubmitted == []
+
+
+def test_eager_tracking_does_not_wait_for_the_receipt(db, chain):
+    job = _job(TransactionJob.SUBMITTED, tx_hash=TX_HASH)
+    tasks.track_transaction_job.apply((str(job.pk),))
+    job.refresh_from_db()
+    assert job.status == TransactionJob.SUBMITTED
+
+    chain.receipts[TX_HASH] = _receipt()
+    tasks.track_transaction_job.apply((str(job.pk),))
+    job.refresh_from_db()
+    assert (job.status, job.block_number) == (TransactionJob.CONFIRMED, 9)
+
+
+def test_watcher_finishes_jobs_and_reaps_stuck_ones(
+    db, chain, monkeypatch, resubmitted
+):
+    reverted = "0x" + "22" * 32
+    receipts = {TX_HASH: _receipt(), reverted: _receipt(status=0)}
+    monkeypatch.setattr(
+        tx_watcher,
+        "fetch_receipts",
+        lambda web3, hashes: {h: receipts[h] for h in hashes if h in receipts},
+    )
+    confirmed = _job(TransactionJob.SUBMITTED, tx_hash=TX_HASH)
+    failed = _job(TransactionJob.SUBMITTED, tx_hash=reverted)
+    stuck = _job(TransactionJob.SUBMITTING)
+
+    counts = tx_watcher.TransactionWatcher().sync_once()
+    assert counts == {"job confirmed": 1, "job failed": 1, "job queued": 1}
+    assert resubmitted == [str(stuck.pk)]
+    confirmed.refresh_from_db()
+    failed.refresh_from_db()
+    assert confirmed.status == TransactionJob.CONFIRMED
+    assert (failed.status, failed.error) == (
+        TransactionJob.FAILED,
+        "Transaction reverted",
+    )
+
+
+def test_missing_contract_functions_are_named():
+    contract = SimpleNamespace(functions=SimpleNamespace(merkleRoots=None))
+    tx_jobs.require_functions(contract, "merkleRoots")
+    with pytest.raises(tx_jobs.UnsupportedContractError, match="anchorMerkleRoot"):
+        tx_jobs.require_functions(contract, "anchorMerkleRoot", "merkleRoots")